@@ -0,0 +1,7 @@
+"""Benchmarks for EVELink.
+
+These are not run as part of the test suite. Each module can be run
+directly from the repository root, e.g.:
+
+    $ python -m benchmarks.bench_strings
+"""
@@ -0,0 +1,66 @@
+"""Micro-benchmark of auto_call dispatch on cache hits.
+
+Compares the wrappers auto_call generates for each method with the
+generic wrapper (map_func_args, translate_args, sorting the params for
+the cache key), which API subclasses and instrumented APIs still use.
+
+'full' calls parse the cached XML, as real calls do; 'no XML' calls
+reuse a parsed result, leaving the wrapper, the cache key, the lookup
+and the method's own work.
+
+    $ python -m benchmarks.bench_dispatch [calls]
+"""
+import sys
+
+import evelink.api as evelink_api
+from evelink import char, eve, server
+from benchmarks import mock_server, utils
+
+
+class GenericAPI(evelink_api.API):
+    """Not an API exactly, so compiled wrappers use the generic one."""
+
+
+CASES = [
+    ('server_status()', 'server/server_status.xml', server.Server,
+     lambda client: client.server_status()),
+    ('character_info_from_id(id)', 'eve/character_info.xml', eve.EVE,
+     lambda client: client.character_info_from_id(1234)),
+    ('character_names_from_ids(ids)', 'eve/character_name.xml', eve.EVE,
+     lambda client: client.character_names_from_ids([1, 2, 3, 4])),
+    ('wallet_journal(before, limit)', 'char/wallet_journal.xml',
+     lambda api: char.Char(90000000, api=api),
+     lambda client: client.wallet_journal(before_id=1000, limit=50)),
+]
+
+
+def make_client(api_class, factory, fixture, parse):
+    # The fixture, with a cachedUntil in the future so calls hit the cache.
+    response = mock_server.MockEVE(fixtures={}).render('', utils.load_fixture(fixture))
+    api = api_class(api_key=(1, 'abc'))
+    api.send_request = lambda full_path, params: response
+    if not parse:
+        result = evelink_api.API.get(api, 'fixture')
+        api._handle_response = lambda path, key, response, cached: result
+    return factory(api=api)
+
+
+def run(calls=5000):
+    table = []
+    for name, fixture, factory, call in CASES:
+        row = [name]
+        for parse in (True, False):
+            timings = []
+            for api_class in (GenericAPI, evelink_api.API):
+                client = make_client(api_class, factory, fixture, parse)
+                call(client)  # fill the cache
+                timings.append(utils.timed(lambda: call(client), repeat=3, number=calls))
+            row.extend(['%.2f' % (t * 1e6) for t in timings])
+            row.append('%.2fx' % (timings[0] / timings[1]))
+        table.append(row)
+    utils.print_table(['call', 'full generic us', 'full compiled us', 'speedup',
+                       'no XML generic us', 'no XML compiled us', 'speedup'], table)
+
+
+if __name__ == '__main__':
+    run(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,81 @@
+"""Upstream fetches and throughput of services sharing an evelink.gateway.
+
+Several services (threads) each request the same set of API paths.
+Directly, every service has its own API and cache, so each of them
+fetches every path from the (slow) upstream. Through a gateway, each
+path is fetched once and every other request is served from its cache.
+The last row has clients without a cache of their own, so every
+request goes through the gateway (its raw throughput).
+
+    $ python -m benchmarks.bench_gateway [services] [requests per service] [latency ms]
+"""
+import sys
+import threading
+import time
+
+import evelink.api as evelink_api
+import evelink.gateway as evelink_gateway
+from benchmarks import mock_server, utils
+
+PATHS = ['char/WalletJournal', 'char/WalletTransactions', 'char/MarketOrders',
+         'corp/IndustryJobs', 'corp/Contracts', 'eve/AllianceList']
+
+
+class SlowAPI(utils.FakeAPI):
+    """A FakeAPI which takes 'latency' seconds per fetch, and counts them."""
+
+    def __init__(self, responses, latency, counter, **kw):
+        super(SlowAPI, self).__init__(responses, **kw)
+        self.latency = latency
+        self.counter = counter
+
+    def send_request(self, full_path, params):
+        self.counter.append(full_path)
+        time.sleep(self.latency)
+        return super(SlowAPI, self).send_request(full_path, params)
+
+
+def run_services(services, requests, make_api):
+    def service(i):
+        api = make_api()
+        for n in xrange(requests):
+            api.get_raw(PATHS[(i + n) % len(PATHS)], {'keyID': 1, 'vCode': 'abc'})
+
+    threads = [threading.Thread(target=service, args=(i,)) for i in xrange(services)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.time() - start
+
+
+def run(services=8, requests=200, latency_ms=50):
+    responses = dict((path, utils.make_response('<result />')) for path in PATHS)
+    latency = latency_ms / 1000.0
+    table = []
+
+    fetches = []
+    elapsed = run_services(services, requests, lambda: SlowAPI(
+        responses, latency, fetches, cache=evelink_api.APICache()))
+    table.append(['direct', len(fetches), '%.2f' % elapsed,
+                  '%.0f' % (services * requests / elapsed)])
+
+    for mode, client_cache in (('gateway', evelink_api.APICache),
+                               ('gateway, no client cache', utils.NoCache)):
+        fetches = []
+        gateway = evelink_gateway.Gateway(api=SlowAPI(
+            responses, latency, fetches, cache=evelink_api.APICache()))
+        with mock_server.serving(gateway) as base_url:
+            elapsed = run_services(services, requests, lambda: evelink_api.API(
+                base_url=base_url, cache=client_cache()))
+        table.append([mode, len(fetches), '%.2f' % elapsed,
+                      '%.0f' % (services * requests / elapsed)])
+
+    print '%d services x %d requests over %d paths, %d ms upstream latency' % (
+        services, requests, len(PATHS), latency_ms)
+    utils.print_table(['mode', 'upstream fetches', 'seconds', 'requests/s'], table)
+
+
+if __name__ == '__main__':
+    run(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,30 @@
+"""Cache-hit cost of API.get versus the unparsed API.get_raw.
+
+    $ python -m benchmarks.bench_get_raw [asset rows] [calls]
+"""
+import sys
+
+import evelink.api as evelink_api
+from benchmarks import utils
+from benchmarks.bench_gzip import compress
+
+
+def run(rows=10000, calls=20):
+    xml = utils.make_response(utils.replicate_rows('corp/assets.xml', rows, id_attr='itemID'))
+
+    table = []
+    for encoding, response in (('plain', xml), ('gzip', compress(xml))):
+        api = utils.FakeAPI({'corp/AssetList': response}, cache=evelink_api.APICache())
+        api.get('corp/AssetList')
+        assert api.get_raw('corp/AssetList')[0] is response
+
+        full = utils.timed(lambda: api.get('corp/AssetList'), number=calls)
+        raw = utils.timed(lambda: api.get_raw('corp/AssetList'), number=calls)
+        for name, elapsed in (('get', full), ('get_raw', raw)):
+            table.append([name, encoding, len(response) // 1024,
+                          '%.3f' % (elapsed * 1000), '%.1fx' % (full / elapsed)])
+    utils.print_table(['method', 'body', 'KiB', 'ms/call', 'speedup'], table)
+
+
+if __name__ == '__main__':
+    run(*[int(a) for a in sys.argv[1:]])
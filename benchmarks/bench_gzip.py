@@ -0,0 +1,96 @@
+"""Peak memory and time of parsing a large gzip compressed response.
+
+Compares decompressing the whole body before parsing it (the original
+api.decompress + ElementTree.fromstring path) with api.parse_response,
+which feeds the parser while decompressing. Each variant runs in a
+fresh process, and its peak memory is the growth of ru_maxrss while
+parsing.
+
+    $ python -m benchmarks.bench_gzip [asset rows]
+"""
+import gzip
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from StringIO import StringIO
+from xml.etree import ElementTree
+
+import evelink.api as evelink_api
+from benchmarks import utils
+
+
+def decompress_gzipfile(s):
+    """The original GzipFile-based decoder, kept as a reference."""
+    buf = StringIO(s)
+    f = gzip.GzipFile(fileobj=buf)
+    try:
+        return f.read()
+    finally:
+        f.close()
+        buf.close()
+
+
+def compress(s):
+    out = StringIO()
+    f = gzip.GzipFile(fileobj=out, mode='w')
+    f.write(s)
+    f.close()
+    return out.getvalue()
+
+
+def parse_decompressed(response):
+    return ElementTree.fromstring(decompress_gzipfile(response))
+
+
+def parse_streamed(response):
+    return evelink_api.parse_response(response)[0]
+
+
+VARIANTS = [
+    ('decompress + fromstring', parse_decompressed),
+    ('parse_response (streamed)', parse_streamed),
+]
+
+
+def measure(variant, path):
+    """Run in a child process: parse the response stored at 'path'."""
+    with open(path, 'rb') as f:
+        response = f.read()
+    func = dict(VARIANTS)[variant]
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    tree = func(response)
+    elapsed = time.time() - start
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    assert tree.find('result/rowset') is not None
+    print '%d %f' % (after - before, elapsed)
+
+
+def run(rows=100000):
+    xml = utils.make_response(utils.replicate_rows('corp/assets.xml', rows, id_attr='itemID'))
+    response = compress(xml)
+    fd, path = tempfile.mkstemp(suffix='.xml.gz')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(response)
+
+        table = []
+        for variant, _ in VARIANTS:
+            output = subprocess.check_output(
+                [sys.executable, '-m', 'benchmarks.bench_gzip', '--measure', variant, path])
+            peak_kb, elapsed = output.split()
+            table.append([variant, len(xml) // 1024, len(response) // 1024,
+                          int(peak_kb) // 1024, '%.1f' % (float(elapsed) * 1000)])
+    finally:
+        os.unlink(path)
+    utils.print_table(['parser', 'xml KiB', 'gzip KiB', 'peak MiB', 'ms'], table)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--measure']:
+        measure(*sys.argv[2:])
+    else:
+        run(*[int(a) for a in sys.argv[1:]])
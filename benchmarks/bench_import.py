@@ -0,0 +1,58 @@
+"""Time taken (and modules loaded) by importing evelink.
+
+Each statement runs in fresh interpreters, as a short-lived CLI call or
+worker would; the table shows the fastest and median of several runs.
+'import evelink' loads its submodules on first use, and the HTTP
+library is only imported by the first request.
+
+    $ python -m benchmarks.bench_import [runs]
+"""
+import os
+import subprocess
+import sys
+
+from benchmarks import utils
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STATEMENTS = [
+    'import evelink',
+    'import evelink.api',
+    'from evelink import server',
+    'from evelink import char',
+    'import evelink; evelink.corp.Corp',
+    'from evelink import *',
+    # For reference: what the first request adds.
+    'import requests',
+]
+
+MEASURE = """
+import sys, time
+before = len(sys.modules)
+start = time.time()
+%s
+print '%%f %%d' %% (time.time() - start, len(sys.modules) - before)
+"""
+
+
+def measure(statement):
+    output = subprocess.check_output([sys.executable, '-c', MEASURE % statement], cwd=ROOT)
+    elapsed, modules = output.split()
+    return float(elapsed), int(modules)
+
+
+def run(runs=10):
+    table = []
+    for statement in STATEMENTS:
+        try:
+            results = [measure(statement) for _ in xrange(runs)]
+        except subprocess.CalledProcessError:
+            continue
+        times = sorted(elapsed for elapsed, _ in results)
+        table.append([statement, '%.1f' % (times[0] * 1000),
+                      '%.1f' % (times[len(times) // 2] * 1000), results[0][1]])
+    utils.print_table(['statement', 'min ms', 'median ms', 'modules'], table)
+
+
+if __name__ == '__main__':
+    run(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,35 @@
+"""Overhead of instrumentation on a cache hit of a small response.
+
+Compares an API without an instrument, with a no-op Instrument and
+with an Aggregator.
+
+    $ python -m benchmarks.bench_instrumentation [calls]
+"""
+import sys
+
+import evelink.api as evelink_api
+import evelink.instrumentation as evelink_instrumentation
+import evelink.server as evelink_server
+from benchmarks import utils
+
+
+def run(calls=20000):
+    responses = {'server/ServerStatus': utils.make_response(
+        utils.load_fixture('server/server_status.xml'))}
+
+    table = []
+    baseline = None
+    for name, instrument in (('none', None),
+                             ('Instrument (no-op)', evelink_instrumentation.Instrument()),
+                             ('Aggregator', evelink_instrumentation.Aggregator())):
+        api = utils.FakeAPI(responses, cache=evelink_api.APICache(), instrument=instrument)
+        server = evelink_server.Server(api=api)
+        server.server_status()
+        elapsed = utils.timed(server.server_status, number=calls)
+        baseline = baseline or elapsed
+        table.append([name, '%.2f' % (elapsed * 1e6), '%+.1f%%' % ((elapsed / baseline - 1) * 100)])
+    utils.print_table(['instrument', 'us/call', 'overhead'], table)
+
+
+if __name__ == '__main__':
+    run(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,89 @@
+"""Poller throughput with mixed payload sizes, with and without a ParsePool.
+
+One thread keeps fetching a large corp/AssetList while several other
+threads poll small wallet journals. Without a pool, every large parse
+holds the GIL and stalls the small pollers; with one, large payloads
+are parsed in worker processes. (The pool can only help when there
+are spare CPUs for the workers.)
+
+    $ python -m benchmarks.bench_parse_pool [seconds] [asset rows] [small pollers]
+"""
+import multiprocessing
+import sys
+import threading
+import time
+
+import evelink.char as evelink_char
+import evelink.corp as evelink_corp
+from evelink.parsing import pool as evelink_pool
+from benchmarks import utils
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def poll(seconds, responses, pollers, parse_pool):
+    api = utils.FakeAPI(responses, parse_pool=parse_pool)
+    corp = evelink_corp.Corp(api=api)
+    char = evelink_char.Char(char_id=1, api=api)
+    deadline = time.time() + seconds
+    large_calls = []
+    small_latencies = []
+    lock = threading.Lock()
+
+    def large():
+        while time.time() < deadline:
+            start = time.time()
+            corp.assets()
+            large_calls.append(time.time() - start)
+
+    def small():
+        latencies = []
+        while time.time() < deadline:
+            start = time.time()
+            char.wallet_journal()
+            latencies.append(time.time() - start)
+        with lock:
+            small_latencies.extend(latencies)
+
+    threads = [threading.Thread(target=large)]
+    threads.extend(threading.Thread(target=small) for _ in xrange(pollers))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return large_calls, small_latencies
+
+
+def run(seconds=10, rows=30000, pollers=4):
+    responses = {
+        'corp/AssetList': utils.make_response(utils.replicate_rows('corp/assets.xml', rows)),
+        'char/WalletJournal': utils.make_response(utils.load_fixture('char/wallet_journal.xml')),
+    }
+    print 'AssetList payload: %.1f MiB, %d CPUs' % (
+        len(responses['corp/AssetList']) / 1024.0 / 1024, multiprocessing.cpu_count())
+
+    table = []
+    parse_pool = evelink_pool.ParsePool()
+    try:
+        for name, pool in (('in-process', None), ('parse pool', parse_pool)):
+            large, small = poll(seconds, responses, pollers, pool)
+            table.append([
+                name, len(large), '%.0f' % (len(small) / float(seconds)),
+                '%.1f' % (percentile(small, 0.5) * 1000),
+                '%.1f' % (percentile(small, 0.99) * 1000),
+                '%.1f' % (max(small or [0]) * 1000),
+            ])
+    finally:
+        parse_pool.close()
+
+    utils.print_table(
+        ['mode', 'large calls', 'small calls/s', 'p50 ms', 'p99 ms', 'max ms'], table)
+
+
+if __name__ == '__main__':
+    run(*[int(a) for a in sys.argv[1:]])
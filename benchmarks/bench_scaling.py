@@ -0,0 +1,110 @@
+"""Parse time and memory of the major endpoints against row count.
+
+Generates synthetic results (see benchmarks.fixtures) at each size and
+parses them with the client methods. Each run happens in a fresh
+process; 'peak MiB' is the growth of ru_maxrss while parsing (the
+element tree plus the result), 'result MiB' the size of the result.
+
+    $ python -m benchmarks.bench_scaling [--sizes 1000,10000,50000] [--csv PATH] [endpoint..]
+"""
+import csv
+import optparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from xml.etree import ElementTree
+
+import evelink.api as evelink_api
+import evelink.char as evelink_char
+import evelink.corp as evelink_corp
+from benchmarks import fixtures, utils
+
+
+def _char():
+    return evelink_char.Char(char_id=1, api=evelink_api.API())
+
+
+def _corp():
+    return evelink_corp.Corp(api=evelink_api.API())
+
+
+# endpoint: (generator call, client method)
+ENDPOINTS = {
+    'assets': (lambda gen, n: gen.assets(n, depth=3),
+               lambda r: _corp().assets(api_result=r)),
+    'wallet_journal': (lambda gen, n: gen.wallet_journal(n),
+                       lambda r: _char().wallet_journal(api_result=r)),
+    'wallet_transactions': (lambda gen, n: gen.wallet_transactions(n),
+                            lambda r: _char().wallet_transactions(api_result=r)),
+    'orders': (lambda gen, n: gen.orders(n),
+               lambda r: _char().orders(api_result=r)),
+    'members': (lambda gen, n: gen.members(n),
+                lambda r: _corp().members(api_result=r)),
+    'kills': (lambda gen, n: gen.kills(n // 20, attackers=5, items=10),
+              lambda r: _char().kills(api_result=r)),
+}
+
+
+def measure(endpoint, path):
+    """Run in a child process: parse the result stored at 'path'."""
+    with open(path) as f:
+        xml = f.read()
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    result = ENDPOINTS[endpoint][1](
+        evelink_api.APIResult(ElementTree.fromstring(xml), 0, 0)).result
+    elapsed = time.time() - start
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print '%d %d %f' % (after - before, utils.deep_sizeof(result), elapsed)
+
+
+def run(endpoints, sizes, csv_path=None):
+    rows = []
+    fd, path = tempfile.mkstemp(suffix='.xml')
+    os.close(fd)
+    try:
+        for endpoint in endpoints:
+            for size in sizes:
+                with open(path, 'w') as f:
+                    f.write(ENDPOINTS[endpoint][0](fixtures.Generator(seed=0), size))
+                output = subprocess.check_output(
+                    [sys.executable, '-m', 'benchmarks.bench_scaling', '--measure', endpoint, path])
+                peak_kb, result_bytes, elapsed = output.split()
+                elapsed = float(elapsed)
+                rows.append([endpoint, size, os.path.getsize(path) // 1024,
+                             '%.1f' % (elapsed * 1000), '%.2f' % (elapsed / size * 1e6),
+                             '%.1f' % (int(peak_kb) / 1024.0),
+                             '%.1f' % (int(result_bytes) / 1048576.0)])
+    finally:
+        os.unlink(path)
+
+    headers = ['endpoint', 'rows', 'xml KiB', 'ms', 'us/row', 'peak MiB', 'result MiB']
+    utils.print_table(headers, rows)
+    if csv_path:
+        with open(csv_path, 'wb') as f:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            writer.writerows(rows)
+
+
+def main():
+    if sys.argv[1:2] == ['--measure']:
+        return measure(*sys.argv[2:])
+
+    parser = optparse.OptionParser(usage="%prog [options] [endpoint..]")
+    parser.add_option("--sizes", default="1000,10000,50000",
+        help="Comma-separated row counts (kills count as 20 rows each).")
+    parser.add_option("--csv", dest="csv_path", metavar="PATH",
+        help="Also write the results as CSV, e.g. for charting.")
+    options, args = parser.parse_args()
+    for endpoint in args:
+        if endpoint not in ENDPOINTS:
+            parser.error("Unknown endpoint %r (one of: %s)" % (endpoint, ', '.join(sorted(ENDPOINTS))))
+    run(args or sorted(ENDPOINTS), [int(s) for s in options.sizes.split(',')], options.csv_path)
+
+
+if __name__ == '__main__':
+    main()
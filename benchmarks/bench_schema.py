@@ -0,0 +1,221 @@
+"""Compiled schemas versus the hand-written parsers they replaced.
+
+The reference parsers below are copies of the per-endpoint parsers as
+they were before evelink.parsing.schema; each case checks that both
+produce the same result before timing them. The remaining columns time
+the other output modes of the same schema, and parsing only a couple
+of fields with a projection ('fields='), or reading them from lazy
+views ('lazy=True').
+
+    $ python -m benchmarks.bench_schema [rows]
+"""
+import sys
+
+from evelink import api
+from evelink import constants
+from evelink.parsing import strings as evelink_strings
+from evelink.parsing.industry_jobs import JOBS
+from evelink.parsing.orders import ORDERS
+from evelink.parsing.wallet_journal import JOURNAL
+from evelink.parsing.wallet_transactions import TRANSACTIONS
+from benchmarks import utils
+
+
+def reference_wallet_journal(api_result, strings=None):
+    _s = evelink_strings.get_pool(strings)
+    rowset = api_result.find('rowset')
+    result = []
+
+    for row in rowset.findall('row'):
+        a = row.attrib
+        entry = {
+            'timestamp': api.parse_ts(a['date']),
+            'id': int(a['refID']),
+            'type_id': int(a['refTypeID']),
+            'party_1': {
+                'name': _s(a['ownerName1']),
+                'id': int(a['ownerID1']),
+            },
+            'party_2': {
+                'name': _s(a['ownerName2']),
+                'id': int(a['ownerID2']),
+            },
+            'arg': {
+                'name': _s(a['argName1']),
+                'id': int(a['argID1']),
+            },
+            'amount': float(a['amount']),
+            'balance': float(a['balance']),
+            'reason': _s(a['reason']),
+            'tax': {
+                'taxer_id': int(a.get('taxReceiverID') or 0),
+                'amount': float(a.get('taxAmount') or 0),
+            },
+        }
+
+        result.append(entry)
+
+    result.sort(key=lambda x: x['id'])
+    return result
+
+
+def reference_wallet_transactions(api_result, strings=None):
+    _s = evelink_strings.get_pool(strings)
+    rowset = api_result.find('rowset')
+    rows = rowset.findall('row')
+    result = []
+    for row in rows:
+        a = row.attrib
+        entry = {
+            'timestamp': api.parse_ts(a['transactionDateTime']),
+            'id': int(a['transactionID']),
+            'journal_id': int(a['journalTransactionID']),
+            'quantity': int(a['quantity']),
+            'type': {
+                'id': int(a['typeID']),
+                'name': _s(a['typeName']),
+            },
+            'price': float(a['price']),
+            'client': {
+                'id': int(a['clientID']),
+                'name': _s(a['clientName']),
+            },
+            'station': {
+                'id': int(a['stationID']),
+                'name': _s(a['stationName']),
+            },
+            'action': _s(a['transactionType']),
+            'for': _s(a['transactionFor']),
+        }
+        if 'characterID' in a:
+            entry['char'] = {
+                'id': int(a['characterID']),
+                'name': _s(a['characterName']),
+            }
+        result.append(entry)
+
+    return result
+
+
+def reference_market_orders(api_result):
+    rowset = api_result.find('rowset')
+    rows = rowset.findall('row')
+    result = {}
+    for row in rows:
+        a = row.attrib
+        id = int(a['orderID'])
+        result[id] = {
+            'id': id,
+            'char_id': int(a['charID']),
+            'station_id': int(a['stationID']),
+            'amount': int(a['volEntered']),
+            'amount_left': int(a['volRemaining']),
+            'status': constants.Market().order_status[int(a['orderState'])],
+            'type_id': int(a['typeID']),
+            'range': int(a['range']),
+            'account_key': int(a['accountKey']),
+            'duration': int(a['duration']),
+            'escrow': float(a['escrow']),
+            'price': float(a['price']),
+            'type': 'buy' if a['bid'] == '1' else 'sell',
+            'timestamp': api.parse_ts(a['issued']),
+        }
+
+    return result
+
+
+def reference_industry_jobs(api_result):
+    rowset = api_result.find('rowset')
+    result = {}
+
+    for row in rowset.findall('row'):
+        a = row.attrib
+        jobID = int(a['jobID'])
+        result[jobID] = {
+            'line_id': int(a['assemblyLineID']),
+            'container_id': int(a['containerID']),
+            'input': {
+                'id': int(a['installedItemID']),
+                'blueprint_type': 'copy' if a['installedItemCopy'] == '1' else 'original',
+                'location_id': int(a['installedItemLocationID']),
+                'quantity': int(a['installedItemQuantity']),
+                'prod_level': int(a['installedItemProductivityLevel']),
+                'mat_level': int(a['installedItemMaterialLevel']),
+                'runs_left': int(a['installedItemLicensedProductionRunsRemaining']),
+                'item_flag': int(a['installedItemFlag']),
+                'type_id': int(a['installedItemTypeID']),
+            },
+            'output': {
+                'location_id': int(a['outputLocationID']),
+                'bpc_runs': int(a['licensedProductionRuns']),
+                'container_location_id': int(a['containerLocationID']),
+                'type_id': int(a['outputTypeID']),
+                'flag': int(a['outputFlag']),
+            },
+            'runs': int(a['runs']),
+            'installer_id': int(a['installerID']),
+            'system_id': int(a['installedInSolarSystemID']),
+            'multipliers': {
+                'material': float(a['materialMultiplier']),
+                'char_material': float(a['charMaterialMultiplier']),
+                'time': float(a['timeMultiplier']),
+                'char_time': float(a['charTimeMultiplier']),
+            },
+            'container_type_id': int(a['containerTypeID']),
+            'delivered': a['completed'] == '1',
+            'finished': a['completedSuccessfully'] == '1',
+            'status': constants.Industry.job_status[int(a['completedStatus'])],
+            'activity_id': int(a['activityID']),
+            'install_ts': api.parse_ts(a['installTime']),
+            'begin_ts': api.parse_ts(a['beginProductionTime']),
+            'end_ts': api.parse_ts(a['endProductionTime']),
+            'pause_ts': api.parse_ts(a['pauseProductionTime']),
+        }
+
+    return result
+
+
+CASES = [
+    ('wallet_journal', 'char/wallet_journal.xml', reference_wallet_journal, JOURNAL,
+        ['party_2.id', 'amount']),
+    ('wallet_transactions', 'char/wallet_transactions.xml', reference_wallet_transactions, TRANSACTIONS,
+        ['type.id', 'price']),
+    ('orders', 'char/orders.xml', reference_market_orders, ORDERS,
+        ['type_id', 'amount_left']),
+    ('industry_jobs', 'char/industry_jobs.xml', reference_industry_jobs, JOBS,
+        ['status', 'end_ts']),
+]
+
+
+def run(rows=20000):
+    table = []
+    for name, fixture, reference, schema, fields in CASES:
+        result = utils.make_api_result(utils.replicate_rows(fixture, rows)).result
+        elements = result.find('rowset').findall('row')
+        assert reference(result) == schema.parse(elements), name
+
+        hand = utils.timed(lambda: reference(result), repeat=5)
+        times = [utils.timed(lambda: getattr(schema, mode)(elements), repeat=5)
+                 for mode in ('parse', 'records', 'columns')]
+        times.append(utils.timed(lambda: [r for r in schema.iterate(elements)], repeat=5))
+        projected = schema.project(fields)
+        times.append(utils.timed(lambda: projected.parse(elements), repeat=5))
+
+        def read_lazy():
+            rows = schema.lazy(elements)
+            if isinstance(rows, dict):
+                rows = rows.itervalues()
+            return [[row[f.split('.')[0]] for f in fields] for row in rows]
+        times.append(utils.timed(read_lazy, repeat=5))
+
+        table.append([name, rows, '%.1f' % (hand * 1000)] +
+                     ['%.1f' % (t * 1000) for t in times] +
+                     ['%.2fx' % (hand / times[0])])
+
+    utils.print_table(
+        ['parser', 'rows', 'hand ms', 'parse ms', 'records ms', 'columns ms',
+         'iterate ms', 'projected ms', 'lazy ms', 'speedup'], table)
+
+
+if __name__ == '__main__':
+    run(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,63 @@
+"""Memory saved by interning repeated strings in parsed results.
+
+    $ python -m benchmarks.bench_strings [rows]
+"""
+import sys
+
+import evelink.corp as evelink_corp
+import evelink.eve as evelink_eve
+from evelink.parsing import strings as evelink_strings
+from evelink.parsing.kills import parse_kills
+from evelink.parsing.wallet_journal import parse_wallet_journal
+from evelink.parsing.wallet_transactions import parse_wallet_transactions
+from benchmarks import utils
+
+
+def _members(api_result):
+    return evelink_corp.Corp(api=None).members(api_result=api_result).result
+
+
+def _alliances(api_result):
+    return evelink_eve.EVE(api=None).alliances(api_result=api_result).result
+
+
+CASES = [
+    ('wallet_journal', 'char/wallet_journal.xml',
+        lambda r: parse_wallet_journal(r.result), None),
+    ('wallet_transactions', 'char/wallet_transactions.xml',
+        lambda r: parse_wallet_transactions(r.result), None),
+    ('kills', 'char/kills.xml',
+        lambda r: parse_kills(r.result), None),
+    ('members', 'corp/members.xml', _members, None),
+    ('alliances', 'eve/alliances.xml', _alliances, 'allianceID'),
+]
+
+
+def run(rows=10000):
+    table = []
+    for name, fixture, parse, id_attr in CASES:
+        xml = utils.replicate_rows(fixture, rows, id_attr)
+        api_result = utils.make_api_result(xml)
+
+        evelink_strings.set_scope(None)
+        plain_bytes = utils.deep_sizeof(parse(api_result))
+        plain_time = utils.timed(lambda: parse(api_result), repeat=3)
+
+        evelink_strings.set_scope(evelink_strings.RESULT)
+        pooled_bytes = utils.deep_sizeof(parse(api_result))
+        pooled_time = utils.timed(lambda: parse(api_result), repeat=3)
+        evelink_strings.set_scope(None)
+
+        table.append([
+            name, rows,
+            '%.1f' % (plain_bytes / 1024.0 / 1024), '%.1f' % (pooled_bytes / 1024.0 / 1024),
+            '%.0f%%' % (100.0 * (plain_bytes - pooled_bytes) / plain_bytes),
+            '%.1f' % (plain_time * 1000), '%.1f' % (pooled_time * 1000),
+        ])
+
+    utils.print_table(
+        ['parser', 'rows', 'MiB', 'MiB pooled', 'saved', 'ms', 'ms pooled'], table)
+
+
+if __name__ == '__main__':
+    run(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,50 @@
+"""Micro-benchmark of timestamp decoding.
+
+Compares api.parse_ts and api.parse_ts_many against the strptime-based
+decoder they replaced.
+
+    $ python -m benchmarks.bench_timestamps [count]
+"""
+import calendar
+import random
+import sys
+import time
+
+import evelink.api as evelink_api
+from benchmarks import utils
+
+
+def parse_ts_strptime(v):
+    """The original strptime-based decoder, kept as a reference."""
+    if v == '':
+        return None
+    ts = calendar.timegm(time.strptime(v, "%Y-%m-%d %H:%M:%S"))
+    return ts if ts > 0 else None
+
+
+def make_values(count, days=30, seed=0):
+    """Timestamps spread over a number of days, like a journal rowset."""
+    rng = random.Random(seed)
+    start = 1339502673
+    return [time.strftime("%Y-%m-%d %H:%M:%S",
+                          time.gmtime(start + rng.randint(0, days * 86400)))
+            for _ in xrange(count)]
+
+
+def run(count=100000):
+    values = make_values(count)
+    assert [parse_ts_strptime(v) for v in values] == evelink_api.parse_ts_many(values)
+
+    reference = utils.timed(lambda: [parse_ts_strptime(v) for v in values], repeat=3)
+    fast = utils.timed(lambda: [evelink_api.parse_ts(v) for v in values], repeat=3)
+    batch = utils.timed(lambda: evelink_api.parse_ts_many(values), repeat=3)
+
+    table = []
+    for name, elapsed in (('strptime', reference), ('parse_ts', fast), ('parse_ts_many', batch)):
+        table.append([name, count, '%.1f' % (elapsed * 1000),
+                      '%.2f' % (elapsed / count * 1e6), '%.1fx' % (reference / elapsed)])
+    utils.print_table(['decoder', 'values', 'ms', 'us/value', 'speedup'], table)
+
+
+if __name__ == '__main__':
+    run(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,39 @@
+"""Time per API.get through each transport, against a local MockEVE.
+
+Fetches a synthetic corp/AssetList over HTTP with the urllib2 and the
+requests transports, with and without gzip, without any caching.
+
+    $ python -m benchmarks.bench_transports [asset rows] [calls] [latency ms]
+"""
+import sys
+
+import evelink.api as evelink_api
+from benchmarks import mock_server, utils
+
+
+def run(rows=5000, calls=10, latency_ms=0):
+    table = []
+    transports = [('urllib2', False)]
+    if evelink_api._import_requests():
+        transports.append(('requests', True))
+
+    for use_gzip in (False, True):
+        mock = mock_server.MockEVE(fixtures={}, latency=latency_ms / 1000.0, gzip=use_gzip)
+        mock.add('corp/AssetList',
+                 utils.replicate_rows('corp/assets.xml', rows, id_attr='itemID'))
+        with mock_server.serving(mock) as base_url:
+            for name, has_requests in transports:
+                saved, evelink_api._has_requests = evelink_api._has_requests, has_requests
+                try:
+                    api = evelink_api.API(base_url=base_url, cache=utils.NoCache())
+                    elapsed = utils.timed(lambda: api.get('corp/AssetList'),
+                                          repeat=3, number=calls)
+                finally:
+                    evelink_api._has_requests = saved
+                table.append([name, use_gzip and 'gzip' or 'plain',
+                              '%.1f' % (elapsed * 1000)])
+    utils.print_table(['transport', 'body', 'ms/call'], table)
+
+
+if __name__ == '__main__':
+    run(*[int(a) for a in sys.argv[1:]])
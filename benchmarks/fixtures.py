@@ -0,0 +1,254 @@
+"""Synthetic large-payload fixtures for scaling benchmarks.
+
+The fixtures under tests/xml hold a few rows each. Generator produces
+<result> documents with the same layout for the major endpoints, at any
+size (and, for assets and kills, nesting depth). Output only depends on
+the seed:
+
+    >>> gen = Generator(seed=0)
+    >>> xml = gen.assets(500000, depth=3)
+    >>> corp.assets(api_result=utils.make_api_result(xml))
+
+Documents can also be served by a mock_server.MockEVE:
+
+    >>> mock.add('corp/AssetList', gen.assets(500000))
+
+Names are drawn from a limited pool, as in real data (where the same
+few counterparties, stations and corps repeat), and timestamps
+descend from a fixed start so that journals page like real ones.
+"""
+import random
+import time
+from xml.sax.saxutils import quoteattr
+
+START = 1339502673  # 2012-06-12 12:04:33
+
+STATIONS = [
+    (60003760, 'Jita IV - Moon 4 - Caldari Navy Assembly Plant'),
+    (60008494, 'Amarr VIII (Oris) - Emperor Family Academy'),
+    (60011866, 'Dodixie IX - Moon 20 - Federation Navy Assembly Plant'),
+    (60004588, 'Rens VI - Moon 8 - Brutor Tribe Treasury'),
+    (60005686, 'Hek VIII - Moon 12 - Boundless Creation Factory'),
+]
+
+SHIPS = [(670, 'Capsule'), (606, 'Velator'), (587, 'Rifter'), (17932, 'Dramiel'),
+         (24690, 'Drake'), (11987, 'Guardian')]
+
+
+def _ts(ts):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(ts))
+
+
+def _row(attrs, children=None, indent='    '):
+    """Render a <row> from a list of (name, value) pairs."""
+    attrs = ' '.join('%s=%s' % (k, quoteattr(str(v))) for k, v in attrs)
+    if not children:
+        return '%s<row %s />' % (indent, attrs)
+    return '%s<row %s>\n%s\n%s</row>' % (indent, attrs, '\n'.join(children), indent)
+
+
+def _rowset(name, key, rows, indent='  '):
+    key = key and ' key="%s"' % key or ''
+    return '%s<rowset name="%s"%s>\n%s\n%s</rowset>' % (
+        indent, name, key, '\n'.join(rows), indent)
+
+
+def _result(*children):
+    return '<result>\n%s\n</result>' % '\n'.join(children)
+
+
+class Generator(object):
+    """Deterministic generator of large API results.
+
+    seed:
+        Optional. The same seed always produces the same documents.
+    names:
+        Optional. The number of distinct character names to use.
+    """
+
+    def __init__(self, seed=0, names=500):
+        self.random = random.Random(seed)
+        self.next_id = 1000000000
+        self.characters = [(90000000 + i, 'Pilot %d' % i) for i in xrange(names)]
+        self.corps = [(98000000 + i, 'Corp %d' % i) for i in xrange(max(1, names // 10))]
+        self.alliances = [(99000000 + i, 'Alliance %d' % i) for i in xrange(max(1, names // 50))]
+
+    def _id(self):
+        self.next_id += self.random.randint(1, 20)
+        return self.next_id
+
+    def _pick(self, values):
+        return values[self.random.randrange(len(values))]
+
+    def _times(self, count, step=600):
+        """'count' timestamps, newest first, like API history."""
+        ts = START
+        for _ in xrange(count):
+            yield ts
+            ts -= self.random.randint(1, step)
+
+    def assets(self, count, depth=2, fanout=8):
+        """An AssetList of 'count' items in total.
+
+        Every top-level item is a container holding 'fanout' items per
+        level, down to 'depth' levels (depth=1 is a flat list).
+        """
+        remaining = [count]
+
+        def items(level, indent):
+            rows = []
+            for _ in xrange(level == 1 and count or fanout):
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+                attrs = [('itemID', self._id())]
+                if level == 1:
+                    attrs.append(('locationID', self._pick(STATIONS)[0]))
+                attrs.extend([
+                    ('typeID', self.random.randint(18, 30000)),
+                    ('quantity', self.random.randint(1, 1000)),
+                    ('flag', level == 1 and 4 or self.random.randint(0, 120)),
+                    ('singleton', self.random.randint(0, 1)),
+                ])
+                children = None
+                if level < depth and remaining[0] > 0:
+                    attrs.append(('rawQuantity', -1))
+                    children = [_rowset('contents', 'itemID', items(level + 1, indent + '    '),
+                                        indent=indent + '  ')]
+                rows.append(_row(attrs, children, indent=indent))
+            return rows
+
+        return _result(_rowset('assets', 'itemID', items(1, '    ')))
+
+    def wallet_journal(self, count):
+        """A WalletJournal of 'count' entries."""
+        balance = 1e9
+        rows = []
+        for ts in self._times(count):
+            owner_1, owner_2 = self._pick(self.characters), self._pick(self.characters)
+            amount = round(self.random.uniform(-1e7, 1e7), 2)
+            balance += amount
+            rows.append(_row([
+                ('date', _ts(ts)), ('refID', self._id()),
+                ('refTypeID', self._pick([1, 2, 10, 37, 42, 46, 72, 85])),
+                ('ownerName1', owner_1[1]), ('ownerID1', owner_1[0]),
+                ('ownerName2', owner_2[1]), ('ownerID2', owner_2[0]),
+                ('argName1', ''), ('argID1', 0),
+                ('amount', '%.2f' % amount), ('balance', '%.2f' % balance),
+                ('reason', ''), ('taxReceiverID', ''), ('taxAmount', ''),
+            ]))
+        return _result(_rowset('entries', 'refID', rows))
+
+    def wallet_transactions(self, count):
+        """WalletTransactions with 'count' rows."""
+        rows = []
+        for ts in self._times(count):
+            client = self._pick(self.characters)
+            station = self._pick(STATIONS)
+            type_id = self.random.randint(18, 30000)
+            rows.append(_row([
+                ('transactionDateTime', _ts(ts)), ('transactionID', self._id()),
+                ('quantity', self.random.randint(1, 1000)),
+                ('typeName', 'Type %d' % type_id), ('typeID', type_id),
+                ('price', '%.2f' % self.random.uniform(1, 1e8)),
+                ('clientID', client[0]), ('clientName', client[1]),
+                ('stationID', station[0]), ('stationName', station[1]),
+                ('transactionType', self._pick(['buy', 'sell'])),
+                ('transactionFor', 'personal'),
+                ('journalTransactionID', self._id()),
+            ]))
+        return _result(_rowset('transactions', 'transactionID', rows))
+
+    def orders(self, count):
+        """MarketOrders with 'count' rows."""
+        char_id = self.characters[0][0]
+        rows = []
+        for ts in self._times(count):
+            entered = self.random.randint(1, 10000)
+            rows.append(_row([
+                ('orderID', self._id()), ('charID', char_id),
+                ('stationID', self._pick(STATIONS)[0]),
+                ('volEntered', entered), ('volRemaining', self.random.randint(0, entered)),
+                ('minVolume', 1), ('orderState', self.random.randint(0, 5)),
+                ('typeID', self.random.randint(18, 30000)), ('range', 32767),
+                ('accountKey', 1000), ('duration', 90), ('escrow', '0.00'),
+                ('price', '%.2f' % self.random.uniform(1, 1e8)),
+                ('bid', self.random.randint(0, 1)), ('issued', _ts(ts)),
+            ]))
+        return _result(_rowset('orders', 'orderID', rows))
+
+    def members(self, count):
+        """An extended MemberTracking with 'count' members."""
+        rows = []
+        for i, ts in enumerate(self._times(count, step=86400)):
+            station = self._pick(STATIONS)
+            ship = self._pick(SHIPS)
+            rows.append(_row([
+                ('characterID', 90000000 + i), ('name', 'Member %d' % i),
+                ('startDateTime', _ts(ts)), ('baseID', 0), ('base', ''),
+                ('title', ''), ('logonDateTime', _ts(START - self.random.randint(0, 86400))),
+                ('logoffDateTime', _ts(START - self.random.randint(0, 3600))),
+                ('locationID', station[0]), ('location', station[1]),
+                ('shipTypeID', ship[0]), ('shipType', ship[1]),
+                ('roles', self._pick([0, 0, 0, 22517998271070336])), ('grantableRoles', 0),
+            ]))
+        return _result(_rowset('members', 'characterID', rows))
+
+    def _pilot(self):
+        char = self._pick(self.characters)
+        corp = self._pick(self.corps)
+        alliance = self._pick(self.alliances)
+        return [
+            ('characterID', char[0]), ('characterName', char[1]),
+            ('corporationID', corp[0]), ('corporationName', corp[1]),
+            ('allianceID', alliance[0]), ('allianceName', alliance[1]),
+            ('factionID', 0), ('factionName', ''),
+        ]
+
+    def kills(self, count, attackers=5, items=10, depth=2):
+        """KillLog with 'count' kills.
+
+        Each kill has 'attackers' attackers and 'items' items, nested
+        in containers down to 'depth' levels.
+        """
+        def item_rows(level, indent):
+            rows = []
+            for _ in xrange(level == 1 and items or 2):
+                children = None
+                if level < depth and self.random.random() < 0.2:
+                    children = [_rowset('items', None, item_rows(level + 1, indent + '    '),
+                                        indent=indent + '  ')]
+                rows.append(_row([
+                    ('typeID', self.random.randint(18, 30000)),
+                    ('flag', self.random.randint(0, 120)),
+                    ('qtyDropped', self.random.randint(0, 2)),
+                    ('qtyDestroyed', self.random.randint(0, 2)),
+                    ('singleton', 0),
+                ], children, indent=indent))
+            return rows
+
+        rows = []
+        for ts in self._times(count):
+            victim = '        <victim %s />' % ' '.join(
+                '%s=%s' % (k, quoteattr(str(v))) for k, v in self._pilot() + [
+                    ('damageTaken', self.random.randint(100, 100000)),
+                    ('shipTypeID', self._pick(SHIPS)[0])])
+            attacker_rows = []
+            for i in xrange(attackers):
+                attacker_rows.append(_row(self._pilot() + [
+                    ('securityStatus', '%.3f' % self.random.uniform(-10, 5)),
+                    ('damageDone', self.random.randint(0, 10000)),
+                    ('finalBlow', int(i == 0)),
+                    ('weaponTypeID', self.random.randint(18, 30000)),
+                    ('shipTypeID', self._pick(SHIPS)[0]),
+                ], indent='            '))
+            rows.append(_row([
+                ('killID', self._id()), ('solarSystemID', self.random.randint(30000001, 30005000)),
+                ('killTime', _ts(ts)), ('moonID', 0),
+            ], [
+                victim,
+                _rowset('attackers', None, attacker_rows, indent='        '),
+                _rowset('items', None, item_rows(1, '            '), indent='        '),
+            ]))
+        return _result(_rowset('kills', 'killID', rows))
+
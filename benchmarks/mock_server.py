@@ -0,0 +1,224 @@
+"""A local stand-in for the EVE API, for offline load and latency testing.
+
+MockEVE is a WSGI application serving the real URL layout
+(/char/WalletJournal.xml.aspx, ...) from the XML fixtures under
+tests/xml, plus any synthetic results added to it. Each response gets
+a fresh currentTime and a cachedUntil a configurable number of seconds
+later, so caches behave as they would against the real API.
+
+    >>> mock = MockEVE(latency=0.05, error_rate=0.01)
+    >>> mock.add('corp/AssetList', utils.replicate_rows('corp/assets.xml', 50000))
+    >>> with serving(mock) as base_url:
+    ...     corp = Corp(api=API(base_url=base_url))
+
+It can also be run on its own:
+
+    $ python -m benchmarks.mock_server [options] [port]
+"""
+import contextlib
+import gzip
+import inspect
+import optparse
+import os
+import random
+import sys
+import threading
+import time
+from StringIO import StringIO
+
+from evelink import account, char, corp, eve, gateway, map, server
+from benchmarks import utils
+
+RESPONSE = """<?xml version='1.0' encoding='UTF-8'?>
+<eveapi version="2">
+    <currentTime>%s</currentTime>
+    %s
+    <cachedUntil>%s</cachedUntil>
+</eveapi>
+"""
+
+ERROR = '<error code="%s">%s</error>'
+
+
+def _format_ts(ts):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(ts))
+
+
+def compress(s):
+    out = StringIO()
+    f = gzip.GzipFile(fileobj=out, mode='w')
+    f.write(s)
+    f.close()
+    return out.getvalue()
+
+
+def find_fixtures():
+    """Map API paths to the fixtures of the methods which call them.
+
+    A method 'char.Char.wallet_journal' requesting 'char/WalletJournal'
+    is served from tests/xml/char/wallet_journal.xml, if it exists.
+    """
+    fixtures = {}
+    for module in (account, char, corp, eve, map, server):
+        module_name = module.__name__.rsplit('.', 1)[1]
+        for _, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            for name, method in inspect.getmembers(cls, inspect.ismethod):
+                specs = getattr(method, '_request_specs', None)
+                path = os.path.join(utils.XML_DIR, module_name, '%s.xml' % name)
+                if specs and specs['path'] not in fixtures and os.path.exists(path):
+                    fixtures[specs['path']] = utils.load_fixture(
+                        os.path.join(module_name, '%s.xml' % name))
+    return fixtures
+
+
+class MockEVE(object):
+    """WSGI application replaying fixtures on the EVE API URL layout.
+
+    latency:
+        Optional. Seconds to wait before every response (default: 0).
+    jitter:
+        Optional. Up to this many extra seconds of random latency.
+    error_rate:
+        Optional. The fraction of requests answered with an API error
+        (code 'error_code', HTTP 403 like the real API).
+    failure_rate:
+        Optional. The fraction of requests failing with an HTTP 503
+        and no body, as when the API is down.
+    gzip:
+        Optional. Compress responses for clients which accept gzip
+        (default: True).
+    cache_seconds:
+        Optional. How long after currentTime cachedUntil is, either for
+        every path or as a dict of {path: seconds} (default: 3600).
+    seed:
+        Optional. Seed for the random latency and errors, to make runs
+        reproducible.
+    """
+
+    def __init__(self, fixtures=None, latency=0.0, jitter=0.0, error_rate=0.0,
+                 failure_rate=0.0, gzip=True, cache_seconds=3600, error_code=221,
+                 seed=None):
+        self.fixtures = find_fixtures() if fixtures is None else dict(fixtures)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.failure_rate = failure_rate
+        self.gzip = gzip
+        self.cache_seconds = cache_seconds
+        self.error_code = error_code
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = {}
+
+    def add(self, path, result_xml):
+        """Serve a (synthetic) <result> document for an API path."""
+        self.fixtures[path] = result_xml
+
+    def request_count(self, path=None):
+        """The number of requests served, in total or for one path."""
+        with self.lock:
+            if path is None:
+                return sum(self.requests.itervalues())
+            return self.requests.get(path, 0)
+
+    def _cache_seconds(self, path):
+        if isinstance(self.cache_seconds, dict):
+            return self.cache_seconds.get(path, 3600)
+        return self.cache_seconds
+
+    def render(self, path, body, now=None):
+        """Wrap a result (or error) into a complete API response."""
+        now = int(now or time.time())
+        if body.startswith('<?xml'):
+            body = body[body.index('?>') + 2:]
+        return RESPONSE % (_format_ts(now), body.strip(),
+                           _format_ts(now + self._cache_seconds(path)))
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '').lstrip('/')
+        for suffix in ('.xml.aspx', '.xml'):
+            if path.endswith(suffix):
+                path = path[:-len(suffix)]
+                break
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            delay = self.latency + self.random.random() * self.jitter
+            roll = self.random.random()
+
+        if delay:
+            time.sleep(delay)
+
+        if path not in self.fixtures:
+            start_response('404 Not Found', [('Content-Type', 'text/plain')])
+            return ['No fixture for %s\n' % path]
+
+        if roll < self.failure_rate:
+            start_response('503 Service Unavailable', [('Content-Length', '0')])
+            return []
+        elif roll < self.failure_rate + self.error_rate:
+            status = '403 Forbidden'
+            body = self.render(path, ERROR % (self.error_code, 'Injected error.'))
+        else:
+            status = '200 OK'
+            body = self.render(path, self.fixtures[path])
+
+        headers = [('Content-Type', 'application/xml; charset=utf-8')]
+        if self.gzip and 'gzip' in environ.get('HTTP_ACCEPT_ENCODING', ''):
+            body = compress(body)
+            headers.append(('Content-Encoding', 'gzip'))
+        headers.append(('Content-Length', str(len(body))))
+        start_response(status, headers)
+        return [body]
+
+
+@contextlib.contextmanager
+def serving(app, host='127.0.0.1', port=0):
+    """Serve a WSGI app (e.g. a MockEVE) in a background thread.
+
+    Yields its base URL, to be passed as API(base_url=...).
+    """
+    httpd = gateway.make_server(app, host, port)
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.start()
+    try:
+        yield 'http://%s:%d' % (host, httpd.server_port)
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        thread.join()
+
+
+def main():
+    parser = optparse.OptionParser(usage="%prog [options] [port]")
+    parser.add_option("--latency", type="float", default=0.0, metavar="MS",
+        help="Delay every response by this many milliseconds.")
+    parser.add_option("--jitter", type="float", default=0.0, metavar="MS",
+        help="Add up to this many milliseconds of random delay.")
+    parser.add_option("--error-rate", type="float", default=0.0, metavar="FRACTION",
+        help="Answer this fraction of requests with an API error.")
+    parser.add_option("--failure-rate", type="float", default=0.0, metavar="FRACTION",
+        help="Fail this fraction of requests with an HTTP 503.")
+    parser.add_option("--no-gzip", dest="gzip", default=True, action="store_false",
+        help="Never compress responses.")
+    parser.add_option("--cache-seconds", type="int", default=3600, metavar="SECONDS",
+        help="Set cachedUntil this many seconds after currentTime.")
+    parser.add_option("--seed", type="int", help="Seed for the random delays and errors.")
+    options, args = parser.parse_args()
+
+    mock = MockEVE(latency=options.latency / 1000.0, jitter=options.jitter / 1000.0,
+                   error_rate=options.error_rate, failure_rate=options.failure_rate,
+                   gzip=options.gzip, cache_seconds=options.cache_seconds,
+                   seed=options.seed)
+    httpd = gateway.make_server(mock, '127.0.0.1', int(args[0]) if args else 8081)
+    print >> sys.stderr, "Serving %d fixtures on http://%s:%d/" % (
+        (len(mock.fixtures),) + httpd.server_address)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
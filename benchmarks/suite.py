@@ -0,0 +1,361 @@
+"""Per-endpoint benchmark suite with regression thresholds.
+
+Covers, offline:
+
+- every auto_call method of Account, Char, Corp, EVE, Map and Server,
+  parsing its fixture from tests/xml (XML parsing included);
+- the major endpoints at generated sizes (see benchmarks.fixtures),
+  named like 'corp.Corp.assets[50000]';
+- the EVECentral and EVEWho parsers;
+- get and put of each cache backend.
+
+Each case runs in a fresh process, for at least --min-time seconds,
+and reports ops/sec, min/p50/p99 latency and peak memory (the growth of
+ru_maxrss while it runs).
+
+    $ python -m benchmarks.suite --save     # record the baseline
+    $ python -m benchmarks.suite            # compare against it
+    $ python -m benchmarks.suite -k wallet -k cache --threshold 0.5
+
+Baselines are machine-specific, so they are not checked in; --save
+writes (or updates) benchmarks/baseline.json. When comparing, the
+suite exits with status 1 if any case's latency or peak memory grew by
+more than the threshold (default: 25%). Latency is compared by the
+fastest run, which unlike the median hardly moves between runs of the
+same code, and changes smaller than --min-delta are ignored.
+"""
+import atexit
+import inspect
+import itertools
+import json
+import optparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import evelink.api as evelink_api
+from evelink import account, char, corp, eve, map, server
+from evelink.cache.shelf import ShelveCache
+from evelink.cache.sqlite import SqliteCache
+from evelink.thirdparty.eve_central import EVECentral
+from evelink.thirdparty.eve_who import EVEWho
+from benchmarks import fixtures, utils
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+CLIENT_MODULES = (account, char, corp, eve, map, server)
+
+# Latency changes (in ms) smaller than this are timer, scheduling and
+# CPU frequency noise, whatever their ratio.
+MIN_LATENCY_DELTA_MS = 0.25
+
+# Fixtures of methods which don't have one under their own name.
+FIXTURE_ALIASES = {
+    'char.Char.assets': 'corp/assets.xml',
+    'char.Char.contacts': 'char/contact_list.xml',
+    'char.Char.contracts': 'corp/contracts.xml',
+    'corp.Corp.contacts': 'corp/contact_list.xml',
+    'eve.EVE.character_ids_from_names': 'eve/character_id.xml',
+    'eve.EVE.character_info_from_id': 'eve/character_info.xml',
+    'eve.EVE.character_names_from_ids': 'eve/character_name.xml',
+}
+
+# Values for required method arguments.
+REQUIRED_ARGS = {
+    'char_id': 1,
+    'contract_id': 1,
+    'event_ids': [123, 234, 345],
+    'id_list': [1],
+    'location_list': [1],
+    'message_ids': [1],
+    'name_list': ['Pilot'],
+    'notification_ids': [1],
+    'starbase_id': 1,
+    'station_id': 1,
+}
+
+# (method, generator, rows) for the generated cases.
+LARGE = [
+    ('corp.Corp.assets', lambda gen, n: gen.assets(n, depth=3), 50000),
+    ('char.Char.wallet_journal', lambda gen, n: gen.wallet_journal(n), 50000),
+    ('char.Char.wallet_transactions', lambda gen, n: gen.wallet_transactions(n), 50000),
+    ('char.Char.orders', lambda gen, n: gen.orders(n), 50000),
+    ('corp.Corp.members', lambda gen, n: gen.members(n), 10000),
+    ('char.Char.kills', lambda gen, n: gen.kills(n), 1000),
+]
+
+
+def _client_methods():
+    """Yield ('module.Class.method', class, method name, request specs)."""
+    for module in CLIENT_MODULES:
+        module_name = module.__name__.rsplit('.', 1)[1]
+        for cls_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            for name, method in inspect.getmembers(cls, inspect.ismethod):
+                specs = getattr(method, '_request_specs', None)
+                if specs:
+                    yield '%s.%s.%s' % (module_name, cls_name, name), cls, name, specs
+
+
+def _fixture_path(case_name):
+    module_name, _, method_name = case_name.split('.')
+    candidates = [FIXTURE_ALIASES.get(case_name), '%s/%s.xml' % (module_name, method_name)]
+    # Char and Corp share the layout of most of their endpoints.
+    candidates += ['%s/%s.xml' % (m, method_name) for m in ('char', 'corp')]
+    for path in candidates:
+        if path and os.path.exists(os.path.join(utils.XML_DIR, path)):
+            return path
+    return None
+
+
+def _bind(cls, name, specs):
+    kw = {'api': evelink_api.API()}
+    if 'char_id' in inspect.getargspec(cls.__init__).args:
+        kw['char_id'] = 1
+    method = getattr(cls(**kw), name)
+    args = {}
+    if specs is not None:
+        args = dict((a, REQUIRED_ARGS[a]) for a in specs['args'] if a not in specs['defaults'])
+    return method, args
+
+
+def _method_case(cls, name, specs, make_xml):
+    def setup():
+        method, args = _bind(cls, name, specs)
+        xml = make_xml()
+        return lambda: method(api_result=utils.make_api_result(xml), **args)
+    return setup
+
+
+def _thirdparty_cases():
+    def market_stats():
+        xml = utils.load_fixture('thirdparty/eve_central/market_stats.xml')
+        evec = EVECentral(url_fetch_func=lambda url: xml)
+        return lambda: evec.market_stats([34, 35])
+
+    def item_orders():
+        xml = utils.load_fixture('thirdparty/eve_central/item_orders.xml')
+        evec = EVECentral(url_fetch_func=lambda url: xml)
+        return lambda: evec.item_orders(34)
+
+    def route():
+        hops = json.dumps([{'fromid': 30000000 + i, 'from': 'System %d' % i,
+                            'toid': 30000001 + i, 'to': 'System %d' % (i + 1),
+                            'secchange': False} for i in xrange(40)])
+        evec = EVECentral(url_fetch_func=lambda url: hops)
+        return lambda: evec.route('Jita', 'Amarr')
+
+    def member_list():
+        members = [{'character_id': str(90000000 + i), 'corporation_id': '98000000',
+                    'alliance_id': '99000000', 'name': 'Pilot %d' % i} for i in xrange(1000)]
+        pages = dict((str(p), json.dumps({
+            'info': {'corporation_id': '98000000', 'name': 'Corp', 'member_count': '1000'},
+            'characters': members[p * 200:(p + 1) * 200]})) for p in xrange(5))
+        evewho = EVEWho(url_fetch_func=lambda url: pages[url.rsplit('page=', 1)[1].split('&')[0]],
+                        cache=utils.NoCache())
+        return lambda: evewho.corp_member_list(98000000)
+
+    return [
+        ('thirdparty.EVECentral.market_stats', market_stats),
+        ('thirdparty.EVECentral.item_orders', item_orders),
+        ('thirdparty.EVECentral.route', route),
+        ('thirdparty.EVEWho.corp_member_list', member_list),
+    ]
+
+
+def _cache_cases():
+    def temp_path(name):
+        path = tempfile.mkdtemp(prefix='evelink-bench-')
+        atexit.register(shutil.rmtree, path, True)
+        return os.path.join(path, name)
+
+    backends = [
+        ('APICache', lambda: evelink_api.APICache()),
+        ('SqliteCache', lambda: SqliteCache(temp_path('cache.sqlite'))),
+        ('ShelveCache', lambda: ShelveCache(temp_path('cache.shelf'))),
+    ]
+    value = utils.make_response(utils.load_fixture('char/wallet_journal.xml'))
+    keys = ['1-%d' % i for i in xrange(1000)]
+
+    cases = []
+    for backend_name, make_cache in backends:
+        def get(make_cache=make_cache):
+            cache = make_cache()
+            for key in keys:
+                cache.put(key, value, 3600)
+            it = itertools.cycle(keys)
+            return lambda: cache.get(it.next())
+
+        def put(make_cache=make_cache):
+            cache = make_cache()
+            it = itertools.cycle(keys)
+            return lambda: cache.put(it.next(), value, 3600)
+
+        cases.append(('cache.%s.get' % backend_name, get))
+        cases.append(('cache.%s.put' % backend_name, put))
+    return cases
+
+
+def cases():
+    """Return the list of (name, setup) cases.
+
+    setup() prepares a case and returns the function to time.
+    """
+    result = []
+    methods = {
+        # Not an auto_call method, but a major endpoint.
+        'corp.Corp.members': (corp.Corp, 'members', None),
+    }
+    for case_name, cls, name, specs in _client_methods():
+        methods[case_name] = (cls, name, specs)
+    for case_name in sorted(methods):
+        cls, name, specs = methods[case_name]
+        path = _fixture_path(case_name)
+        if path is None:
+            continue
+        result.append((case_name, _method_case(
+            cls, name, specs, lambda path=path: utils.load_fixture(path))))
+
+    for case_name, generate, rows in LARGE:
+        cls, name, specs = methods[case_name]
+        result.append(('%s[%d]' % (case_name, rows), _method_case(
+            cls, name, specs,
+            lambda generate=generate, rows=rows: generate(fixtures.Generator(seed=0), rows))))
+
+    return result + _thirdparty_cases() + _cache_cases()
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def measure(setup, min_time=0.5, min_runs=3, max_runs=100000):
+    """Time a case and return its stats as a dict."""
+    func = setup()
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    func()  # warm up
+
+    latencies = []
+    start = time.time()
+    while len(latencies) < max_runs and (
+            len(latencies) < min_runs or time.time() - start < min_time):
+        t = time.time()
+        func()
+        latencies.append(time.time() - t)
+    total = time.time() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+
+    latencies.sort()
+    return {
+        'runs': len(latencies),
+        'ops': len(latencies) / total,
+        'min_ms': latencies[0] * 1000,
+        'p50_ms': _percentile(latencies, 0.5) * 1000,
+        'p99_ms': _percentile(latencies, 0.99) * 1000,
+        'peak_kb': peak_kb,
+    }
+
+
+def compare(stats, base, threshold, min_delta=MIN_LATENCY_DELTA_MS):
+    """Return the ways 'stats' regressed from 'base' (empty if none)."""
+    problems = []
+    # Baselines saved before min_ms was recorded only have the p50.
+    key = 'min_ms' if 'min_ms' in base else 'p50_ms'
+    latency, base_latency = stats[key], base[key]
+    if (latency > base_latency * (1 + threshold)
+            and latency - base_latency > min_delta):
+        problems.append('%s +%.0f%%' % (key[:-3], (latency / base_latency - 1) * 100))
+    if stats['peak_kb'] > base['peak_kb'] * (1 + threshold) + 1024:
+        problems.append('peak +%d KiB' % (stats['peak_kb'] - base['peak_kb']))
+    return problems
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)['cases']
+
+
+def save_baseline(path, results):
+    cases = load_baseline(path)
+    cases.update(results)
+    with open(path, 'w') as f:
+        json.dump({'python': sys.version.split()[0], 'cases': cases}, f,
+                  indent=2, sort_keys=True)
+
+
+def run(names, options):
+    baseline = {} if options.save else load_baseline(options.baseline)
+    results = {}
+    table = []
+    failed = []
+    for name in names:
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'benchmarks.suite', '--run-case', name,
+             '--min-time', str(options.min_time)])
+        stats = results[name] = json.loads(output)
+
+        status = ''
+        if name in baseline:
+            problems = compare(stats, baseline[name], options.threshold, options.min_delta)
+            status = problems and 'REGRESSED: ' + ', '.join(problems) or 'ok'
+            if problems:
+                failed.append(name)
+        table.append([name, '%.1f' % stats['ops'], '%.3f' % stats['min_ms'],
+                      '%.3f' % stats['p50_ms'], '%.3f' % stats['p99_ms'], '%.1f' % (stats['peak_kb'] / 1024.0), status])
+        if options.verbose:
+            print >> sys.stderr, name, stats
+
+    utils.print_table(['case', 'ops/s', 'min ms', 'p50 ms', 'p99 ms', 'peak MiB', 'vs baseline'],
+                      table)
+    if options.save:
+        save_baseline(options.baseline, results)
+        print 'Saved %d cases to %s' % (len(results), options.baseline)
+    elif failed:
+        print '%d of %d cases regressed by more than %d%%' % (
+            len(failed), len(names), options.threshold * 100)
+        return 1
+    return 0
+
+
+def main():
+    parser = optparse.OptionParser(usage="%prog [options]")
+    parser.add_option("-k", dest="filters", action="append", default=[], metavar="TEXT",
+        help="Only run cases whose name contains TEXT (may be repeated).")
+    parser.add_option("-l", "--list", action="store_true", help="List the cases and exit.")
+    parser.add_option("--save", action="store_true",
+        help="Record the results as the baseline instead of comparing.")
+    parser.add_option("--baseline", default=BASELINE, metavar="PATH",
+        help="The baseline file (default: benchmarks/baseline.json).")
+    parser.add_option("--threshold", type="float", default=0.25,
+        help="Allowed regression, as a fraction (default: 0.25).")
+    parser.add_option("--min-delta", type="float", default=MIN_LATENCY_DELTA_MS, metavar="MS",
+        help="Ignore latency changes smaller than this (default: %s)." % MIN_LATENCY_DELTA_MS)
+    parser.add_option("--min-time", type="float", default=0.5, metavar="SECONDS",
+        help="Run each case for at least this long (default: 0.5).")
+    parser.add_option("-v", "--verbose", action="store_true")
+    parser.add_option("--run-case", help=optparse.SUPPRESS_HELP)
+    options, args = parser.parse_args()
+
+    all_cases = cases()
+    if options.run_case:
+        setup = dict(all_cases)[options.run_case]
+        print json.dumps(measure(setup, min_time=options.min_time))
+        return 0
+
+    names = [name for name, _ in all_cases
+             if not options.filters or any(f in name for f in options.filters)]
+    if options.list:
+        print '\n'.join(names)
+        return 0
+    return run(names, options)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
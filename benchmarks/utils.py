@@ -0,0 +1,123 @@
+import copy
+import gc
+import os
+import sys
+import time
+from xml.etree import ElementTree
+
+import evelink.api as evelink_api
+
+XML_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'xml')
+
+
+def load_fixture(path):
+    """Return the contents of a fixture under tests/xml."""
+    with open(os.path.join(XML_DIR, path)) as f:
+        return f.read()
+
+
+def replicate_rows(path, count, id_attr=None):
+    """Return the XML of a fixture with its top-level rows repeated
+    until the rowset holds 'count' rows.
+
+    Each copy gets a unique 'id_attr' (default: the rowset's key) so
+    that results keyed by ID keep every row.
+    """
+    result = ElementTree.fromstring(load_fixture(path))
+    rowset = result.find('rowset')
+    id_attr = id_attr or rowset.get('key')
+    rows = rowset.findall('row')
+    for row in rows:
+        rowset.remove(row)
+    for i in xrange(count):
+        row = copy.deepcopy(rows[i % len(rows)])
+        if id_attr:
+            row.set(id_attr, str(i + 1))
+        rowset.append(row)
+    return ElementTree.tostring(result)
+
+
+def make_api_result(xml):
+    """Parse a <result> document into an APIResult."""
+    return evelink_api.APIResult(ElementTree.fromstring(xml), 0, 0)
+
+
+def timed(func, repeat=5, number=1):
+    """Return the best wall time of 'number' calls to func, over 'repeat' runs."""
+    best = None
+    gc.collect()
+    for _ in xrange(repeat):
+        start = time.time()
+        for _ in xrange(number):
+            func()
+        elapsed = (time.time() - start) / number
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def deep_sizeof(obj):
+    """Return the bytes used by obj and every distinct object it contains."""
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.iterkeys())
+            stack.extend(o.itervalues())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+    return total
+
+
+def print_table(headers, rows):
+    """Print rows as a simple aligned text table."""
+    rows = [[str(c) for c in r] for r in rows]
+    widths = [max(len(str(h)), *[len(r[i]) for r in rows]) for i, h in enumerate(headers)]
+    line = '  '.join('%%-%ds' % w for w in widths)
+    print line % tuple(headers)
+    print line % tuple('-' * w for w in widths)
+    for r in rows:
+        print line % tuple(r)
+
+
+RESPONSE = """<?xml version='1.0' encoding='UTF-8'?>
+<eveapi version="2">
+    <currentTime>2013-06-12 12:00:00</currentTime>
+    %s
+    <cachedUntil>2013-06-12 13:00:00</cachedUntil>
+</eveapi>
+"""
+
+
+def make_response(xml):
+    """Wrap a <result> document into a complete API response."""
+    return RESPONSE % xml
+
+
+class NoCache(evelink_api.APICache):
+    """A cache which never stores anything, so every call is parsed."""
+
+    def put(self, key, value, duration):
+        pass
+
+
+class FakeAPI(evelink_api.API):
+    """An API which serves canned responses, keyed by path."""
+
+    def __init__(self, responses, **kw):
+        kw.setdefault('cache', NoCache())
+        super(FakeAPI, self).__init__(**kw)
+        self.responses = responses
+
+    def send_request(self, full_path, params):
+        for path, response in self.responses.iteritems():
+            if '/%s.xml' % path in full_path:
+                return response
+        raise ValueError("No response for %s" % full_path)
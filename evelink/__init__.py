@@ -1,15 +1,8 @@
 """EVELink - Python bindings for the EVE API."""
 
 import logging
-
-from evelink import account
-from evelink import api
-from evelink import char
-from evelink import constants
-from evelink import corp
-from evelink import eve
-from evelink import map
-from evelink import server
+import sys
+import types
 
 __version__ = "0.3.1"
 
@@ -33,3 +26,26 @@ __all__ = [
   "parsing",
   "server",
 ]
+
+
+class _LazyModule(types.ModuleType):
+    """The evelink package, importing its submodules on first use.
+
+    'import evelink' stays cheap, while 'evelink.char.Char' (or 'from
+    evelink import *') works as if every submodule had been imported.
+    """
+
+    def __getattr__(self, name):
+        if name not in __all__:
+            raise AttributeError("'module' object has no attribute '%s'" % name)
+        # Importing a submodule sets it as an attribute of the package.
+        __import__('%s.%s' % (self.__name__, name))
+        return self.__dict__[name]
+
+
+_module = _LazyModule(__name__, __doc__)
+_module.__dict__.update(globals())
+# Python 2 clears the globals of a module when it is garbage collected,
+# and the functions above still use them.
+_module._original = sys.modules[__name__]
+sys.modules[__name__] = _module
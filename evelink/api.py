@@ -1,24 +1,41 @@
+import bisect
 import calendar
 import collections
 import functools
-import gzip
+import heapq
 import inspect
 import logging
+import pickle
 import re
-from StringIO import StringIO
+import struct
+import sys
+import threading
 import time
-from urllib import urlencode
-import urllib2
 from xml.etree import ElementTree
+import zlib
+
+# time.strptime imports this lazily, which can fail when threads race
+# to call it for the first time (http://bugs.python.org/issue7980).
+import _strptime
 
 _log = logging.getLogger('evelink.api')
 
-try:
-    import requests
-    _has_requests = True
-except ImportError:
-    _log.info('`requests` not available, falling back to urllib2')
-    _has_requests = None
+# The HTTP libraries take longer to import than the rest of evelink, so
+# they are only imported by the first request. None until then.
+_has_requests = None
+
+
+def _import_requests():
+    """Import `requests` if it is available; return whether it is."""
+    global _has_requests, requests
+    if _has_requests is None:
+        try:
+            import requests
+            _has_requests = True
+        except ImportError:
+            _log.info('`requests` not available, falling back to urllib2')
+            _has_requests = False
+    return _has_requests
 
 def _clean(v):
     """Convert parameters into an acceptable format for the API."""
@@ -27,26 +44,121 @@ def _clean(v):
     else:
         return str(v)
 
+def _loggable(params):
+    """Params without the API key, for logging."""
+    return dict((k, v) for k, v in params.iteritems() if k not in ('keyID', 'vCode'))
+
+# Responses are fed to the parser (and read off the wire) in chunks of
+# this size, so only one chunk of decompressed XML exists at a time.
+CHUNK_SIZE = 64 * 1024
+
+_GZIP_MAGIC = '\x1f\x8b'
+
+
+def is_compressed(response):
+    """Whether a raw response body is gzip compressed."""
+    return response[:2] == _GZIP_MAGIC
+
+
+def decode_content(response, encoding):
+    """Undo a Content-Encoding other than gzip, which is kept as sent.
+
+    Only gzip is asked for, but a server may send deflate regardless;
+    is_compressed (and thus the parser) only knows about gzip.
+    """
+    encoding = (encoding or '').strip().lower()
+    if encoding in ('', 'identity', 'gzip', 'x-gzip'):
+        return response
+    if encoding == 'deflate':
+        try:
+            return zlib.decompress(response)
+        except zlib.error:
+            # Some servers send a raw deflate stream, without the header.
+            return zlib.decompress(response, -zlib.MAX_WBITS)
+    raise ValueError("Unsupported Content-Encoding: %s" % encoding)
+
+
+def iter_chunks(s, size=CHUNK_SIZE):
+    """Yield a string in chunks of 'size' bytes, without copying it."""
+    for offset in xrange(0, len(s), size):
+        yield buffer(s, offset, size)
+
+
+def iter_decompressed(chunks):
+    """Decode an iterable of gzip compressed chunks on the fly."""
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    data = decompressor.flush()
+    if data:
+        yield data
+
+
 def decompress(s):
     """Decode a gzip compressed string."""
-    buf = StringIO(s)
-    f = gzip.GzipFile(fileobj=buf)
-    try:
-        return f.read()
-    finally:
-        f.close()
-        buf.close()
+    return ''.join(iter_decompressed(iter_chunks(s)))
+
+
+def response_size(response):
+    """The size of a raw response body once decompressed."""
+    if is_compressed(response) and len(response) >= 18:
+        # The gzip trailer ends with the uncompressed size (mod 2**32).
+        return struct.unpack('<I', response[-4:])[0]
+    return len(response)
+
+
+# Maps 'YYYY-MM-DD' to the timestamp of midnight on that day.
+_day_cache = {}
+_DAY_CACHE_SIZE = 10000
+
+
+def _parse_day(day):
+    ts = _day_cache.get(day)
+    if ts is None:
+        if len(_day_cache) >= _DAY_CACHE_SIZE:
+            _day_cache.clear()
+        # strptime validates the date; it only runs once per distinct day.
+        ts = _day_cache[day] = calendar.timegm(time.strptime(day, "%Y-%m-%d"))
+    return ts
 
 
 def parse_ts(v):
     """Parse a timestamp from EVE API XML into a unix-ish timestamp."""
     if v == '':
         return None
-    ts = calendar.timegm(time.strptime(v, "%Y-%m-%d %H:%M:%S"))
+    if len(v) == 19 and v[10] == ' ' and v[13] == ':' and v[16] == ':':
+        # Fast path for the fixed 'YYYY-MM-DD HH:MM:SS' format.
+        hour, minute, second = int(v[11:13]), int(v[14:16]), int(v[17:19])
+        if 0 <= hour < 24 and 0 <= minute < 60 and 0 <= second < 60:
+            ts = _parse_day(v[:10]) + hour * 3600 + minute * 60 + second
+        else:
+            ts = calendar.timegm(time.strptime(v, "%Y-%m-%d %H:%M:%S"))
+    else:
+        ts = calendar.timegm(time.strptime(v, "%Y-%m-%d %H:%M:%S"))
     # Deal with EVE's nonexistent 0001-01-01 00:00:00 timestamp
     return ts if ts > 0 else None
 
 
+def parse_ts_many(values):
+    """Parse a sequence of timestamps into a list (see parse_ts).
+
+    Repeated values (common in columns of journal or kill times) are
+    only decoded once.
+    """
+    seen = {}
+    results = []
+    append = results.append
+    for v in values:
+        try:
+            append(seen[v])
+        except KeyError:
+            ts = seen[v] = parse_ts(v)
+            append(ts)
+    return results
+
+
 def get_named_value(elem, field):
     """Returns the string value of the named child element."""
     try:
@@ -143,16 +255,36 @@ class APIError(Exception):
     def __str__(self):
         return "%s (code=%d)" % (self.message, int(self.code))
 
+    def __reduce__(self):
+        # Keep every attribute when pickled (e.g. by a ParsePool).
+        return (APIError, (self.code, self.message, self.timestamp, self.expires))
+
 class APICache(object):
     """Minimal interface for caching API requests.
 
     This very basic implementation simply stores values in
     memory, with no other persistence. You can subclass it
     to define a more complex/featureful/persistent cache.
+
+    An API with an instrument sets it as the cache's 'instrument'
+    (unless it already has one); implementations report the expired
+    entries they find to it as 'cache_stale' events.
+
+    Caches count their hits, misses and evictions (expired entries
+    removed on lookup) since they were created; see 'stats'.
     """
 
+    instrument = None
+
     def __init__(self):
         self.cache = {}
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def _count(self, counter):
+        # Only statistics; races between threads may lose a few counts.
+        counters = getattr(self, 'counters', None)
+        if counters is not None:
+            counters[counter] += 1
 
     def get(self, key):
         """Return the value referred to by 'key' if it is cached.
@@ -160,14 +292,31 @@ class APICache(object):
         key:
             a result from the Python hash() function.
         """
+        entry = self.get_entry(key)
+        if entry is None:
+            return None
+        return entry[0]
+
+    def get_entry(self, key):
+        """Return (value, expiration) if 'key' is cached, or None.
+
+        Backends which can't tell when entries expire return None as
+        their expiration.
+        """
         result = self.cache.get(key)
         if not result:
+            self._count('misses')
             return None
         value, expiration = result
         if expiration < time.time():
-            del self.cache[key]
+            self.cache.pop(key, None)
+            self._count('misses')
+            self._count('evictions')
+            if self.instrument is not None:
+                self.instrument.count('cache_stale', None)
             return None
-        return value
+        self._count('hits')
+        return value, expiration
 
     def put(self, key, value, duration):
         """Cache the provided value, referenced by 'key', for the given duration.
@@ -182,6 +331,65 @@ class APICache(object):
         expiration = time.time() + duration
         self.cache[key] = (value, expiration)
 
+    def entries(self):
+        """Yield (key, size in bytes, expiration) for every stored entry.
+
+        Includes the expired entries which haven't been removed yet.
+        """
+        for key, (value, expiration) in self.cache.items():
+            yield key, _value_size(value), expiration
+
+    def stats(self, top=10):
+        """Describe the contents of the cache.
+
+        Returns a dict of:
+            entries:   the number of stored entries
+            bytes:     their total size
+            expired:   how many of them have expired, but are still stored
+            hits, misses, evictions: counters since the cache was created
+            expiry:    a list of (label, entries) counting the entries
+                       by time left before they expire (see EXPIRY_BUCKETS)
+            largest:   the 'top' largest entries, as (key, bytes)
+
+        Values which can't be known for a backend are None.
+        """
+        now = time.time()
+        histogram = [0] * (len(EXPIRY_BUCKETS) + 2)
+        largest = []
+        entries = total = 0
+        for key, size, expiration in self.entries():
+            entries += 1
+            total += size
+            histogram[bisect.bisect_right((0,) + EXPIRY_BUCKETS, expiration - now)] += 1
+            if top:
+                if len(largest) < top:
+                    heapq.heappush(largest, (size, key))
+                else:
+                    heapq.heappushpop(largest, (size, key))
+
+        stats = {
+            'entries': entries,
+            'bytes': total,
+            'expired': histogram[0],
+            'expiry': zip(EXPIRY_LABELS, histogram),
+            'largest': [(key, size) for size, key in sorted(largest, reverse=True)],
+        }
+        stats.update(getattr(self, 'counters', None) or
+                     {'hits': None, 'misses': None, 'evictions': None})
+        return stats
+
+
+# Upper bounds, in seconds, of the expiry histogram of APICache.stats.
+EXPIRY_BUCKETS = (60, 300, 900, 3600, 6 * 3600, 24 * 3600)
+EXPIRY_LABELS = ('expired', '<1m', '<5m', '<15m', '<1h', '<6h', '<1d', '>=1d')
+
+
+def _value_size(value):
+    """The size of a cached value (usually the response string)."""
+    if isinstance(value, basestring):
+        return len(value)
+    return len(pickle.dumps(value, 2))
+
 
 APIResult = collections.namedtuple("APIResult", [
         "result",
@@ -190,15 +398,149 @@ APIResult = collections.namedtuple("APIResult", [
     ])
 
 
+def _timed_iter(iterable, instrument, metric, path):
+    """Yield from an iterable, reporting the total time spent in it."""
+    elapsed = 0.0
+    it = iter(iterable)
+    while True:
+        start = time.time()
+        try:
+            value = it.next()
+        except StopIteration:
+            break
+        finally:
+            elapsed += time.time() - start
+        yield value
+    instrument.timing(metric, path, elapsed)
+
+
+def parse_response(response, instrument=None, path=None):
+    """Parse a raw API response.
+
+    instrument:
+        Optional. An evelink.instrumentation.Instrument to report the
+        decompression of 'path' to.
+
+    Returns (tree, current_time, expires_time, error), where 'error' is
+    an APIError if the response is an API error, or None.
+    """
+    if is_compressed(response):
+        # Feed the parser as the body is decompressed, rather than
+        # holding the whole decompressed document in memory as well.
+        parser = ElementTree.XMLParser()
+        chunks = iter_decompressed(iter_chunks(response))
+        if instrument is not None:
+            instrument.size('decompressed', path, response_size(response))
+            chunks = _timed_iter(chunks, instrument, 'decompress', path)
+        for data in chunks:
+            parser.feed(data)
+        tree = parser.close()
+    else:
+        tree = ElementTree.fromstring(response)
+    current_time = get_ts_value(tree, 'currentTime')
+    expires_time = get_ts_value(tree, 'cachedUntil')
+
+    error = tree.find('error')
+    if error is not None:
+        code = error.attrib['code']
+        message = error.text.strip()
+        error = APIError(code, message, current_time, expires_time)
+    return tree, current_time, expires_time, error
+
+
+# How far into the head and tail of a response scan_response looks for
+# the timestamps and errors. Anything unusual falls back to a full parse.
+SCAN_WINDOW = 1024
+
+_CURRENT_TIME_RE = re.compile(r'<currentTime>([^<]*)</currentTime>')
+_CACHED_UNTIL_RE = re.compile(r'<cachedUntil>([^<]*)</cachedUntil>')
+_ERROR_RE = re.compile(r'<error code="(\d+)"\s*>([^<]*)</error>')
+
+
+def _scan_windows(response):
+    """Return the (head, tail) of a response, decompressing if needed."""
+    if not is_compressed(response):
+        return response[:SCAN_WINDOW], response[-SCAN_WINDOW:]
+
+    # The tail is only known once the whole body has been decompressed,
+    # but nothing besides the last chunks is kept.
+    head = tail = ''
+    for data in iter_decompressed(iter_chunks(response)):
+        if len(head) < SCAN_WINDOW:
+            head += data[:SCAN_WINDOW - len(head)]
+        tail = (tail + data)[-SCAN_WINDOW:]
+    return head, tail
+
+
+def scan_response(response):
+    """Extract the timestamps and any error from a raw API response.
+
+    Unlike parse_response, no tree is built: only a bounded window at
+    the head (currentTime and error) and at the tail (cachedUntil) of
+    the document is scanned. Responses which don't have the usual
+    layout are fully parsed instead.
+
+    Returns (current_time, expires_time, error), where 'error' is an
+    APIError if the response is an API error, or None.
+    """
+    head, tail = _scan_windows(response)
+    current_time = _CURRENT_TIME_RE.search(head)
+    expires_time = _CACHED_UNTIL_RE.search(tail)
+    error = _ERROR_RE.search(head)
+    if (current_time is None or expires_time is None
+            or (error is None and '<error' in head)):
+        _log.debug("Unusual response layout, falling back to a full parse")
+        return parse_response(response)[1:]
+
+    current_time = parse_ts(current_time.group(1))
+    expires_time = parse_ts(expires_time.group(1))
+    if error is not None:
+        from xml.sax.saxutils import unescape
+        code, message = error.groups()
+        error = APIError(code, unescape(message.strip()), current_time, expires_time)
+    return current_time, expires_time, error
+
+
 class API(object):
-    """A wrapper around the EVE API."""
+    """A wrapper around the EVE API.
+
+    base_url:
+        Optional. The host of the API (default: api.eveonline.com),
+        reached over HTTPS. May also be a full URL such as
+        "http://localhost:8080", e.g. to use an evelink.gateway.
+    parse_pool:
+        Optional. An evelink.parsing.pool.ParsePool; responses larger
+        than its threshold are parsed in a separate process, so they
+        don't hold the GIL. See 'get_parsed'.
+    instrument:
+        Optional. An evelink.instrumentation.Instrument which calls
+        (and the cache) report timings, sizes and events to.
+    profiler:
+        Optional. An evelink.profiling.Profiler which profiles slow or
+        sampled auto_call methods.
+    rate_limiter:
+        Optional. An evelink.ratelimit.RateLimiter, which requests to
+        the API (but not cache hits) wait for.
+    name_resolver:
+        Optional. An evelink.names.NameResolver, seeded with the names
+        found in the results of auto_call methods (see its seed_result).
+    """
 
-    def __init__(self, base_url="api.eveonline.com", cache=None, api_key=None):
+    def __init__(self, base_url="api.eveonline.com", cache=None, api_key=None,
+                 parse_pool=None, instrument=None, profiler=None, rate_limiter=None,
+                 name_resolver=None):
         self.base_url = base_url
+        self.parse_pool = parse_pool
+        self.instrument = instrument
+        self.profiler = profiler
+        self.rate_limiter = rate_limiter
+        self.name_resolver = name_resolver
 
         cache = cache or APICache()
         if not isinstance(cache, APICache):
             raise ValueError("The provided cache must subclass from APICache.")
+        if instrument is not None and getattr(cache, 'instrument', None) is None:
+            cache.instrument = instrument
         self.cache = cache
         self.CACHE_VERSION = '1'
 
@@ -225,56 +567,174 @@ class API(object):
         frament, e.g. "corp/AssetList". (Basically, the portion
         of the API url in between the root / and the .xml bit.)
         """
+        key, response, cached = self._fetch(path, params)
+        return self._handle_response(path, key, response, cached)
+
+    def get_raw(self, path, params=None):
+        """Request a specific path from the EVE API, without parsing it.
+
+        Meant for proxies which pass the XML along. The timestamps and
+        errors are found with scan_response, so a cache hit costs little
+        more than the cache lookup itself.
 
+        Returns (response, current_time, expires_time), where 'response'
+        is the body as sent by the API; it may be gzip compressed (see
+        is_compressed). Raises APIError for API errors, like 'get'.
+        """
+        response, current_time, expires_time, _ = self._get_raw(path, params)
+        return response, current_time, expires_time
+
+    def prefetch(self, path, params=None):
+        """Make sure the response to a request is cached, without parsing it.
+
+        Returns (whether it was still cached, its size, its expires
+        time). Raises APIError for API errors, which are cached too.
+        """
+        response, _, expires_time, cached = self._get_raw(path, params)
+        return cached, len(response), expires_time
+
+    def _get_raw(self, path, params):
+        key, response, cached = self._fetch(path, params)
+        current_time, expires_time, error = self._timed(
+            'parse', path, scan_response, response)
+        self._set_last_timestamps(current_time, expires_time)
+
+        if not cached:
+            self._timed('cache_put', path, self.cache.put,
+                        key, response, expires_time - current_time)
+
+        if error is not None:
+            raise self._api_error(path, error)
+        return response, current_time, expires_time, cached
+
+    def get_prepared(self, path, items):
+        """Request a path with params prepared by an auto_call wrapper.
+
+        'items' is the list of (name, value) params, already cleaned
+        and sorted by name, with the API key's included: the wrapper
+        generated for each method knows the order of its params ahead
+        of time. The cache key is the one 'get' uses.
+        """
+        # Not logging 'items', which include the vCode.
+        _log.debug("Calling %s with prepared params", path)
+        key = '%s-%s' % (self.CACHE_VERSION, hash((path, tuple(items))))
+        key, response, cached = self._fetch_key(path, dict(items), key)
+        return self._handle_response(path, key, response, cached)
+
+    def get_parsed(self, path, params, client, method_name, kw):
+        """Request a path and parse it with an auto_call method.
+
+        Calls 'client.method_name(api_result=..., **kw)' and returns its
+        result. If the response is larger than the threshold of the
+        parse pool, both the XML and the method run in a child process
+        and the (pickled) result is returned instead.
+        """
+        key, response, cached = self._fetch(path, params)
+        if self.parse_pool is None or not self.parse_pool.accepts(response):
+            api_result = self._handle_response(path, key, response, cached)
+            return self._timed('method', path, getattr(client, method_name),
+                               api_result=api_result, **kw)
+
+        _log.debug("Parsing %d bytes in the parse pool", len(response))
+        current_time, expires_time, result = self._timed(
+            'parse_pool', path, self.parse_pool.parse, client, method_name, response, kw)
+        self._set_last_timestamps(current_time, expires_time)
+        if not cached:
+            self._timed('cache_put', path, self.cache.put,
+                        key, response, expires_time - current_time)
+
+        if isinstance(result, APIError):
+            raise self._api_error(path, result)
+        return result
+
+    def _timed(self, metric, path, func, *args, **kw):
+        """Call func, reporting how long it took if instrumented."""
+        if self.instrument is None:
+            return func(*args, **kw)
+        start = time.time()
+        try:
+            return func(*args, **kw)
+        finally:
+            self.instrument.timing(metric, path, time.time() - start)
+
+    def _api_error(self, path, error):
+        """Log (and report) an APIError about to be raised."""
+        _log.error("Raising API error: %r" % error)
+        if self.instrument is not None:
+            self.instrument.count('error.%s' % error.code, path)
+        return error
+
+    def _fetch(self, path, params):
+        """Return (cache key, raw response, whether it was cached)."""
         params = params or {}
         params = dict((k, _clean(v)) for k,v in params.iteritems())
 
-        _log.debug("Calling %s with params=%r", path, params)
+        _log.debug("Calling %s with params=%r", path, _loggable(params))
         if self.api_key:
             _log.debug("keyID and vCode added")
             params['keyID'] = self.api_key[0]
             params['vCode'] = self.api_key[1]
 
         key = self._cache_key(path, params)
-        response = self.cache.get(key)
+        return self._fetch_key(path, params, key)
+
+    def _fetch_key(self, path, params, key):
+        """Like _fetch, for params already cleaned (and keyed)."""
+        response = self._timed('cache_get', path, self.cache.get, key)
         cached = response is not None
+        if self.instrument is not None:
+            self.instrument.count(cached and 'cache_hit' or 'cache_miss', path)
 
         if not cached:
             # no cached response body found, call the API for one.
+            from urllib import urlencode
             params = urlencode(params)
-            full_path = "https://%s/%s.xml.aspx" % (self.base_url, path)
-            response = self.send_request(full_path, params)
+            if self.rate_limiter is not None:
+                self._timed('rate_limit', path, self.rate_limiter.acquire)
+            response = self._timed('fetch', path, self.send_request,
+                                   self._full_path(path), params)
+            if self.instrument is not None:
+                self.instrument.size('response', path, len(response))
         else:
             _log.debug("Cache hit, returning cached payload")
 
-        tree = ElementTree.fromstring(response)
-        current_time = get_ts_value(tree, 'currentTime')
-        expires_time = get_ts_value(tree, 'cachedUntil')
+        if self.profiler is not None:
+            self.profiler.note_size(len(response))
+        return key, response, cached
+
+    def _full_path(self, path):
+        if '://' in self.base_url:
+            return "%s/%s.xml.aspx" % (self.base_url.rstrip('/'), path)
+        return "https://%s/%s.xml.aspx" % (self.base_url, path)
+
+    def _handle_response(self, path, key, response, cached):
+        tree, current_time, expires_time, error = self._timed(
+            'parse', path, parse_response, response, self.instrument, path)
         self._set_last_timestamps(current_time, expires_time)
 
         if not cached:
             # Have to split this up from above as timestamps have to be
             # extracted.
-            self.cache.put(key, response, expires_time - current_time)
+            self._timed('cache_put', path, self.cache.put,
+                        key, response, expires_time - current_time)
 
-        error = tree.find('error')
         if error is not None:
-            code = error.attrib['code']
-            message = error.text.strip()
-            exc = APIError(code, message, current_time, expires_time)
-            _log.error("Raising API error: %r" % exc)
-            raise exc
+            raise self._api_error(path, error)
 
         result = tree.find('result')
         return APIResult(result, current_time, expires_time)
 
+    # requests' sessions also ask for deflate by default.
+    REQUEST_HEADERS = {'Accept-Encoding': 'gzip'}
+
     def send_request(self, full_path, params):
-        if _has_requests:
+        if _import_requests():
             return self.requests_request(full_path, params)
         else:
             return self.urllib2_request(full_path, params)
 
     def urllib2_request(self, full_path, params):
+        import urllib2
         try:
             if params:
                 # POST request
@@ -297,10 +757,9 @@ class API(object):
             raise e
 
         try:
-            if r.info().get('Content-Encoding') == 'gzip':
-                return decompress(r.read())
-            else:
-                return r.read()
+            # The body is returned (and cached) as sent, possibly still
+            # gzip compressed; parse_response decompresses it on the fly.
+            return r.read()
         finally:
             r.close()
 
@@ -314,12 +773,19 @@ class API(object):
             if params:
                 # POST request
                 _log.debug("POSTing request")
-                r = session.post(full_path, params=params)
+                r = session.post(full_path, params=params, stream=True,
+                                 headers=self.REQUEST_HEADERS)
             else:
                 # GET request
                 _log.debug("GETting request")
-                r = session.get(full_path)
-            return r.content
+                r = session.get(full_path, stream=True, headers=self.REQUEST_HEADERS)
+            # As with urllib2, keep the (gzip) body as sent; requests
+            # would otherwise decompress all of it up front.
+            try:
+                return decode_content(r.raw.read(decode_content=False),
+                                      r.headers.get('content-encoding'))
+            finally:
+                r.close()
         except requests.exceptions.RequestException as e:
             # TODO: Handle this better?
             raise e
@@ -341,10 +807,21 @@ def auto_api(func):
     return wrapper
 
 
+# The default 'api_result' of compiled auto_call wrappers, and the names
+# they use (which methods' arguments must not shadow).
+_NO_RESULT = object()
+_COMPILED_LOCALS = frozenset(['client', 'api', 'items', 'method', 'generic', 'path',
+                              'batch_spec', 'API', '_clean', '_NO_RESULT',
+                              'api_result', '_kw'])
+
+# Method arguments which are handled by the wrapped method itself
+# (e.g. 'fields' projections, 'lazy' results) and never sent to the API.
+LOCAL_ARGS = frozenset(['fields', 'lazy'])
+
 def translate_args(args, mapping=None):
     """Translate python name variable into API parameter name."""
     mapping = mapping if mapping else {}
-    return dict((mapping[k], v,) for k, v in args.iteritems())
+    return dict((mapping[k], v,) for k, v in args.iteritems() if k not in LOCAL_ARGS)
 
 # TODO: needs better name
 def get_args_and_defaults(func):
@@ -410,9 +887,19 @@ class auto_call(object):
     paramater name. They will be added to 'evelink.api._args_map' to 
     translate argument names to parameter names.
 
+    - 'page_spec': a 'PageSpec' describing how the endpoint pages
+    backwards through its history, or None. See 'auto_paginate'.
+
+    - 'batch_spec': a 'BatchSpec' describing how an ID-list argument
+    is split into several requests, or None.
+
+    Arguments listed in 'LOCAL_ARGS' (such as a 'fields' projection)
+    are passed on to the method but never sent to the API.
+
     """
     
-    def __init__(self, path, prop_to_param=tuple(), map_params=None):
+    def __init__(self, path, prop_to_param=tuple(), map_params=None,
+                 page_spec=None, batch_spec=None):
         self.method = None
 
         self.path = path
@@ -420,26 +907,33 @@ class auto_call(object):
         self.defaults = None
         self.prop_to_param = prop_to_param
         self.map_params = map_params if map_params else {}
+        self.page_spec = page_spec
+        self.batch_spec = batch_spec
 
     def __call__(self, method):
         if self.method is not None:
             raise TypeError("This decorator method cannot be shared.")
         self.method = method
         
-        wrapper = self._wrapped_method()
-        
         args, self.defaults = get_args_and_defaults(self.method)
 
         self.args = args[1:]
         self.args.remove('api_result')
         self.defaults.pop('api_result')  # TODO: better exception
 
+        wrapper = self._wrapped_method()
+        compiled = self._compiled_method(wrapper)
+        if compiled is not None:
+            wrapper = functools.wraps(self.method)(compiled)
+
         wrapper._request_specs = {
             'path': self.path,
             'args': self.args,
             'defaults': self.defaults,
             'prop_to_param': self.prop_to_param,
-            'map_params': self.map_params
+            'map_params': self.map_params,
+            'page_spec': self.page_spec,
+            'batch_spec': self.batch_spec,
         }
 
         return wrapper
@@ -452,16 +946,331 @@ class auto_call(object):
                 return self.method(client, *args, **kw)
                 
             args_map = map_func_args(args, kw, self.args, self.defaults)
-            for attr_name in self.prop_to_param:
-                args_map[attr_name] = getattr(client, attr_name, None)
+            if self.batch_spec is not None:
+                chunks = self.batch_spec.chunks(args_map[self.batch_spec.arg])
+                if chunks:
+                    return self._call_batched(client, args_map, chunks)
+            return self._call_profiled(client, args, kw, args_map)
 
-            params = translate_args(args_map, self.map_params)
-            params =  dict((k, v,) for k, v in params.iteritems() if v is not None)
-            
-            kw['api_result'] = client.api.get(self.path, params=params)
+        return wrapper
+
+    def _compiled_method(self, generic):
+        """Generate a wrapper specialized for this method, or None.
+
+        The wrapper has the method's own signature, so Python binds the
+        arguments, and builds the params in the order of their names,
+        so the cache key needs no sorting. 'api_result' is only accepted
+        as a keyword, so a stray positional argument is still an error.
+        It only handles plain API objects (without an instrument,
+        profiler, parse pool or name resolver) and single requests, and
+        calls 'generic' (the _wrapped_method wrapper) for anything else.
+        """
+        specs = inspect.getargspec(self.method)
+        if (specs.varargs or specs.keywords or specs.args[-1:] != ['api_result']
+                or set(self.args) & _COMPILED_LOCALS):
+            return None
+
+        # (API name, local expression) of every param, by API name.
+        params = {'keyID': 'api.api_key[0]', 'vCode': 'api.api_key[1]'}
+        # Unmapped or clashing params are left to the generic wrapper.
+        for i, attr_name in enumerate(self.prop_to_param):
+            name = self.map_params.get(attr_name)
+            if name is None or name in params:
+                return None
+            params[name] = '_prop%d' % i
+        for arg in self.args:
+            if arg in LOCAL_ARGS or arg in self.prop_to_param:
+                continue
+            name = self.map_params.get(arg)
+            if name is None or name in params:
+                return None
+            params[name] = arg
+
+        namespace = {
+            '_NO_RESULT': _NO_RESULT, 'API': API, '_clean': _clean,
+            'method': self.method, 'generic': generic, 'path': self.path,
+            'batch_spec': self.batch_spec,
+        }
+        signature = []
+        for arg in self.args:
+            if arg in self.defaults:
+                namespace['_default_%s' % arg] = self.defaults[arg]
+                signature.append('%s=_default_%s' % (arg, arg))
+            else:
+                signature.append(arg)
+        names = ''.join(', %s' % arg for arg in self.args)
+
+        lines = [
+            'def %s(client%s, **_kw):' % (
+                self.method.__name__, ''.join(', %s' % a for a in signature)),
+            '    if _kw:',
+            '        api_result = _kw.pop("api_result", _NO_RESULT)',
+            '        if _kw:',
+            '            raise TypeError("%s() got an unexpected keyword argument %%r"'
+            ' %% _kw.popitem()[0])' % self.method.__name__,
+            '        if api_result is not _NO_RESULT:',
+            '            return method(client%s, api_result)' % names,
+            '    api = client.api',
+            '    if (type(api) is not API or api.instrument is not None',
+            '            or api.profiler is not None or api.parse_pool is not None',
+            '            or api.name_resolver is not None):',
+            '        return generic(client%s)' % names,
+        ]
+        if self.batch_spec is not None:
+            lines.append('    if batch_spec.chunks(%s) is not None:' % self.batch_spec.arg)
+            lines.append('        return generic(client%s)' % names)
+        for i, attr_name in enumerate(self.prop_to_param):
+            lines.append('    _prop%d = getattr(client, %r, None)' % (i, attr_name))
+        lines.append('    items = []')
+        for name in sorted(params):
+            if name in ('keyID', 'vCode'):
+                lines.append('    if api.api_key:')
+                lines.append('        items.append((%r, %s))' % (name, params[name]))
+            else:
+                lines.append('    if %s is not None:' % params[name])
+                lines.append('        items.append((%r, _clean(%s)))' % (name, params[name]))
+        lines.append('    return method(client%s, api.get_prepared(path, items))' % names)
+
+        source = '\n'.join(lines) + '\n'
+        exec compile(source, '<auto_call %s>' % self.path, 'exec') in namespace
+        return namespace[self.method.__name__]
+
+    def _call_profiled(self, client, args, kw, args_map):
+        """_call, under the API's profiler if it has one."""
+        profiler = getattr(client.api, 'profiler', None)
+        if isinstance(client.api, API) and profiler is not None:
+            return profiler.run(self.path, self._params(client, args_map),
+                                self._call, client, args, kw, args_map)
+        return self._call(client, args, kw, args_map)
+
+    def _call(self, client, args, kw, args_map):
+        if isinstance(client.api, API) and getattr(client.api, 'parse_pool', None) is not None:
+            result = client.api.get_parsed(self.path, self._params(client, args_map),
+                                           client, self.method.__name__, args_map)
+        else:
+            kw['api_result'] = self._get(client, args_map)
+            result = self._run_method(client, args, kw)
+
+        name_resolver = getattr(client.api, 'name_resolver', None)
+        if isinstance(client.api, API) and name_resolver is not None:
+            name_resolver.seed_result(self.path, result.result)
+        return result
+
+    def _run_method(self, client, args, kw):
+        """Call the method, timed as 'method' if the API is instrumented."""
+        instrument = getattr(client.api, 'instrument', None)
+        if instrument is None:
+            return self.method(client, *args, **kw)
+        start = time.time()
+        try:
             return self.method(client, *args, **kw)
+        finally:
+            instrument.timing('method', self.path, time.time() - start)
+
+    def _params(self, client, args_map):
+        args_map = dict(args_map)
+        for attr_name in self.prop_to_param:
+            args_map[attr_name] = getattr(client, attr_name, None)
+
+        params = translate_args(args_map, self.map_params)
+        return dict((k, v,) for k, v in params.iteritems() if v is not None)
+
+    def _get(self, client, args_map):
+        return client.api.get(self.path, params=self._params(client, args_map))
+
+    def _call_batched(self, client, args_map, chunks):
+        """Call the method once per chunk, concurrently, and merge the results.
+
+        Each chunk is a call of its own, as if made with its part of the
+        batch (profiled, parsed in the parse pool, seeding the name
+        resolver).
+        """
+        def call_chunk(chunk):
+            chunk_args = dict(args_map)
+            chunk_args[self.batch_spec.arg] = chunk
+            return self._call_profiled(client, (), dict(chunk_args), chunk_args)
+
+        from multiprocessing.pool import ThreadPool
+        _log.debug("Splitting %s call into %d requests", self.path, len(chunks))
+        pool = ThreadPool(min(len(chunks), self.batch_spec.max_workers))
+        try:
+            results = pool.map(call_chunk, chunks)
+        finally:
+            pool.close()
+            pool.join()
+        return self.batch_spec.merge(results)
+
+
+class PageSpec(object):
+    """Describes the backward paging contract of an endpoint.
+
+    cursor:
+        name of the method argument holding the ID to page back from
+        (e.g. 'before_id' for wallet journals, 'before_kill' for kills).
+    id_key:
+        key of the row ID in the parsed rows.
+    ts_key:
+        key of the row timestamp in the parsed rows.
+    """
+
+    def __init__(self, cursor, id_key='id', ts_key='timestamp'):
+        self.cursor = cursor
+        self.id_key = id_key
+        self.ts_key = ts_key
+
+    def rows(self, result):
+        """Return the rows of a parsed page, newest first."""
+        if isinstance(result, dict):
+            result = result.values()
+        return sorted(result, key=lambda row: row[self.id_key], reverse=True)
+
+
+class BatchSpec(object):
+    """Describes how an ID-list argument is split into several requests.
+
+    Each chunk is requested (and cached) separately, with up to
+    'max_workers' chunks in flight at once. The parsed results of the
+    chunks are merged into a single APIResult.
+
+    arg:
+        name of the method argument holding the list of IDs.
+    size:
+        maximum number of IDs per request.
+    max_workers:
+        maximum number of concurrent requests.
+    """
+
+    def __init__(self, arg, size, max_workers=4):
+        self.arg = arg
+        self.size = size
+        self.max_workers = max_workers
+
+    def chunks(self, values):
+        """Split values into chunks, or return None if it fits in one request."""
+        if not isinstance(values, (list, set, tuple)) or len(values) <= self.size:
+            return None
+        # Sorting keeps the chunks (and thus their cache keys) stable
+        # regardless of the order the IDs were passed in.
+        values = sorted(values)
+        return [values[i:i + self.size] for i in xrange(0, len(values), self.size)]
+
+    def merge(self, api_results):
+        """Merge the APIResults of several chunks into one."""
+        first = api_results[0].result
+        if isinstance(first, dict):
+            merged = {}
+            for api_result in api_results:
+                merged.update(api_result.result)
+        else:
+            merged = []
+            for api_result in api_results:
+                merged.extend(api_result.result)
+
+        return APIResult(
+            merged,
+            min(r.timestamp for r in api_results),
+            min(r.expires for r in api_results),
+        )
+
+
+class _Prefetch(threading.Thread):
+    """Runs a single call in the background, re-raising errors on get()."""
+
+    def __init__(self, func, *args, **kw):
+        super(_Prefetch, self).__init__()
+        self.daemon = True
+        self.func = func
+        self.args = args
+        self.kw = kw
+        self.result = None
+        self.exc_info = None
+
+    def run(self):
+        try:
+            self.result = self.func(*self.args, **self.kw)
+        except Exception:
+            self.exc_info = sys.exc_info()
+
+    def get(self):
+        self.join()
+        if self.exc_info is not None:
+            raise self.exc_info[0], self.exc_info[1], self.exc_info[2]
+        return self.result
+
+
+def _make_iter(method_name, spec):
+    def _iter(self, stop_id=None, stop_ts=None, prefetch=True, **kw):
+        method = getattr(self, method_name)
+
+        def fetch(cursor):
+            params = dict(kw)
+            params[spec.cursor] = cursor
+            return spec.rows(method(**params).result)
+
+        if kw.get('fields') is not None:
+            # Paging needs the row IDs and timestamps.
+            kw['fields'] = list(kw['fields']) + [spec.id_key, spec.ts_key]
+
+        cursor = kw.pop(spec.cursor, None)
+        rows = fetch(cursor)
+        while rows:
+            next_cursor = rows[-1][spec.id_key]
+            last_page = cursor is not None and next_cursor >= cursor
+            if stop_id is not None and next_cursor <= stop_id:
+                last_page = True
+            if stop_ts is not None and rows[-1][spec.ts_key] < stop_ts:
+                last_page = True
+
+            pending = None
+            if not last_page and prefetch:
+                pending = _Prefetch(fetch, next_cursor)
+                pending.start()
+
+            for row in rows:
+                # A page which made no progress repeats rows already seen.
+                if cursor is not None and row[spec.id_key] >= cursor:
+                    continue
+                if stop_id is not None and row[spec.id_key] <= stop_id:
+                    return
+                if stop_ts is not None and row[spec.ts_key] < stop_ts:
+                    return
+                yield row
+
+            if last_page:
+                return
+            cursor = next_cursor
+            rows = pending.get() if pending else fetch(cursor)
+
+    return _iter
+
+
+def auto_paginate(cls):
+    """Class decorator which adds an 'iter_<name>' generator for every
+    method with a 'page_spec' in its '_request_specs'.
+
+    The generators yield parsed rows newest first, fetching older pages
+    as needed (the next page is prefetched in the background while the
+    current one is consumed). They accept the wrapped method's own
+    arguments plus:
+
+    stop_id:
+        Optional. Stop before the first row with an ID <= stop_id.
+    stop_ts:
+        Optional. Stop before the first row older than stop_ts.
+    prefetch:
+        Optional. Set to False to fetch pages only when needed.
+    """
+    for method_name, method in inspect.getmembers(cls, inspect.ismethod):
+        specs = getattr(method, '_request_specs', None)
+        if not specs or not specs.get('page_spec'):
+            continue
+
+        iter_method = _make_iter(method_name, specs['page_spec'])
+        iter_method.__doc__ = """Iterate over the rows of %s, newest first, across pages.""" % method_name
+        iter_method.__name__ = 'iter_%s' % method_name
+        setattr(cls, iter_method.__name__, iter_method)
+
+    return cls
 
-        return wrapper
-        
 
 # vim: set ts=4 sts=4 sw=4 et:
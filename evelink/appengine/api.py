@@ -41,8 +41,7 @@ class AppEngineAPI(api.API):
         if not cached:
             # no cached response body found, call the API for one.
             params = urlencode(params)
-            full_path = "https://%s/%s.xml.aspx" % (self.base_url, path)
-            response = yield self.send_request_async(full_path, params)
+            response = yield self.send_request_async(self._full_path(path), params)
 
         tree = ElementTree.fromstring(response)
         current_time = api.get_ts_value(tree, 'currentTime')
@@ -90,7 +89,13 @@ class AppEngineCache(api.APICache):
     """Memcache backed APICache implementation."""
     
     def get(self, key):
-        return memcache.get(key)
+        value = memcache.get(key)
+        self._count(value is None and 'misses' or 'hits')
+        return value
+
+    def get_entry(self, key):
+        value = self.get(key)
+        return None if value is None else (value, None)
 
     @ndb.tasklet
     def get_async(self, key):
@@ -111,6 +116,24 @@ class AppEngineCache(api.APICache):
         """Dummy async method (see get_async)."""
         self.put(key, value, duration)
 
+    def stats(self, top=10):
+        """Memcache's own statistics, for the whole application.
+
+        Memcache can't list its entries, nor does it count the expired
+        ones; 'expired', 'evictions', 'expiry' and 'largest' are None.
+        """
+        stats = memcache.get_stats() or {}
+        return {
+            'entries': stats.get('items'),
+            'bytes': stats.get('bytes'),
+            'expired': None,
+            'hits': stats.get('hits'),
+            'misses': stats.get('misses'),
+            'evictions': None,
+            'expiry': None,
+            'largest': None,
+        }
+
 
 class EveLinkCache(ndb.Model):
     value = ndb.PickleProperty()
@@ -126,18 +149,28 @@ class AppEngineDatastoreCache(api.APICache):
     def get(self, cache_key):
         return self.get_async(cache_key).get_result()
 
+    def get_entry(self, cache_key):
+        value = self.get(cache_key)
+        return None if value is None else (value, None)
+
     @ndb.tasklet
     def get_async(self, cache_key):
         db_key = ndb.Key(EveLinkCache, cache_key)
         result = yield db_key.get_async()
 
         if not result:
+            self._count('misses')
             raise ndb.Return(None)
         
         if result.expiration < time.time():
             yield db_key.delete_async()
+            self._count('misses')
+            self._count('evictions')
+            if self.instrument is not None:
+                self.instrument.count('cache_stale', None)
             raise ndb.Return(None)
         
+        self._count('hits')
         raise ndb.Return(result.value)
 
     def put(self, cache_key, value, duration):
@@ -149,6 +182,10 @@ class AppEngineDatastoreCache(api.APICache):
         cache = EveLinkCache(id=cache_key, value=value, expiration=expiration)
         yield cache.put_async()
 
+    def entries(self):
+        for entity in EveLinkCache.query():
+            yield entity.key.id(), api._value_size(entity.value), entity.expiration
+
 
 def auto_gae_api(func):
     """A decorator to automatically provide an AppEngineAPI instance."""
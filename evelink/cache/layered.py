@@ -0,0 +1,76 @@
+import threading
+import time
+
+from evelink import api
+
+class LayeredCache(api.APICache):
+    """An in-memory cache in front of another (persistent) cache.
+
+    Entries are written to both; lookups try memory first, then the
+    other cache, whose hits are kept in memory until they expire. Meant
+    for long-running processes, where the in-memory layer saves the
+    lookup and unpickling of the persistent cache.
+
+    l2:
+        The cache behind the in-memory one, e.g. a SqliteCache.
+    max_entries:
+        Optional. How many entries to keep in memory (default: 1000).
+        When full, the entries closest to expiring are dropped first.
+    """
+
+    def __init__(self, l2, max_entries=1000):
+        super(LayeredCache, self).__init__()
+        self.l2 = l2
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.counters['l1_hits'] = 0
+
+    def get_entry(self, key):
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is not None and entry[1] < time.time():
+                del self.cache[key]
+                entry = None
+        if entry is not None:
+            self._count('hits')
+            self._count('l1_hits')
+            return entry
+
+        entry = self.l2.get_entry(key)
+        if entry is None:
+            self._count('misses')
+            return None
+        self._count('hits')
+        if entry[1] is not None:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key, value, duration):
+        self.l2.put(key, value, duration)
+        self._remember(key, (value, time.time() + duration))
+
+    def _remember(self, key, entry):
+        with self.lock:
+            if key not in self.cache and len(self.cache) >= self.max_entries:
+                now = time.time()
+                for old_key, (_, expiration) in self.cache.items():
+                    if expiration < now:
+                        del self.cache[old_key]
+                if len(self.cache) >= self.max_entries:
+                    del self.cache[min(self.cache, key=lambda k: self.cache[k][1])]
+            self.cache[key] = entry
+
+    def entries(self):
+        return self.l2.entries()
+
+    def stats(self, top=10):
+        """The stats of the persistent cache, with the counters of this one.
+
+        Adds 'l1_entries', the entries held in memory, and 'l1_hits',
+        the hits served from memory.
+        """
+        stats = self.l2.stats(top)
+        stats.update(self.counters)
+        with self.lock:
+            stats['l1_entries'] = len(self.cache)
+        return stats
@@ -1,10 +1,27 @@
 import shelve
+import threading
 
 from evelink import api
 
 class ShelveCache(api.APICache):
-    """An implementation of APICache using shelve."""
+    """An implementation of APICache using shelve.
+
+    Shelves aren't thread-safe, so access is guarded by a lock.
+    """
 
     def __init__(self, path):
         super(ShelveCache, self).__init__()
+        self.lock = threading.RLock()
         self.cache = shelve.open(path)
+
+    def get_entry(self, key):
+        with self.lock:
+            return super(ShelveCache, self).get_entry(key)
+
+    def put(self, key, value, duration):
+        with self.lock:
+            super(ShelveCache, self).put(key, value, duration)
+
+    def entries(self):
+        with self.lock:
+            return iter(list(super(ShelveCache, self).entries()))
@@ -1,37 +1,131 @@
+import atexit
 import pickle
+import threading
 import time
 import sqlite3
+import weakref
 
 from evelink import api
 
+# The caches still open, by id, whose counters are flushed at exit.
+# (A WeakValueDictionary, as WeakSet needs Python 2.7.)
+_open_caches = weakref.WeakValueDictionary()
+
+def _flush_at_exit():
+    for cache in _open_caches.values():
+        cache.flush_counters()
+
+atexit.register(_flush_at_exit)
+
+
 class SqliteCache(api.APICache):
-    """An implementation of APICache using sqlite."""
+    """An implementation of APICache using sqlite.
+
+    The connection is shared between threads, guarded by a lock.
+
+    The hit, miss and eviction counters are kept in the file as well,
+    so 'stats' reports them across every process using it. They are
+    written along with the next change to the cache, every
+    COUNTER_FLUSH events, and when the cache is dropped or at exit.
+    """
+
+    COUNTER_FLUSH = 100
 
     def __init__(self, path):
         super(SqliteCache, self).__init__()
-        self.connection = sqlite3.connect(path)
+        self.lock = threading.RLock()
+        self.pending = {}
+        self.connection = sqlite3.connect(path, check_same_thread=False)
         cursor = self.connection.cursor()
         cursor.execute('create table if not exists cache ("key" text primary key on conflict replace,'
                        'value blob, expiration integer)')
-
-    def get(self, key):
-        cursor = self.connection.cursor()
-        cursor.execute('select value, expiration from cache where "key"=?',(key,))
-        result = cursor.fetchone()
-        if not result:
-            return None
-        value, expiration = result
-        if expiration < time.time():
-            cursor.execute('delete from cache where "key"=?', (key,))
-            self.connection.commit()
-            return None
+        cursor.execute('create table if not exists counters (name text primary key, value integer)')
         cursor.close()
-        return pickle.loads(str(value))
+        _open_caches[id(self)] = self
+
+    def _count(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+            self.pending[counter] = self.pending.get(counter, 0) + 1
+            if sum(self.pending.itervalues()) >= self.COUNTER_FLUSH:
+                self.flush_counters()
+
+    def __del__(self):
+        # Caches dropped before exit; atexit handles those still around.
+        try:
+            self.flush_counters()
+        except Exception:
+            pass
+
+    def _write_counters(self, cursor):
+        for name, value in self.pending.iteritems():
+            cursor.execute('insert or ignore into counters values (?, 0)', (name,))
+            cursor.execute('update counters set value = value + ? where name=?', (value, name))
+        self.pending.clear()
+
+    def flush_counters(self):
+        """Write the counts not yet stored to the file."""
+        with self.lock:
+            if not self.pending:
+                return
+            try:
+                cursor = self.connection.cursor()
+                self._write_counters(cursor)
+                self.connection.commit()
+                cursor.close()
+            except sqlite3.ProgrammingError:
+                # Closed already.
+                self.pending.clear()
+
+    def get_entry(self, key):
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.execute('select value, expiration from cache where "key"=?',(key,))
+            result = cursor.fetchone()
+            if not result:
+                self._count('misses')
+                return None
+            value, expiration = result
+            if expiration < time.time():
+                self._count('misses')
+                self._count('evictions')
+                cursor.execute('delete from cache where "key"=?', (key,))
+                self._write_counters(cursor)
+                self.connection.commit()
+                if self.instrument is not None:
+                    self.instrument.count('cache_stale', None)
+                return None
+            cursor.close()
+        self._count('hits')
+        return pickle.loads(str(value)), expiration
 
     def put(self, key, value, duration):
         expiration = time.time() + duration
         value_tuple = (key, sqlite3.Binary(pickle.dumps(value, 2)), expiration)
-        cursor = self.connection.cursor()
-        cursor.execute('insert into cache values (?, ?, ?)', value_tuple)
-        self.connection.commit()
-        cursor.close()
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.execute('insert into cache values (?, ?, ?)', value_tuple)
+            self._write_counters(cursor)
+            self.connection.commit()
+            cursor.close()
+
+    def entries(self):
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.execute('select "key", length(value), expiration from cache')
+            rows = cursor.fetchall()
+            cursor.close()
+        return iter(rows)
+
+    def stats(self, top=10):
+        """Like APICache.stats, with the counters of every process."""
+        stats = super(SqliteCache, self).stats(top)
+        with self.lock:
+            self.flush_counters()
+            cursor = self.connection.cursor()
+            cursor.execute('select name, value from counters')
+            totals = dict(cursor.fetchall())
+            cursor.close()
+        for name in self.counters:
+            stats[name] = totals.get(name, 0)
+        return stats
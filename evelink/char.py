@@ -25,6 +25,7 @@ class auto_call(api.auto_call):
         )
 
 
+@api.auto_paginate
 class Char(object):
     """Wrapper around /char/ of the EVE API.
 
@@ -62,9 +63,9 @@ class Char(object):
         return api.APIResult(parse_assets(api_result.result), api_result.timestamp, api_result.expires)
 
     @auto_call('char/ContractBids')
-    def contract_bids(self, api_result=None):
+    def contract_bids(self, fields=None, lazy=False, api_result=None):
         """Lists the latest bids that have been made to any recent auctions."""
-        return api.APIResult(parse_contract_bids(api_result.result), api_result.timestamp, api_result.expires)
+        return api.APIResult(parse_contract_bids(api_result.result, fields=fields, lazy=lazy), api_result.timestamp, api_result.expires)
 
     @auto_call('char/ContractItems', map_params={'contract_id': 'contractID'})
     def contract_items(self, contract_id, api_result=None):
@@ -72,14 +73,15 @@ class Char(object):
         return api.APIResult(parse_contract_items(api_result.result), api_result.timestamp, api_result.expires)
 
     @auto_call('char/Contracts')
-    def contracts(self, api_result=None):
+    def contracts(self, fields=None, lazy=False, api_result=None):
         """Returns a record of all contracts for a specified character"""
-        return api.APIResult(parse_contracts(api_result.result), api_result.timestamp, api_result.expires)
+        return api.APIResult(parse_contracts(api_result.result, fields=fields, lazy=lazy), api_result.timestamp, api_result.expires)
 
-    @auto_call('char/WalletJournal', map_params={'before_id': 'fromID', 'limit': 'rowCount'})
-    def wallet_journal(self, before_id=None, limit=None, api_result=None):
+    @auto_call('char/WalletJournal', map_params={'before_id': 'fromID', 'limit': 'rowCount'},
+        page_spec=api.PageSpec('before_id'))
+    def wallet_journal(self, before_id=None, limit=None, fields=None, lazy=False, api_result=None):
         """Returns a complete record of all wallet activity for a specified character"""
-        return api.APIResult(parse_wallet_journal(api_result.result), api_result.timestamp, api_result.expires)
+        return api.APIResult(parse_wallet_journal(api_result.result, fields=fields, lazy=lazy), api_result.timestamp, api_result.expires)
 
     @auto_call('char/AccountBalance')
     def wallet_info(self, api_result=None):
@@ -98,25 +100,27 @@ class Char(object):
         api_result = self.wallet_info()
         return api.APIResult(api_result.result['balance'], api_result.timestamp, api_result.expires)
 
-    @auto_call('char/WalletTransactions', map_params={'before_id': 'fromID', 'limit': 'rowCount'})
-    def wallet_transactions(self, before_id=None, limit=None, api_result=None):
+    @auto_call('char/WalletTransactions', map_params={'before_id': 'fromID', 'limit': 'rowCount'},
+        page_spec=api.PageSpec('before_id'))
+    def wallet_transactions(self, before_id=None, limit=None, fields=None, lazy=False, api_result=None):
         """Returns wallet transactions for a character."""
-        return api.APIResult(parse_wallet_transactions(api_result.result), api_result.timestamp, api_result.expires)
+        return api.APIResult(parse_wallet_transactions(api_result.result, fields=fields, lazy=lazy), api_result.timestamp, api_result.expires)
 
     @auto_call('char/IndustryJobs')
-    def industry_jobs(self, api_result=None):
+    def industry_jobs(self, fields=None, lazy=False, api_result=None):
         """Get a list of jobs for a character"""
-        return api.APIResult(parse_industry_jobs(api_result.result), api_result.timestamp, api_result.expires)
+        return api.APIResult(parse_industry_jobs(api_result.result, fields=fields, lazy=lazy), api_result.timestamp, api_result.expires)
 
-    @auto_call('char/KillLog', map_params={'before_kill': 'beforeKillID'})
-    def kills(self, before_kill=None, api_result=None):
+    @auto_call('char/KillLog', map_params={'before_kill': 'beforeKillID'},
+        page_spec=api.PageSpec('before_kill', ts_key='time'))
+    def kills(self, before_kill=None, fields=None, lazy=False, api_result=None):
         """Look up recent kills for a character.
 
         before_kill:
             Optional. Only show kills before this kill id. (Used for paging.)
         """
 
-        return api.APIResult(parse_kills(api_result.result), api_result.timestamp, api_result.expires)
+        return api.APIResult(parse_kills(api_result.result, fields=fields, lazy=lazy), api_result.timestamp, api_result.expires)
 
     @auto_call('char/Notifications')
     def notifications(self, api_result=None):
@@ -136,7 +140,8 @@ class Char(object):
 
         return api.APIResult(result, api_result.timestamp, api_result.expires)
 
-    @auto_call('char/NotificationTexts', map_params={'notification_ids': 'IDs'})
+    @auto_call('char/NotificationTexts', map_params={'notification_ids': 'IDs'},
+        batch_spec=api.BatchSpec('notification_ids', 100))
     def notification_texts(self, notification_ids, api_result=None):
         """Returns the message bodies for notifications."""
         result = {}
@@ -273,9 +278,9 @@ class Char(object):
         return api.APIResult(parse_contact_list(api_result.result), api_result.timestamp, api_result.expires)
 
     @auto_call('char/MarketOrders')
-    def orders(self, api_result=None):
+    def orders(self, fields=None, lazy=False, api_result=None):
         """Return a given character's buy and sell orders."""
-        return api.APIResult(parse_market_orders(api_result.result), api_result.timestamp, api_result.expires)
+        return api.APIResult(parse_market_orders(api_result.result, fields=fields, lazy=lazy), api_result.timestamp, api_result.expires)
 
     @auto_call('char/Research')
     def research(self, api_result=None):
@@ -363,7 +368,8 @@ class Char(object):
 
         return api.APIResult(results, api_result.timestamp, api_result.expires)
 
-    @auto_call('char/MailBodies', map_params={'message_ids': 'ids'})
+    @auto_call('char/MailBodies', map_params={'message_ids': 'ids'},
+        batch_spec=api.BatchSpec('message_ids', 100))
     def message_bodies(self, message_ids, api_result=None):
         """Returns the actual body content of a set of mail messages.
 
@@ -421,7 +427,8 @@ class Char(object):
 
         return api.APIResult(results, api_result.timestamp, api_result.expires)
 
-    @auto_call('char/CalendarEventAttendees', map_params={'event_ids': 'eventIDs'})
+    @auto_call('char/CalendarEventAttendees', map_params={'event_ids': 'eventIDs'},
+        batch_spec=api.BatchSpec('event_ids', 100))
     def calendar_attendees(self, event_ids, api_result=None):
         """Returns the list of attendees for the specified calendar event.
 
@@ -538,7 +545,8 @@ class Char(object):
 
         return api.APIResult(results, api_result.timestamp, api_result.expires)
 
-    @auto_call('char/Locations', map_params={'location_list': 'IDs'})
+    @auto_call('char/Locations', map_params={'location_list': 'IDs'},
+        batch_spec=api.BatchSpec('location_list', 100))
     def locations(self, location_list, api_result=None):
         rowset = api_result.result.find('rowset')
         rows = rowset.findall('row')
@@ -1,4 +1,5 @@
 from evelink import api, constants
+from evelink.parsing import schema
 from evelink.parsing.assets import parse_assets
 from evelink.parsing.contact_list import parse_contact_list
 from evelink.parsing.contract_bids import parse_contract_bids
@@ -10,7 +11,35 @@ from evelink.parsing.orders import parse_market_orders
 from evelink.parsing.wallet_journal import parse_wallet_journal
 from evelink.parsing.wallet_transactions import parse_wallet_transactions
 
-
+_MEMBER_FIELDS = [
+    ('id', 'characterID', int),
+    ('name', 'name', schema.POOLED),
+    ('join_ts', 'startDateTime', api.parse_ts),
+    # TODO(aiiane): Maybe remove this?
+    # It doesn't seem to ever have a useful value.
+    ('base.id', 'baseID', int),
+    ('base.name', 'base', schema.POOLED),
+    # Note that title does not include role titles,
+    # only ones like 'CEO'
+    ('title', 'title', schema.POOLED),
+]
+
+_MEMBERS = schema.Schema(_MEMBER_FIELDS, key=('characterID', int), name='Member')
+
+_EXTENDED_MEMBERS = schema.Schema(_MEMBER_FIELDS + [
+    ('logon_ts', 'logonDateTime', api.parse_ts),
+    ('logoff_ts', 'logoffDateTime', api.parse_ts),
+    ('location.id', 'locationID', int),
+    ('location.name', 'location', schema.POOLED),
+    # "Not available" = -1 ship id; we change to None
+    ('ship_type.id', 'shipTypeID', schema.or_none(lambda v: max(int(v), 0))),
+    ('ship_type.name', 'shipType', schema.or_none(schema.POOLED)),
+    ('roles', 'roles', int),
+    ('can_grant', 'grantableRoles', int),
+], key=('characterID', int), name='Member')
+
+
+@api.auto_paginate
 class Corp(object):
     """Wrapper around /corp/ of the EVE API.
 
@@ -92,9 +121,9 @@ class Corp(object):
         return api.APIResult(result, api_result.timestamp, api_result.expires)
 
     @api.auto_call('corp/IndustryJobs')
-    def industry_jobs(self, api_result=None):
+    def industry_jobs(self, fields=None, lazy=False, api_result=None):
         """Get a list of jobs for a corporation."""
-        return api.APIResult(parse_industry_jobs(api_result.result), api_result.timestamp, api_result.expires)
+        return api.APIResult(parse_industry_jobs(api_result.result, fields=fields, lazy=lazy), api_result.timestamp, api_result.expires)
 
     @api.auto_call('corp/Standings')
     def npc_standings(self, api_result=None):
@@ -131,15 +160,16 @@ class Corp(object):
 
         return api.APIResult(results, api_result.timestamp, api_result.expires)
 
-    @api.auto_call('corp/KillLog', map_params={'before_kill': 'beforeKillID'})
-    def kills(self, before_kill=None, api_result=None):
+    @api.auto_call('corp/KillLog', map_params={'before_kill': 'beforeKillID'},
+        page_spec=api.PageSpec('before_kill', ts_key='time'))
+    def kills(self, before_kill=None, fields=None, lazy=False, api_result=None):
         """Look up recent kills for a corporation.
 
         before_kill:
             Optional. Only show kills before this kill id. (Used for paging.)
         """
 
-        return api.APIResult(parse_kills(api_result.result), api_result.timestamp, api_result.expires)
+        return api.APIResult(parse_kills(api_result.result, fields=fields, lazy=lazy), api_result.timestamp, api_result.expires)
 
     @api.auto_call('corp/AccountBalance')
     def wallet_info(self, api_result=None):
@@ -156,20 +186,22 @@ class Corp(object):
 
         return api.APIResult(results, api_result.timestamp, api_result.expires)
 
-    @api.auto_call('corp/WalletJournal', map_params={'before_id': 'fromID', 'limit': 'rowCount'})
-    def wallet_journal(self, before_id=None, limit=None, api_result=None):
+    @api.auto_call('corp/WalletJournal', map_params={'before_id': 'fromID', 'limit': 'rowCount'},
+        page_spec=api.PageSpec('before_id'))
+    def wallet_journal(self, before_id=None, limit=None, fields=None, lazy=False, api_result=None):
         """Returns wallet journal for a corporation."""
-        return api.APIResult(parse_wallet_journal(api_result.result), api_result.timestamp, api_result.expires)
+        return api.APIResult(parse_wallet_journal(api_result.result, fields=fields, lazy=lazy), api_result.timestamp, api_result.expires)
 
-    @api.auto_call('corp/WalletTransactions', map_params={'before_id': 'fromID', 'limit': 'rowCount'})
-    def wallet_transactions(self, before_id=None, limit=None, api_result=None):
+    @api.auto_call('corp/WalletTransactions', map_params={'before_id': 'fromID', 'limit': 'rowCount'},
+        page_spec=api.PageSpec('before_id'))
+    def wallet_transactions(self, before_id=None, limit=None, fields=None, lazy=False, api_result=None):
         """Returns wallet transactions for a corporation."""
-        return api.APIResult(parse_wallet_transactions(api_result.result), api_result.timestamp, api_result.expires)
+        return api.APIResult(parse_wallet_transactions(api_result.result, fields=fields, lazy=lazy), api_result.timestamp, api_result.expires)
 
     @api.auto_call('corp/MarketOrders')
-    def orders(self, api_result=None):
+    def orders(self, fields=None, lazy=False, api_result=None):
         """Return a corporation's buy and sell orders."""
-        return api.APIResult(parse_market_orders(api_result.result), api_result.timestamp, api_result.expires)
+        return api.APIResult(parse_market_orders(api_result.result, fields=fields, lazy=lazy), api_result.timestamp, api_result.expires)
 
     @api.auto_call('corp/AssetList')
     def assets(self, api_result=None):
@@ -229,9 +261,9 @@ class Corp(object):
         return api.APIResult(result, api_result.timestamp, api_result.expires)
 
     @api.auto_call('corp/ContractBids')
-    def contract_bids(self, api_result=None):
+    def contract_bids(self, fields=None, lazy=False, api_result=None):
         """Lists the latest bids that have been made to any recent auctions."""
-        return api.APIResult(parse_contract_bids(api_result.result), api_result.timestamp, api_result.expires)
+        return api.APIResult(parse_contract_bids(api_result.result, fields=fields, lazy=lazy), api_result.timestamp, api_result.expires)
 
     @api.auto_call('corp/ContractItems', map_params={'contract_id': 'contractID'})
     def contract_items(self, contract_id, api_result=None):
@@ -239,9 +271,9 @@ class Corp(object):
         return api.APIResult(parse_contract_items(api_result.result), api_result.timestamp, api_result.expires)
 
     @api.auto_call('corp/Contracts')
-    def contracts(self, api_result=None):
+    def contracts(self, fields=None, lazy=False, api_result=None):
         """Get information about corp contracts."""
-        return api.APIResult(parse_contracts(api_result.result), api_result.timestamp, api_result.expires)
+        return api.APIResult(parse_contracts(api_result.result, fields=fields, lazy=lazy), api_result.timestamp, api_result.expires)
 
     @api.auto_call('corp/Shareholders')
     def shareholders(self, api_result=None):
@@ -429,51 +461,29 @@ class Corp(object):
 
         return api.APIResult(result, api_result.timestamp, api_result.expires)
 
-    def members(self, extended=True, api_result=None):
-        """Returns details about each member of the corporation."""
+    def members(self, extended=True, fields=None, lazy=False, api_result=None):
+        """Returns details about each member of the corporation.
+
+        fields:
+            Optional. Only parse these fields; see 'Schema.project'.
+        lazy:
+            Optional. Return LazyRow views which only convert the
+            fields that are accessed; see 'Schema.lazy'.
+        """
         if api_result is None:
             args = {}
             if extended:
                 args['extended'] = 1
             api_result = self.api.get('corp/MemberTracking', params=args)
 
+        members = _EXTENDED_MEMBERS if extended else _MEMBERS
         rowset = api_result.result.find('rowset')
-        results = {}
-        for row in rowset.findall('row'):
-            a = row.attrib
-            member = {
-                'id': int(a['characterID']),
-                'name': a['name'],
-                'join_ts': api.parse_ts(a['startDateTime']),
-                'base': {
-                    # TODO(aiiane): Maybe remove this?
-                    # It doesn't seem to ever have a useful value.
-                    'id': int(a['baseID']),
-                    'name': a['base'],
-                },
-                # Note that title does not include role titles,
-                # only ones like 'CEO'
-                'title': a['title'],
-            }
-            if extended:
-                member.update({
-                    'logon_ts': api.parse_ts(a['logonDateTime']),
-                    'logoff_ts': api.parse_ts(a['logoffDateTime']),
-                    'location': {
-                        'id': int(a['locationID']),
-                        'name': a['location'],
-                    },
-                    'ship_type': {
-                        # "Not available" = -1 ship id; we change to None
-                        'id': max(int(a['shipTypeID']), 0) or None,
-                        'name': a['shipType'] or None,
-                    },
-                    'roles': int(a['roles']),
-                    'can_grant': int(a['grantableRoles']),
-                })
-
-            results[member['id']] = member
+        results = members.project(fields).parse(rowset.findall('row'), lazy=lazy)
 
+        # Not an auto_call method, so seeding is done here.
+        name_resolver = getattr(self.api, 'name_resolver', None)
+        if isinstance(self.api, api.API) and name_resolver is not None:
+            name_resolver.seed_result('corp/MemberTracking', results)
         return api.APIResult(results, api_result.timestamp, api_result.expires)
 
     @api.auto_call('corp/MemberSecurity')
@@ -676,7 +686,8 @@ class Corp(object):
 
         return api.APIResult(results, api_result.timestamp, api_result.expires)
 
-    @api.auto_call('corp/Locations', map_params={'location_list': 'IDs'})
+    @api.auto_call('corp/Locations', map_params={'location_list': 'IDs'},
+        batch_spec=api.BatchSpec('location_list', 100))
     def locations(self, location_list, api_result=None):
         rowset = api_result.result.find('rowset')
         rows = rowset.findall('row')
@@ -1,4 +1,23 @@
 from evelink import api
+from evelink.parsing import schema
+
+_MEMBER_CORPS = schema.Schema([
+    ('id', 'corporationID', int),
+    ('timestamp', 'startDate', api.parse_ts),
+], key=('corporationID', int), name='MemberCorp')
+
+def _member_corps(row, strings):
+    return _MEMBER_CORPS.parse(row.find('rowset').findall('row'))
+
+_ALLIANCES = schema.Schema([
+    ('name', 'name', schema.POOLED),
+    ('ticker', 'shortName', schema.POOLED),
+    ('id', 'allianceID', int),
+    ('executor_id', 'executorCorpID', int),
+    ('member_count', 'memberCount', int),
+    ('timestamp', 'startDate', api.parse_ts),
+    ('member_corps', schema.ROW, _member_corps),
+], key=('allianceID', int), name='Alliance')
 
 class EVE(object):
     """Wrapper around /eve/ of the EVE API."""
@@ -74,7 +93,8 @@ class EVE(object):
 
         return api.APIResult(result, api_result.timestamp, api_result.expires)
 
-    @api.auto_call('eve/CharacterName', map_params={'id_list': 'IDs'})
+    @api.auto_call('eve/CharacterName', map_params={'id_list': 'IDs'},
+        batch_spec=api.BatchSpec('id_list', 250))
     def character_names_from_ids(self, id_list, api_result=None):
         """Retrieve a dict mapping character IDs to names.
 
@@ -110,7 +130,8 @@ class EVE(object):
         api_result = self.character_names_from_ids([char_id])
         return api.APIResult(api_result.result.get(char_id), api_result.timestamp, api_result.expires)
 
-    @api.auto_call('eve/CharacterID', map_params={'name_list': 'names'})
+    @api.auto_call('eve/CharacterID', map_params={'name_list': 'names'},
+        batch_spec=api.BatchSpec('name_list', 250))
     def character_ids_from_names(self, name_list, api_result=None):
         """Retrieve a dict mapping character names to IDs.
 
@@ -191,31 +212,17 @@ class EVE(object):
         return api.APIResult(results, api_result.timestamp, api_result.expires)
 
     @api.auto_call('eve/AllianceList')
-    def alliances(self, api_result=None):
-        """Return a dict of all alliances in EVE."""
-        results = {}
+    def alliances(self, fields=None, lazy=False, api_result=None):
+        """Return a dict of all alliances in EVE.
+
+        fields:
+            Optional. Only parse these fields; see 'Schema.project'.
+        lazy:
+            Optional. Return LazyRow views which only convert the
+            fields that are accessed; see 'Schema.lazy'.
+        """
         rowset = api_result.result.find('rowset')
-        for row in rowset.findall('row'):
-            alliance = {
-                'name': row.attrib['name'],
-                'ticker': row.attrib['shortName'],
-                'id': int(row.attrib['allianceID']),
-                'executor_id': int(row.attrib['executorCorpID']),
-                'member_count': int(row.attrib['memberCount']),
-                'timestamp': api.parse_ts(row.attrib['startDate']),
-                'member_corps': {},
-            }
-
-            corp_rowset = row.find('rowset')
-            for corp_row in corp_rowset.findall('row'):
-                corp_id = int(corp_row.attrib['corporationID'])
-                corp_ts = api.parse_ts(corp_row.attrib['startDate'])
-                alliance['member_corps'][corp_id] = {
-                    'id': corp_id,
-                    'timestamp': corp_ts,
-                }
-
-            results[alliance['id']] = alliance
+        results = _ALLIANCES.project(fields).parse(rowset.findall('row'), lazy=lazy)
 
         return api.APIResult(results, api_result.timestamp, api_result.expires)
 
@@ -0,0 +1,176 @@
+"""A caching gateway in front of the EVE API.
+
+Services which each run their own API instance and cache pay for the
+same requests over and over. A Gateway is a WSGI application serving
+the same /path.xml.aspx URLs as the EVE API, backed by a single API
+instance and its (shared) cache:
+
+    >>> gateway = Gateway(api=API(cache=SqliteCache('/var/cache/evelink')))
+    >>> make_server(gateway, port=8080).serve_forever()
+
+Clients only need to point their API at it:
+
+    >>> eve = EVE(api=API(base_url='http://localhost:8080'))
+
+Responses are passed through unparsed (see API.get_raw) and cached
+until their cachedUntil time. Identical requests which arrive while the
+first one is still being fetched wait for its result instead of
+fetching it again.
+
+The gateway can also be run from the command line with
+'evelink gateway [host:]port'.
+"""
+
+import logging
+import re
+import SocketServer
+import threading
+import time
+from urlparse import parse_qsl
+from wsgiref import simple_server
+from xml.sax.saxutils import escape
+
+from evelink import api as evelink_api
+
+_log = logging.getLogger('evelink.gateway')
+
+_PATH_RE = re.compile(r'^/([A-Za-z]+/[A-Za-z]+)\.xml(?:\.aspx)?$')
+
+ERROR_XML = """<?xml version='1.0' encoding='UTF-8'?>
+<eveapi version="2">
+  <currentTime>%s</currentTime>
+  <error code="%s">%s</error>
+  <cachedUntil>%s</cachedUntil>
+</eveapi>
+"""
+
+
+def _format_ts(ts):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(ts or 0))
+
+
+def render_error(error):
+    """Render an APIError as an EVE API error response."""
+    return ERROR_XML % (_format_ts(error.timestamp), error.code,
+                        escape(error.message or ''), _format_ts(error.expires))
+
+
+class _Call(object):
+    """A request in flight, which identical requests can wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Gateway(object):
+    """WSGI application serving EVE API requests from a shared cache.
+
+    api:
+        Optional. The API used to fetch responses (default: an API with
+        an in-memory cache). It should not have an api_key; clients
+        send their own keyID and vCode.
+    """
+
+    def __init__(self, api=None):
+        self.api = api or evelink_api.API()
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def _coalesced(self, path, key, func):
+        """Call func(), unless an identical call is already in flight.
+
+        In that case, wait for it and share its result (or error).
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+
+        if leader:
+            try:
+                call.result = func()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self.lock:
+                    del self.calls[key]
+                call.done.set()
+        else:
+            _log.debug("Waiting for an identical %s request", path)
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def get(self, path, params):
+        """Return (status, response) for an API path and its parameters."""
+        key = (path, tuple(sorted(params.iteritems())))
+        try:
+            response, _, _ = self._coalesced(
+                path, key, lambda: self.api.get_raw(path, params))
+            return '200 OK', response
+        except evelink_api.APIError as e:
+            return '400 Bad Request', render_error(e)
+
+    def __call__(self, environ, start_response):
+        method = environ.get('REQUEST_METHOD', 'GET')
+        if method not in ('GET', 'POST'):
+            start_response('405 Method Not Allowed', [('Allow', 'GET, POST')])
+            return []
+
+        match = _PATH_RE.match(environ.get('PATH_INFO', ''))
+        if match is None:
+            start_response('404 Not Found', [('Content-Type', 'text/plain')])
+            return ['Not found\n']
+
+        params = parse_qsl(environ.get('QUERY_STRING', ''))
+        if method == 'POST':
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+            params.extend(parse_qsl(environ['wsgi.input'].read(length)))
+
+        try:
+            status, response = self.get(match.group(1), dict(params))
+        except Exception:
+            _log.exception("Error fetching %s", match.group(1))
+            start_response('502 Bad Gateway', [('Content-Type', 'text/plain')])
+            return ['Bad gateway\n']
+
+        headers = [('Content-Type', 'application/xml; charset=utf-8')]
+        if evelink_api.is_compressed(response):
+            # What is sent depends on the client, which shared caches
+            # must take into account.
+            headers.append(('Vary', 'Accept-Encoding'))
+            if 'gzip' in environ.get('HTTP_ACCEPT_ENCODING', ''):
+                headers.append(('Content-Encoding', 'gzip'))
+            else:
+                response = evelink_api.decompress(response)
+        headers.append(('Content-Length', str(len(response))))
+        start_response(status, headers)
+        return [response]
+
+
+class _ThreadingWSGIServer(SocketServer.ThreadingMixIn, simple_server.WSGIServer):
+    daemon_threads = True
+
+
+class _RequestHandler(simple_server.WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        _log.debug("%s - %s", self.client_address[0], format % args)
+
+
+def make_server(gateway, host='127.0.0.1', port=8080):
+    """Return a threaded HTTP server for a Gateway.
+
+    Call serve_forever() on it to start serving.
+    """
+    return simple_server.make_server(host, port, gateway,
+                                     server_class=_ThreadingWSGIServer,
+                                     handler_class=_RequestHandler)
+
+
+# vim: set ts=4 sts=4 sw=4 et:
@@ -0,0 +1,170 @@
+"""Instrumentation of API calls.
+
+An API created with an 'instrument' reports where the time of each
+call goes. The API, its cache and the auto_call methods report:
+
+    timing('cache_get', path, seconds)   looking up the cache
+    timing('fetch', path, seconds)       send_request (the network)
+    timing('decompress', path, seconds)  decompressing a gzip response
+    timing('parse', path, seconds)       parsing the XML (including
+                                         decompression)
+    timing('cache_put', path, seconds)   storing a fetched response
+    timing('method', path, seconds)      the method's own parsing
+    timing('parse_pool', path, seconds)  parsing in a ParsePool
+    size('response', path, bytes)        a fetched response, as sent
+    size('decompressed', path, bytes)    ... and once decompressed
+    count('cache_hit', path)
+    count('cache_miss', path)
+    count('cache_stale', None)           an expired entry was found
+    count('error.<code>', path)          an API error
+
+'path' is the API path, e.g. 'char/WalletJournal'. Caches don't know
+paths, so their events have a path of None.
+
+    >>> stats = Aggregator()
+    >>> api = API(instrument=stats)
+    >>> print prometheus_text(stats)
+
+Without an instrument (the default), nothing is measured.
+"""
+
+import re
+import socket
+import threading
+
+
+class Instrument(object):
+    """Receives measurements; subclasses override what they need."""
+
+    def timing(self, metric, path, seconds):
+        pass
+
+    def size(self, metric, path, nbytes):
+        pass
+
+    def count(self, metric, path, value=1):
+        pass
+
+
+class Aggregator(Instrument):
+    """Keeps per-metric and per-path totals in memory.
+
+    Timings and sizes are summarized as count, sum, min and max.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.timings = {}
+            self.sizes = {}
+            self.counts = {}
+
+    def _observe(self, table, key, value):
+        with self.lock:
+            stats = table.get(key)
+            if stats is None:
+                table[key] = [1, value, value, value]
+            else:
+                stats[0] += 1
+                stats[1] += value
+                if value < stats[2]:
+                    stats[2] = value
+                if value > stats[3]:
+                    stats[3] = value
+
+    def timing(self, metric, path, seconds):
+        self._observe(self.timings, (metric, path), seconds)
+
+    def size(self, metric, path, nbytes):
+        self._observe(self.sizes, (metric, path), nbytes)
+
+    def count(self, metric, path, value=1):
+        with self.lock:
+            key = (metric, path)
+            self.counts[key] = self.counts.get(key, 0) + value
+
+    def summary(self):
+        """Return {'timings': ..., 'sizes': ..., 'counts': ...}.
+
+        Timings and sizes map (metric, path) to a dict of count, sum,
+        min and max; counts map (metric, path) to a number.
+        """
+        def stats(table):
+            return dict((key, {'count': s[0], 'sum': s[1], 'min': s[2], 'max': s[3]})
+                        for key, s in table.iteritems())
+        with self.lock:
+            return {
+                'timings': stats(self.timings),
+                'sizes': stats(self.sizes),
+                'counts': dict(self.counts),
+            }
+
+
+def _label(value):
+    return '"%s"' % str(value or '').replace('\\', '\\\\').replace('"', '\\"')
+
+
+def prometheus_text(aggregator, prefix='evelink'):
+    """Render an Aggregator in the Prometheus text exposition format."""
+    summary = aggregator.summary()
+    lines = []
+
+    for name, table, unit in (('seconds', summary['timings'], 'seconds'),
+                              ('bytes', summary['sizes'], 'bytes')):
+        metric = '%s_%s' % (prefix, name)
+        lines.append('# HELP %s Time or size of each step of API calls, in %s.' % (metric, unit))
+        lines.append('# TYPE %s summary' % metric)
+        for (step, path), stats in sorted(table.iteritems()):
+            labels = '{step=%s,path=%s}' % (_label(step), _label(path))
+            lines.append('%s_sum%s %r' % (metric, labels, stats['sum']))
+            lines.append('%s_count%s %d' % (metric, labels, stats['count']))
+
+    metric = '%s_events_total' % prefix
+    lines.append('# HELP %s Cache and error events of API calls.' % metric)
+    lines.append('# TYPE %s counter' % metric)
+    for (event, path), value in sorted(summary['counts'].iteritems()):
+        lines.append('%s{event=%s,path=%s} %d' % (metric, _label(event), _label(path), value))
+
+    return '\n'.join(lines) + '\n'
+
+
+class StatsdInstrument(Instrument):
+    """Sends every measurement to a StatsD server over UDP.
+
+    Metric names are '<prefix>.<metric>.<path>', e.g.
+    'evelink.fetch.char.WalletJournal' (or without the path if there
+    is none). Sizes are sent as histograms.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix='evelink'):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _name(self, metric, path):
+        name = '%s.%s' % (self.prefix, metric)
+        if path:
+            name += '.' + re.sub(r'[^A-Za-z0-9_.]', '.', path)
+        return name
+
+    def _send(self, data):
+        try:
+            self.socket.sendto(data, self.address)
+        except socket.error:
+            # Metrics are best effort; never fail an API call over them.
+            pass
+
+    def timing(self, metric, path, seconds):
+        self._send('%s:%.3f|ms' % (self._name(metric, path), seconds * 1000))
+
+    def size(self, metric, path, nbytes):
+        self._send('%s:%d|h' % (self._name(metric, path), nbytes))
+
+    def count(self, metric, path, value=1):
+        self._send('%s:%d|c' % (self._name(metric, path), value))
+
+
+# vim: set ts=4 sts=4 sw=4 et:
@@ -0,0 +1,236 @@
+import logging
+import pickle
+import sqlite3
+import zlib
+
+from evelink import api
+
+_log = logging.getLogger('evelink.kill_log')
+
+# Returned by the KillLog endpoints when paging past the oldest kill.
+KILLS_EXHAUSTED = 119
+
+
+class KillStore(object):
+    """A local, indexed store of parsed kill records.
+
+    Kills are stored in the format returned by 'parse_kills', so reports
+    built from the store never need to fetch or parse anything again.
+    The store is indexed by solar system, victim ship type, and the
+    corporations and alliances of the attackers.
+    """
+
+    def __init__(self, path=':memory:'):
+        self.connection = sqlite3.connect(path)
+        cursor = self.connection.cursor()
+        cursor.execute('create table if not exists kills (id integer primary key,'
+                       'system_id integer, time integer, ship_type_id integer, data blob)')
+        cursor.execute('create table if not exists kill_attackers (kill_id integer,'
+                       'corp_id integer, alliance_id integer)')
+        cursor.execute('create table if not exists meta ("key" text primary key on conflict replace,'
+                       'value integer)')
+        cursor.execute('create index if not exists kills_system on kills (system_id, time)')
+        cursor.execute('create index if not exists kills_ship_type on kills (ship_type_id, time)')
+        cursor.execute('create index if not exists kill_attackers_corp on kill_attackers (corp_id)')
+        cursor.execute('create index if not exists kill_attackers_alliance on kill_attackers (alliance_id)')
+        self.connection.commit()
+        cursor.close()
+
+    def __len__(self):
+        return self._scalar('select count(*) from kills')
+
+    def __contains__(self, kill_id):
+        return self._scalar('select count(*) from kills where id=?', (kill_id,)) > 0
+
+    def _scalar(self, query, args=()):
+        cursor = self.connection.cursor()
+        cursor.execute(query, args)
+        result = cursor.fetchone()[0]
+        cursor.close()
+        return result
+
+    def add(self, kills):
+        """Store kills as returned by 'parse_kills'.
+
+        Kills which are already present are left untouched. Returns the
+        number of kills that were added.
+        """
+        cursor = self.connection.cursor()
+        added = 0
+        for kill_id, kill in kills.iteritems():
+            cursor.execute('select 1 from kills where id=?', (kill_id,))
+            if cursor.fetchone():
+                continue
+            data = zlib.compress(pickle.dumps(kill, 2))
+            cursor.execute('insert into kills values (?, ?, ?, ?, ?)', (
+                kill_id,
+                kill['system_id'],
+                kill['time'],
+                kill['victim']['ship_type_id'],
+                sqlite3.Binary(data),
+            ))
+            orgs = set((a['corp']['id'], a['alliance']['id'])
+                       for a in kill['attackers'].itervalues())
+            cursor.executemany('insert into kill_attackers values (?, ?, ?)',
+                [(kill_id, corp_id, alliance_id) for corp_id, alliance_id in orgs])
+            added += 1
+        self.connection.commit()
+        cursor.close()
+        return added
+
+    def get(self, kill_id):
+        """Return a single kill, or None if it is not stored."""
+        cursor = self.connection.cursor()
+        cursor.execute('select data from kills where id=?', (kill_id,))
+        result = cursor.fetchone()
+        cursor.close()
+        if not result:
+            return None
+        return pickle.loads(zlib.decompress(str(result[0])))
+
+    def max_id(self):
+        """Return the newest stored kill ID, or None if the store is empty."""
+        return self._scalar('select max(id) from kills')
+
+    def min_id(self):
+        """Return the oldest stored kill ID, or None if the store is empty."""
+        return self._scalar('select min(id) from kills')
+
+    def find(self, system_id=None, ship_type_id=None, attacker_corp_id=None,
+             attacker_alliance_id=None, since=None, until=None):
+        """Return a dict of stored kills, keyed by kill ID.
+
+        All filters are optional and are combined:
+
+        system_id:
+            Only kills in this solar system.
+        ship_type_id:
+            Only kills where the victim flew this ship type.
+        attacker_corp_id, attacker_alliance_id:
+            Only kills with an attacker from this corp / alliance.
+        since, until:
+            Only kills at or after / before the given timestamp.
+        """
+        clauses = []
+        args = []
+        if system_id is not None:
+            clauses.append('system_id=?')
+            args.append(system_id)
+        if ship_type_id is not None:
+            clauses.append('ship_type_id=?')
+            args.append(ship_type_id)
+        if attacker_corp_id is not None:
+            clauses.append('id in (select kill_id from kill_attackers where corp_id=?)')
+            args.append(attacker_corp_id)
+        if attacker_alliance_id is not None:
+            clauses.append('id in (select kill_id from kill_attackers where alliance_id=?)')
+            args.append(attacker_alliance_id)
+        if since is not None:
+            clauses.append('time>=?')
+            args.append(since)
+        if until is not None:
+            clauses.append('time<?')
+            args.append(until)
+
+        query = 'select id, data from kills'
+        if clauses:
+            query += ' where ' + ' and '.join(clauses)
+
+        cursor = self.connection.cursor()
+        cursor.execute(query, args)
+        results = dict((kill_id, pickle.loads(zlib.decompress(str(data))))
+                       for kill_id, data in cursor.fetchall())
+        cursor.close()
+        return results
+
+    @property
+    def backfilled(self):
+        """Whether the full kill history has been fetched into the store."""
+        return bool(self._scalar(
+            'select count(*) from meta where "key"=? and value=1', ('backfilled',)))
+
+    @backfilled.setter
+    def backfilled(self, value):
+        cursor = self.connection.cursor()
+        cursor.execute('insert into meta values (?, ?)', ('backfilled', int(bool(value))))
+        self.connection.commit()
+        cursor.close()
+
+
+class KillCrawler(object):
+    """Keeps a KillStore in sync with a character or corp kill log.
+
+    client:
+        An evelink.char.Char or evelink.corp.Corp instance (anything
+        with a 'kills(before_kill=None)' method).
+    store:
+        The KillStore to fill.
+    """
+
+    def __init__(self, client, store):
+        self.client = client
+        self.store = store
+
+    def _page(self, before_kill=None):
+        try:
+            return self.client.kills(before_kill=before_kill).result
+        except api.APIError as e:
+            if e.code is not None and int(e.code) == KILLS_EXHAUSTED:
+                return {}
+            raise
+
+    def backfill(self):
+        """Page backwards through the whole kill history.
+
+        Resumes from the oldest stored kill if a previous backfill was
+        interrupted. Returns the number of kills added.
+        """
+        added = 0
+        before_kill = self.store.min_id()
+        while True:
+            kills = self._page(before_kill)
+            if not kills:
+                break
+            added += self.store.add(kills)
+            oldest = min(kills)
+            if before_kill is not None and oldest >= before_kill:
+                break
+            before_kill = oldest
+
+        self.store.backfilled = True
+        _log.debug("Backfill added %d kills", added)
+        return added
+
+    def poll(self):
+        """Fetch only kills newer than the newest stored kill.
+
+        Pages backwards only while every kill on a page is new.
+        Returns the number of kills added.
+        """
+        newest = self.store.max_id()
+        added = 0
+        before_kill = None
+        while True:
+            kills = self._page(before_kill)
+            if not kills:
+                break
+            added += self.store.add(kills)
+            oldest = min(kills)
+            if newest is None or oldest <= newest:
+                break
+            if before_kill is not None and oldest >= before_kill:
+                break
+            before_kill = oldest
+
+        _log.debug("Poll added %d kills", added)
+        return added
+
+    def sync(self):
+        """Backfill once if needed, then poll for new kills."""
+        added = 0
+        if not self.store.backfilled:
+            added += self.backfill()
+        return added + self.poll()
+
+
+# vim: set ts=4 sts=4 sw=4 et:
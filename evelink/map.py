@@ -1,4 +1,12 @@
 from evelink import api
+from evelink.parsing import schema
+
+_KILLS = schema.Schema([
+    ('id', 'solarSystemID', int),
+    ('faction', 'factionKills', int),
+    ('ship', 'shipKills', int),
+    ('pod', 'podKills', int),
+], key=('solarSystemID', int), name='SystemKills')
 
 class Map(object):
     """Wrapper around /map/ of the EVE API."""
@@ -35,21 +43,9 @@ class Map(object):
 
         Each {killdata} is {'faction':count, 'ship':count, 'pod':count}.
         """
-        
-        rowset = api_result.result.find('rowset')
-        results = {}
-        for row in rowset.findall('row'):
-            system = int(row.attrib['solarSystemID'])
-            faction_kills = int(row.attrib['factionKills'])
-            ship_kills = int(row.attrib['shipKills'])
-            pod_kills = int(row.attrib['podKills'])
 
-            results[system] = {
-                'id': system,
-                'faction': faction_kills,
-                'ship': ship_kills,
-                'pod': pod_kills,
-            }
+        rowset = api_result.result.find('rowset')
+        results = _KILLS.parse(rowset.findall('row'))
 
         data_time = api.parse_ts(api_result.result.find('dataTime').text)
 
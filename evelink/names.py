@@ -0,0 +1,306 @@
+import logging
+import sqlite3
+import threading
+import time
+
+from evelink import api
+from evelink import eve as evelink_eve
+
+_log = logging.getLogger('evelink.names')
+
+
+class NameResolver(object):
+    """Resolves character, corp and alliance IDs to names and back.
+
+    Names are kept in a persistent local dictionary (a sqlite database
+    at 'path'), so only IDs that have never been seen before are looked
+    up via the EVE API. IDs which the API rejects, and names it doesn't
+    know, are remembered in a negative cache for 'negative_ttl' seconds.
+
+    The dictionary can also be seeded for free from parsed results that
+    already contain names; see 'seed' and the '*_names' helpers below.
+    An API created with 'name_resolver=' seeds it with the results of
+    the methods listed in RESULT_NAMES as they are made.
+
+    eve:
+        Optional. The evelink.eve.EVE instance used for lookups.
+    path:
+        Optional. Where to store the dictionary (default: in memory).
+    warm:
+        Optional. Load the whole dictionary into memory on startup
+        (default: True). Otherwise entries are loaded as they are used.
+    """
+
+    def __init__(self, eve=None, path=':memory:', warm=True, negative_ttl=86400):
+        self.eve = eve or evelink_eve.EVE()
+        self.negative_ttl = negative_ttl
+        self.lock = threading.RLock()
+        self.names = {}
+        self.ids = {}
+        self.invalid = {}
+        self.unknown_names = {}
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        cursor = self.connection.cursor()
+        cursor.execute('create table if not exists names (id integer primary key on conflict replace,'
+                       'name text)')
+        cursor.execute('create index if not exists names_name on names (name)')
+        cursor.execute('create table if not exists invalid (id integer primary key on conflict replace,'
+                       'expiration integer)')
+        cursor.execute('create table if not exists unknown_names (name text primary key on conflict replace,'
+                       'expiration integer)')
+        self.connection.commit()
+        cursor.close()
+
+        if warm:
+            self.load()
+
+    def load(self):
+        """Load the whole persistent dictionary into memory."""
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.execute('select id, name from names')
+            for entity_id, name in cursor.fetchall():
+                self.names[entity_id] = name
+                self.ids[name] = entity_id
+            cursor.execute('select id, expiration from invalid where expiration>=?', (time.time(),))
+            self.invalid.update(cursor.fetchall())
+            cursor.execute('select name, expiration from unknown_names where expiration>=?', (time.time(),))
+            self.unknown_names.update(cursor.fetchall())
+            cursor.close()
+        _log.debug("Loaded %d names", len(self.names))
+
+    def seed(self, pairs):
+        """Add known (id, name) pairs to the dictionary.
+
+        Pairs with an empty ID or name (e.g. 'no alliance') are ignored.
+        """
+        new = []
+        with self.lock:
+            for entity_id, name in pairs:
+                if not entity_id or not name or self.names.get(entity_id) == name:
+                    continue
+                self.names[entity_id] = name
+                self.ids[name] = entity_id
+                self.invalid.pop(entity_id, None)
+                self.unknown_names.pop(name, None)
+                new.append((entity_id, name))
+
+            if new:
+                cursor = self.connection.cursor()
+                cursor.executemany('insert into names values (?, ?)', new)
+                self.connection.commit()
+                cursor.close()
+        return len(new)
+
+    def _lookup_local(self, entity_id):
+        if entity_id in self.names:
+            return True, self.names[entity_id]
+        now = time.time()
+        expiration = self.invalid.get(entity_id)
+        if expiration is not None and expiration >= now:
+            return True, None
+
+        cursor = self.connection.cursor()
+        cursor.execute('select name from names where id=?', (entity_id,))
+        row = cursor.fetchone()
+        invalid = None
+        # An expired entry in memory is as new as the one on disk.
+        if row is None and expiration is None:
+            cursor.execute('select expiration from invalid where id=? and expiration>=?',
+                           (entity_id, now))
+            invalid = cursor.fetchone()
+        cursor.close()
+        if row:
+            self.names[entity_id] = row[0]
+            self.ids[row[0]] = entity_id
+            return True, row[0]
+        if invalid:
+            self.invalid[entity_id] = invalid[0]
+            return True, None
+        return False, None
+
+    def _lookup_local_name(self, name):
+        if name in self.ids:
+            return True, self.ids[name]
+        now = time.time()
+        expiration = self.unknown_names.get(name)
+        if expiration is not None and expiration >= now:
+            return True, None
+
+        cursor = self.connection.cursor()
+        cursor.execute('select id from names where name=?', (name,))
+        row = cursor.fetchone()
+        unknown = None
+        if row is None and expiration is None:
+            cursor.execute('select expiration from unknown_names where name=? and expiration>=?',
+                           (name, now))
+            unknown = cursor.fetchone()
+        cursor.close()
+        if row:
+            self.names[row[0]] = name
+            self.ids[name] = row[0]
+            return True, row[0]
+        if unknown:
+            self.unknown_names[name] = unknown[0]
+            return True, None
+        return False, None
+
+    def seed_result(self, path, result):
+        """Seed the dictionary from the parsed result of an API path.
+
+        Results of paths not in RESULT_NAMES, or missing the name fields
+        (e.g. projected with 'fields'), are ignored.
+        """
+        extract = RESULT_NAMES.get(path)
+        if extract is None:
+            return 0
+        try:
+            pairs = list(extract(result))
+        except (KeyError, TypeError, AttributeError):
+            return 0
+        return self.seed(pairs)
+
+    def _mark_invalid(self, entity_ids, table='invalid', negative=None):
+        expiration = int(time.time() + self.negative_ttl)
+        if negative is None:
+            negative = self.invalid
+        with self.lock:
+            for entity_id in entity_ids:
+                negative[entity_id] = expiration
+            cursor = self.connection.cursor()
+            cursor.executemany('insert into %s values (?, ?)' % table,
+                               [(i, expiration) for i in entity_ids])
+            self.connection.commit()
+            cursor.close()
+
+    def _fetch_names(self, entity_ids):
+        """Fetch names from the API, isolating IDs that make the call fail."""
+        try:
+            result = self.eve.character_names_from_ids(entity_ids).result
+        except api.APIError:
+            # The API doesn't say which IDs are invalid; bisect to find them.
+            if len(entity_ids) == 1:
+                _log.debug("Invalid ID: %r", entity_ids[0])
+                return {}
+            middle = len(entity_ids) // 2
+            result = self._fetch_names(entity_ids[:middle])
+            result.update(self._fetch_names(entity_ids[middle:]))
+            return result
+
+        self.seed(result.iteritems())
+        return result
+
+    def names_for_ids(self, entity_ids):
+        """Return a dict mapping each of the given IDs to its name.
+
+        Only IDs not already known are requested from the API (batched).
+        Invalid IDs map to None.
+        """
+        results = {}
+        missing = []
+        with self.lock:
+            for entity_id in set(int(i) for i in entity_ids):
+                found, name = self._lookup_local(entity_id)
+                if found:
+                    results[entity_id] = name
+                else:
+                    missing.append(entity_id)
+
+        if missing:
+            _log.debug("Fetching %d unknown names", len(missing))
+            fetched = self._fetch_names(sorted(missing))
+            invalid = [i for i in missing if i not in fetched]
+            if invalid:
+                self._mark_invalid(invalid)
+            for entity_id in missing:
+                results[entity_id] = fetched.get(entity_id)
+        return results
+
+    def name_for_id(self, entity_id):
+        """Return the name for a single ID, or None if it is invalid."""
+        return self.names_for_ids([entity_id])[int(entity_id)]
+
+    def ids_for_names(self, names):
+        """Return a dict mapping each of the given names to its ID.
+
+        Only names not already known are requested from the API.
+        Unknown names map to None.
+        """
+        results = {}
+        missing = []
+        with self.lock:
+            for name in set(names):
+                found, entity_id = self._lookup_local_name(name)
+                if found:
+                    results[name] = entity_id
+                else:
+                    missing.append(name)
+
+        if missing:
+            fetched = self.eve.character_ids_from_names(sorted(missing)).result
+            # The API maps unknown names to 0.
+            self.seed((i, n) for n, i in fetched.iteritems())
+            unknown = [name for name in missing if not fetched.get(name)]
+            if unknown:
+                self._mark_invalid(unknown, 'unknown_names', self.unknown_names)
+            for name in missing:
+                results[name] = fetched.get(name) or None
+        return results
+
+    def id_for_name(self, name):
+        """Return the ID for a single name, or None if it is unknown."""
+        return self.ids_for_names([name])[name]
+
+
+def _org_names(entity):
+    yield entity['id'], entity['name']
+    for org in ('corp', 'alliance', 'faction'):
+        if org in entity:
+            yield entity[org]['id'], entity[org]['name']
+
+
+def journal_names(entries):
+    """Extract (id, name) pairs from a parsed wallet journal."""
+    for entry in entries:
+        yield entry['party_1']['id'], entry['party_1']['name']
+        yield entry['party_2']['id'], entry['party_2']['name']
+
+
+def transaction_names(entries):
+    """Extract (id, name) pairs from parsed wallet transactions."""
+    for entry in entries:
+        yield entry['client']['id'], entry['client']['name']
+        if 'char' in entry:
+            yield entry['char']['id'], entry['char']['name']
+
+
+def kill_names(kills):
+    """Extract (id, name) pairs from parsed kills."""
+    for kill in kills.itervalues():
+        for pair in _org_names(kill['victim']):
+            yield pair
+        for attacker in kill['attackers'].itervalues():
+            for pair in _org_names(attacker):
+                yield pair
+
+
+def member_names(members):
+    """Extract (id, name) pairs from a parsed corp member list."""
+    for member in members.itervalues():
+        yield member['id'], member['name']
+
+
+# The helpers which extract the names of the results of each API path.
+RESULT_NAMES = {
+    'char/WalletJournal': journal_names,
+    'corp/WalletJournal': journal_names,
+    'char/WalletTransactions': transaction_names,
+    'corp/WalletTransactions': transaction_names,
+    'char/KillLog': kill_names,
+    'corp/KillLog': kill_names,
+    'corp/MemberTracking': member_names,
+}
+
+
+# vim: set ts=4 sts=4 sw=4 et:
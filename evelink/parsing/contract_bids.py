@@ -1,21 +1,14 @@
 from evelink import api
+from evelink.parsing import schema
 
-def parse_contract_bids(api_result):
-    rowset = api_result.find('rowset')
-    results = []
-    for row in rowset.findall('row'):
-        a = row.attrib
-
-        bid = {
-            'id': int(a['bidID']),
-            'contract_id': int(a['contractID']),
-            'bidder_id': int(a['bidderID']),
-            'timestamp': api.parse_ts(a['dateBid']),
-            'amount': float(a['amount']),
-        }
-
-        results.append(bid)
-
-    return results
-
+BIDS = schema.Schema([
+    ('id', 'bidID', int),
+    ('contract_id', 'contractID', int),
+    ('bidder_id', 'bidderID', int),
+    ('timestamp', 'dateBid', api.parse_ts),
+    ('amount', 'amount', float),
+], name='ContractBid')
 
+def parse_contract_bids(api_result, fields=None, lazy=False):
+    rowset = api_result.find('rowset')
+    return BIDS.project(fields).parse(rowset.findall('row'), lazy=lazy)
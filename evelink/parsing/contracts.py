@@ -1,38 +1,34 @@
 from evelink import api
-from evelink import constants
-import time
+from evelink.parsing import schema
 
-def parse_contracts(api_result):
+CONTRACTS = schema.Schema([
+    ('id', 'contractID', int),
+    ('issuer', 'issuerID', int),
+    ('issuer_corp', 'issuerCorpID', int),
+    ('assignee', 'assigneeID', int),
+    ('acceptor', 'acceptorID', int),
+    ('start', 'startStationID', int),
+    ('end', 'endStationID', int),
+    ('type', 'type'),
+    ('status', 'status'),
+    ('corp', 'forCorp', schema.FLAG),
+    ('availability', 'availability'),
+    ('issued', 'dateIssued', api.parse_ts),
+    ('days', 'numDays', int),
+    ('price', 'price', float),
+    ('reward', 'reward', float),
+    ('collateral', 'collateral', float),
+    ('buyout', 'buyout', float),
+    ('volume', 'volume', float),
+    ('title', 'title'),
+    ('expired', 'dateExpired', api.parse_ts),
+    ('accepted', 'dateAccepted', api.parse_ts),
+    ('completed', 'dateCompleted', api.parse_ts),
+], key=('contractID', int), name='Contract')
+
+def parse_contracts(api_result, fields=None, lazy=False):
     rowset = api_result.find('rowset')
     if rowset is None:
         return
 
-    results = {}
-    for row in rowset.findall('row'):
-        a = row.attrib
-        contract = {
-            'id': int(a['contractID']),
-            'issuer': int(a['issuerID']),
-            'issuer_corp': int(a['issuerCorpID']),
-            'assignee': int(a['assigneeID']),
-            'acceptor': int(a['acceptorID']),
-            'start': int(a['startStationID']),
-            'end': int(a['endStationID']),
-            'type': a['type'],
-            'status': a['status'],
-            'corp': a['forCorp'] == '1',
-            'availability': a['availability'],
-            'issued': api.parse_ts(a['dateIssued']),
-            'days': int(a['numDays']),
-            'price': float(a['price']),
-            'reward': float(a['reward']),
-            'collateral': float(a['collateral']),
-            'buyout': float(a['buyout']),
-            'volume': float(a['volume']),
-            'title': a['title']
-        }
-        contract['expired'] = api.parse_ts(a['dateExpired'])
-        contract['accepted'] = api.parse_ts(a['dateAccepted'])
-        contract['completed'] = api.parse_ts(a['dateCompleted'])
-        results[contract['id']] = contract
-    return results
+    return CONTRACTS.project(fields).parse(rowset.findall('row'), lazy=lazy)
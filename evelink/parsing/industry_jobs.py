@@ -1,56 +1,46 @@
 from evelink import api
 from evelink import constants
+from evelink.parsing import schema
 
-def parse_industry_jobs(api_result):
+JOBS = schema.Schema([
+    ('line_id', 'assemblyLineID', int),
+    ('container_id', 'containerID', int),
+    ('input.id', 'installedItemID', int),
+    ('input.blueprint_type', 'installedItemCopy', schema.choice('copy', 'original')),
+    ('input.location_id', 'installedItemLocationID', int),
+    ('input.quantity', 'installedItemQuantity', int),
+    ('input.prod_level', 'installedItemProductivityLevel', int),
+    ('input.mat_level', 'installedItemMaterialLevel', int),
+    ('input.runs_left', 'installedItemLicensedProductionRunsRemaining', int),
+    ('input.item_flag', 'installedItemFlag', int),
+    ('input.type_id', 'installedItemTypeID', int),
+    ('output.location_id', 'outputLocationID', int),
+    ('output.bpc_runs', 'licensedProductionRuns', int),
+    ('output.container_location_id', 'containerLocationID', int),
+    ('output.type_id', 'outputTypeID', int),
+    ('output.flag', 'outputFlag', int),
+    ('runs', 'runs', int),
+    ('installer_id', 'installerID', int),
+    ('system_id', 'installedInSolarSystemID', int),
+    ('multipliers.material', 'materialMultiplier', float),
+    ('multipliers.char_material', 'charMaterialMultiplier', float),
+    ('multipliers.time', 'timeMultiplier', float),
+    ('multipliers.char_time', 'charTimeMultiplier', float),
+    ('container_type_id', 'containerTypeID', int),
+    ('delivered', 'completed', schema.FLAG),
+    ('finished', 'completedSuccessfully', schema.FLAG),
+    ('status', 'completedStatus', schema.lookup(constants.Industry.job_status)),
+    ('activity_id', 'activityID', int),
+    ('install_ts', 'installTime', api.parse_ts),
+    ('begin_ts', 'beginProductionTime', api.parse_ts),
+    ('end_ts', 'endProductionTime', api.parse_ts),
+    ('pause_ts', 'pauseProductionTime', api.parse_ts),
+], key=('jobID', int), name='IndustryJob')
+
+def parse_industry_jobs(api_result, fields=None, lazy=False):
         rowset = api_result.find('rowset')
-        result = {}
 
         if rowset is None:
             return
 
-        for row in rowset.findall('row'):
-            # shortcut to make the following block less painful
-            a = row.attrib
-            jobID = int(a['jobID'])
-            result[jobID] = {
-                'line_id': int(a['assemblyLineID']),
-                'container_id': int(a['containerID']),
-                'input': {
-                    'id': int(a['installedItemID']),
-                    'blueprint_type': 'copy' if a['installedItemCopy'] == '1' else 'original',
-                    'location_id': int(a['installedItemLocationID']),
-                    'quantity': int(a['installedItemQuantity']),
-                    'prod_level': int(a['installedItemProductivityLevel']),
-                    'mat_level': int(a['installedItemMaterialLevel']),
-                    'runs_left': int(a['installedItemLicensedProductionRunsRemaining']),
-                    'item_flag': int(a['installedItemFlag']),
-                    'type_id': int(a['installedItemTypeID']),
-                },
-                'output': {
-                    'location_id': int(a['outputLocationID']),
-                    'bpc_runs': int(a['licensedProductionRuns']),
-                    'container_location_id': int(a['containerLocationID']),
-                    'type_id': int(a['outputTypeID']),
-                    'flag': int(a['outputFlag']),
-                },
-                'runs': int(a['runs']),
-                'installer_id': int(a['installerID']),
-                'system_id': int(a['installedInSolarSystemID']),
-                'multipliers': {
-                    'material': float(a['materialMultiplier']),
-                    'char_material': float(a['charMaterialMultiplier']),
-                    'time': float(a['timeMultiplier']),
-                    'char_time': float(a['charTimeMultiplier']),
-                },
-                'container_type_id': int(a['containerTypeID']),
-                'delivered': a['completed'] == '1',
-                'finished': a['completedSuccessfully'] == '1',
-                'status': constants.Industry.job_status[int(a['completedStatus'])],
-                'activity_id': int(a['activityID']),
-                'install_ts': api.parse_ts(a['installTime']),
-                'begin_ts': api.parse_ts(a['beginProductionTime']),
-                'end_ts': api.parse_ts(a['endProductionTime']),
-                'pause_ts': api.parse_ts(a['pauseProductionTime']),
-            }
-
-        return result
+        return JOBS.project(fields).parse(rowset.findall('row'), lazy=lazy)
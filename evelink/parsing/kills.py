@@ -1,89 +1,73 @@
 from evelink import api
+from evelink.parsing import schema
 
-def parse_kills(api_result):
-    rowset = api_result.find('rowset')
-    result = {}
-    for row in rowset.findall('row'):
-        a = row.attrib
-        kill_id = int(a['killID'])
-        result[kill_id] = {
-            'id': kill_id,
-            'system_id': int(a['solarSystemID']),
-            'time': api.parse_ts(a['killTime']),
-            'moon_id': int(a['moonID']),
-        }
+def _org_fields(prefix=''):
+    return [
+        (prefix + 'id', 'characterID', int),
+        (prefix + 'name', 'characterName', schema.POOLED),
+        (prefix + 'corp.id', 'corporationID', int),
+        (prefix + 'corp.name', 'corporationName', schema.POOLED),
+        (prefix + 'alliance.id', 'allianceID', int),
+        (prefix + 'alliance.name', 'allianceName', schema.POOLED),
+        (prefix + 'faction.id', 'factionID', int),
+        (prefix + 'faction.name', 'factionName', schema.POOLED),
+    ]
+
+VICTIM = schema.Schema(_org_fields() + [
+    ('damage', 'damageTaken', int),
+    ('ship_type_id', 'shipTypeID', int),
+], name='Victim')
 
-        victim = row.find('victim')
-        a = victim.attrib
-        result[kill_id]['victim'] = {
-            'id': int(a['characterID']),
-            'name': a['characterName'],
-            'corp': {
-                'id': int(a['corporationID']),
-                'name': a['corporationName'],
-            },
-            'alliance': {
-                'id': int(a['allianceID']),
-                'name': a['allianceName'],
-            },
-            'faction': {
-                'id': int(a['factionID']),
-                'name': a['factionName'],
-            },
-            'damage': int(a['damageTaken']),
-            'ship_type_id': int(a['shipTypeID']),
-        }
+ATTACKERS = schema.Schema(_org_fields() + [
+    ('sec_status', 'securityStatus', float),
+    ('damage', 'damageDone', int),
+    ('final_blow', 'finalBlow', schema.FLAG),
+    ('weapon_type_id', 'weaponTypeID', int),
+    ('ship_type_id', 'shipTypeID', int),
+], key=('characterID', int), name='Attacker')
 
-        result[kill_id]['attackers'] = {}
+def _rowset(row, name):
+    for rowset in row.findall('rowset'):
+        if rowset.attrib['name'] == name:
+            return rowset
 
-        rowsets = {}
-        for rowset in row.findall('rowset'):
-            key = rowset.attrib['name']
-            rowsets[key] = rowset
+def _victim(row, strings):
+    return VICTIM.parse([row.find('victim')], strings=strings)[0]
 
-        for attacker in rowsets['attackers'].findall('row'):
-            a = attacker.attrib
-            attacker_id = int(a['characterID'])
-            result[kill_id]['attackers'][attacker_id] = {
-                'id': attacker_id,
-                'name': a['characterName'],
-                'corp': {
-                    'id': int(a['corporationID']),
-                    'name': a['corporationName'],
-                },
-                'alliance': {
-                    'id': int(a['allianceID']),
-                    'name': a['allianceName'],
-                },
-                'faction': {
-                    'id': int(a['factionID']),
-                    'name': a['factionName'],
-                },
-                'sec_status': float(a['securityStatus']),
-                'damage': int(a['damageDone']),
-                'final_blow': a['finalBlow'] == '1',
-                'weapon_type_id': int(a['weaponTypeID']),
-                'ship_type_id': int(a['shipTypeID']),
-            }
+def _attackers(row, strings):
+    return ATTACKERS.parse(_rowset(row, 'attackers').findall('row'), strings=strings)
 
-        def _get_items(rowset):
-            items = []
-            for item in rowset.findall('row'):
-                a = item.attrib
-                type_id = int(a['typeID'])
-                items.append({
-                    'id': type_id,
-                    'flag': int(a['flag']),
-                    'dropped': int(a['qtyDropped']),
-                    'destroyed': int(a['qtyDestroyed']),
-                })
+def _items(row, strings):
+    def _get_items(rowset):
+        items = []
+        for item in rowset.findall('row'):
+            a = item.attrib
+            type_id = int(a['typeID'])
+            items.append({
+                'id': type_id,
+                'flag': int(a['flag']),
+                'dropped': int(a['qtyDropped']),
+                'destroyed': int(a['qtyDestroyed']),
+            })
 
-                containers = item.findall('rowset')
-                for container in containers:
-                    items.extend(_get_items(container))
+            containers = item.findall('rowset')
+            for container in containers:
+                items.extend(_get_items(container))
 
-            return items
+        return items
 
-        result[kill_id]['items'] = _get_items(rowsets['items'])
+    return _get_items(_rowset(row, 'items'))
 
-    return result
+KILLS = schema.Schema([
+    ('id', 'killID', int),
+    ('system_id', 'solarSystemID', int),
+    ('time', 'killTime', api.parse_ts),
+    ('moon_id', 'moonID', int),
+    ('victim', schema.ROW, _victim),
+    ('attackers', schema.ROW, _attackers),
+    ('items', schema.ROW, _items),
+], key=('killID', int), name='Kill')
+
+def parse_kills(api_result, strings=None, fields=None, lazy=False):
+    rowset = api_result.find('rowset')
+    return KILLS.project(fields).parse(rowset.findall('row'), strings=strings, lazy=lazy)
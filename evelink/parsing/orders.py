@@ -1,28 +1,24 @@
 from evelink import api
 from evelink import constants
+from evelink.parsing import schema
 
-def parse_market_orders(api_result):
-        rowset = api_result.find('rowset')
-        rows = rowset.findall('row')
-        result = {}
-        for row in rows:
-            a = row.attrib
-            id = int(a['orderID'])
-            result[id] = {
-                'id': id,
-                'char_id': int(a['charID']),
-                'station_id': int(a['stationID']),
-                'amount': int(a['volEntered']),
-                'amount_left': int(a['volRemaining']),
-                'status': constants.Market().order_status[int(a['orderState'])],
-                'type_id': int(a['typeID']),
-                'range': int(a['range']),
-                'account_key': int(a['accountKey']),
-                'duration': int(a['duration']),
-                'escrow': float(a['escrow']),
-                'price': float(a['price']),
-                'type': 'buy' if a['bid'] == '1' else 'sell',
-                'timestamp': api.parse_ts(a['issued']),
-            }
+ORDERS = schema.Schema([
+    ('id', 'orderID', int),
+    ('char_id', 'charID', int),
+    ('station_id', 'stationID', int),
+    ('amount', 'volEntered', int),
+    ('amount_left', 'volRemaining', int),
+    ('status', 'orderState', schema.lookup(constants.Market().order_status)),
+    ('type_id', 'typeID', int),
+    ('range', 'range', int),
+    ('account_key', 'accountKey', int),
+    ('duration', 'duration', int),
+    ('escrow', 'escrow', float),
+    ('price', 'price', float),
+    ('type', 'bid', schema.choice('buy', 'sell')),
+    ('timestamp', 'issued', api.parse_ts),
+], key=('orderID', int), name='MarketOrder')
 
-        return result
+def parse_market_orders(api_result, fields=None, lazy=False):
+        rowset = api_result.find('rowset')
+        return ORDERS.project(fields).parse(rowset.findall('row'), lazy=lazy)
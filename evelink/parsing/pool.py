@@ -0,0 +1,93 @@
+"""Parsing of large responses in separate processes.
+
+Parsing XML and building the result dicts is CPU-bound and holds the
+GIL, so a single huge response (e.g. a corp/AssetList of tens of MB)
+stalls every other thread of a busy poller while it is being parsed.
+
+A ParsePool hands responses above a size threshold to a pool of worker
+processes instead. The calling thread blocks (without the GIL) until
+the pickled result comes back; smaller responses are still parsed
+in-process, where the pickling round-trip would cost more than it saves.
+
+    >>> pool = ParsePool(threshold=1024 * 1024)
+    >>> corp = Corp(api=API(api_key=key, parse_pool=pool))
+
+Results are returned as plain (pickled) values: LazyRow views are
+materialized into dicts by the worker.
+"""
+
+import logging
+import multiprocessing
+import threading
+
+from evelink import api
+
+_log = logging.getLogger('evelink.parsing.pool')
+
+
+def _parse_in_worker(cls, state, method_name, response, kw):
+    """Parse a response and run an auto_call method on it.
+
+    Runs in a worker process, on a copy of the client (without its API).
+    Returns (current_time, expires_time, result or APIError).
+    """
+    tree, current_time, expires_time, error = api.parse_response(response)
+    if error is not None:
+        return current_time, expires_time, error
+
+    client = cls.__new__(cls)
+    client.__dict__.update(state)
+    client.api = None
+    api_result = api.APIResult(tree.find('result'), current_time, expires_time)
+    result = getattr(client, method_name)(api_result=api_result, **kw)
+    return current_time, expires_time, result
+
+
+class ParsePool(object):
+    """Parses large responses in a pool of worker processes.
+
+    threshold:
+        Optional. Responses of at least this many bytes (decompressed)
+        are parsed in a worker (default: 1 MiB).
+    processes:
+        Optional. The number of worker processes (default: the number
+        of CPUs). They are started on first use.
+    """
+
+    def __init__(self, threshold=1024 * 1024, processes=None):
+        self.threshold = threshold
+        self.processes = processes
+        self.lock = threading.Lock()
+        self.pool = None
+
+    def accepts(self, response):
+        """Whether a response is large enough to be parsed in a worker."""
+        return api.response_size(response) >= self.threshold
+
+    def _get_pool(self):
+        with self.lock:
+            if self.pool is None:
+                _log.debug("Starting parse pool")
+                self.pool = multiprocessing.Pool(self.processes)
+            return self.pool
+
+    def parse(self, client, method_name, response, kw):
+        """Run 'client.method_name(api_result=..., **kw)' on a response in a worker.
+
+        Returns (current_time, expires_time, result), where 'result' is
+        an APIError if the response is an API error.
+        """
+        state = dict((k, v) for k, v in client.__dict__.iteritems() if k != 'api')
+        return self._get_pool().apply(
+            _parse_in_worker, (type(client), state, method_name, response, kw))
+
+    def close(self):
+        """Stop the worker processes."""
+        with self.lock:
+            if self.pool is not None:
+                self.pool.terminate()
+                self.pool.join()
+                self.pool = None
+
+
+# vim: set ts=4 sts=4 sw=4 et:
@@ -0,0 +1,565 @@
+"""Declarative row schemas, compiled into specialized parser functions.
+
+Most endpoints return a single rowset whose rows are flat attribute
+lists. Rather than hand-coding the conversion of every attribute, a
+parser declares a Schema: a list of (output path, attribute, converter)
+fields. The schema generates Python source for each output mode, so the
+compiled functions do exactly what a hand-written parser would, with no
+per-field interpretation overhead:
+
+- 'parse': a list of nested dicts (or a dict of them, keyed by 'key').
+- 'records': the same, but each row is a flat namedtuple.
+- 'columns': a dict of flat field name -> list of values.
+- 'iterate': a generator of rows (or (key, row) pairs), in document order.
+- 'lazy': like 'parse', but each row is a LazyRow view which converts
+  a (top-level) field only when it is first accessed.
+
+Converters may be any callable taking the attribute string. A few are
+inlined into the generated code: int, float, api.parse_ts, None (the
+raw string), FLAG ('1' -> True), POOLED (see evelink.parsing.strings)
+and or_none() wrappers of those. Fields with the attribute ROW are
+computed from the whole row element instead, by a converter taking
+(row, pool); this is how nested rowsets are handled.
+
+'Schema.project' derives a schema producing only some of the fields, so
+callers which only need a few values don't pay for converting the rest.
+"""
+
+import collections
+import keyword
+
+from evelink import api
+from evelink.parsing import strings as evelink_strings
+
+# Converter for '0'/'1' attributes.
+FLAG = object()
+
+# Converter for repeated names, routed through the current StringPool.
+POOLED = object()
+
+# Marks fields whose attribute must always be present.
+REQUIRED = object()
+
+# Attribute of fields which are computed from the whole row element.
+ROW = object()
+
+MODES = ('parse', 'records', 'columns', 'iterate', 'lazy')
+
+
+class Field(object):
+    """A single attribute of a row.
+
+    path:
+        The output key; dotted paths ('party_1.name') build nested dicts.
+    attr:
+        The name of the XML attribute, or ROW.
+    convert:
+        Optional. A converter for the attribute string (default: keep it).
+    default:
+        Optional. The value to use when the attribute is missing or
+        empty. Without a default, the attribute is required.
+    """
+
+    def __init__(self, path, attr, convert=None, default=REQUIRED):
+        self.path = path
+        self.attr = attr
+        self.convert = convert
+        self.default = default
+
+    @property
+    def name(self):
+        """The flat name used for records and columns."""
+        name = self.path.replace('.', '_')
+        # e.g. 'for' in wallet transactions.
+        return name + '_' if keyword.iskeyword(name) else name
+
+    def __repr__(self):
+        return 'Field(%r, %r)' % (self.path, self.attr)
+
+
+class LazyRow(collections.Mapping):
+    """A read-only view of a row element.
+
+    Each top-level field is converted when it is first accessed, and
+    then cached. Pickling (or copying) a view produces a plain dict.
+    """
+
+    def __init__(self, row, layout, strings):
+        self._row = row
+        self._layout = layout
+        self._s = strings
+        self._values = {}
+
+    def __getitem__(self, key):
+        values = self._values
+        if key in values:
+            return values[key]
+        getter = self._layout.getters[key]
+        a = self._row.attrib
+        attr = self._layout.conditions.get(key)
+        if attr is not None and attr not in a:
+            raise KeyError(key)
+        value = values[key] = getter(self._row, a, self._s)
+        return value
+
+    def __contains__(self, key):
+        if key not in self._layout.getters:
+            return False
+        attr = self._layout.conditions.get(key)
+        return attr is None or attr in self._row.attrib
+
+    def __iter__(self):
+        for key in self._layout.keys:
+            if key in self:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return 'LazyRow(%r)' % (dict(self),)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class _Layout(object):
+    """The compiled per-field getters shared by the LazyRows of a schema."""
+
+    def __init__(self, keys, getters, conditions):
+        self.keys = keys
+        self.getters = getters
+        self.conditions = conditions
+
+
+def choice(if_set, if_unset):
+    """A converter mapping '1' to one value and anything else to another."""
+    def convert(value):
+        return if_set if value == '1' else if_unset
+    return convert
+
+
+def lookup(table):
+    """A converter mapping an integer attribute through a table."""
+    def convert(value):
+        return table[int(value)]
+    return convert
+
+
+class or_none(object):
+    """A converter wrapper which turns empty results (0, '') into None."""
+
+    def __init__(self, convert):
+        self.convert = convert
+
+    def __call__(self, value):
+        return self.convert(value) or None
+
+
+def _with_default(convert, default):
+    if convert is FLAG:
+        convert = lambda value: value == '1'
+    def convert_or_default(value):
+        if not value:
+            return default
+        return convert(value) if convert is not None else value
+    return convert_or_default
+
+
+class _Namespace(object):
+    """Collects the objects referenced by generated code."""
+
+    def __init__(self):
+        self.names = {
+            '_int': int,
+            '_float': float,
+            '_ts': api.parse_ts,
+            '_ts_many': api.parse_ts_many,
+        }
+        self.ids = {}
+
+    def bind(self, obj):
+        name = self.ids.get(id(obj))
+        if name is None:
+            name = '_c%d' % len(self.ids)
+            self.ids[id(obj)] = name
+            self.names[name] = obj
+        return name
+
+
+class Schema(object):
+    """A declarative description of the rows of an endpoint.
+
+    fields:
+        A list of Field instances, or (path, attr[, convert[, default]])
+        tuples.
+    key:
+        Optional. An (attr, convert) pair; if given, results are dicts
+        keyed by this attribute instead of lists.
+    sort:
+        Optional. The path of a field to sort list results by.
+    conditional:
+        Optional. A dict mapping top-level output keys to an attribute;
+        the key is left out of a row unless the attribute is present.
+        (Records and columns use None instead.)
+    name:
+        Optional. The name of the record type.
+    """
+
+    def __init__(self, fields, key=None, sort=None, conditional=None, name='Row'):
+        self.fields = [f if isinstance(f, Field) else Field(*f) for f in fields]
+        for field in self.fields:
+            if field.attr is ROW and (not callable(field.convert) or field.default is not REQUIRED):
+                raise ValueError("Row fields need a converter and no default: %r" % (field,))
+            convert = field.convert
+            if isinstance(convert, or_none):
+                convert = convert.convert
+            if convert is POOLED and field.default is not REQUIRED:
+                raise ValueError("Pooled fields cannot have a default: %r" % (field,))
+        self.key = key
+        self.sort = sort
+        self.conditional = conditional or {}
+        self.name = name
+        self.record = collections.namedtuple(name, [f.name for f in self.fields])
+        self._compiled = {}
+        self._projections = {}
+
+    # --- Public interface
+
+    def parse(self, rows, strings=None, lazy=False):
+        """Convert row elements into nested dicts (or LazyRows if 'lazy')."""
+        if lazy:
+            return self.lazy(rows, strings)
+        return self.compile('parse')(rows, evelink_strings.get_pool(strings))
+
+    def lazy(self, rows, strings=None):
+        """Wrap row elements in LazyRow views.
+
+        Only the key (and the sort field) of each row is converted up
+        front; everything else is converted when it is accessed.
+        """
+        return self.compile('lazy')(rows, evelink_strings.get_pool(strings))
+
+    def records(self, rows, strings=None):
+        """Convert row elements into flat namedtuples."""
+        return self.compile('records')(rows, evelink_strings.get_pool(strings))
+
+    def columns(self, rows, strings=None):
+        """Convert row elements into a dict of columns.
+
+        Keyed schemas whose key is not one of the fields get an extra
+        'key' column.
+        """
+        return self.compile('columns')(list(rows), evelink_strings.get_pool(strings))
+
+    def iterate(self, rows, strings=None):
+        """Lazily convert row elements into nested dicts, in document order."""
+        return self.compile('iterate')(rows, evelink_strings.get_pool(strings))
+
+    def project(self, fields):
+        """Return a schema which only produces the given fields.
+
+        fields:
+            A list of output paths. A path also selects everything
+            nested below it, e.g. 'party_1' selects both 'party_1.id'
+            and 'party_1.name'. If None, the schema itself is returned.
+
+        Attributes of fields which are not selected are never converted.
+        The sort field is always kept, so results come in the same order.
+        """
+        if fields is None:
+            return self
+        if isinstance(fields, basestring):
+            fields = [fields]
+        cache_key = frozenset(fields)
+        projected = self._projections.get(cache_key)
+        if projected is not None:
+            return projected
+
+        def selected(field):
+            return field.path == self.sort or any(
+                field.path == path or field.path.startswith(path + '.')
+                for path in cache_key)
+
+        subset = [f for f in self.fields if selected(f)]
+        for path in cache_key:
+            if not any(f.path == path or f.path.startswith(path + '.') for f in subset):
+                raise ValueError("Unknown field: %r" % (path,))
+
+        projected = Schema(subset, key=self.key, sort=self.sort,
+                           conditional=self.conditional, name=self.name)
+        self._projections[cache_key] = projected
+        return projected
+
+    def compile(self, mode):
+        """Return the generated function for an output mode."""
+        func = self._compiled.get(mode)
+        if func is None:
+            func = self._compiled[mode] = self._build(mode)
+        return func
+
+    def source(self, mode):
+        """Return the generated source code for an output mode."""
+        return self._generate(mode, _Namespace())
+
+    # --- Code generation
+
+    def _key_field(self):
+        """Return the field that is identical to the key, if any."""
+        if self.key is None:
+            return None
+        attr, convert = self.key
+        for field in self.fields:
+            if field.attr == attr and field.convert is convert and field.default is REQUIRED:
+                return field
+        return None
+
+    def _expr(self, field, ns, use_key=True):
+        """Return the expression converting 'field' of the current row."""
+        if use_key and field is self._key_field():
+            return 'k'
+        return self._convert(field.attr, field.convert, field.default, ns)
+
+    def _convert(self, attr, convert, default, ns, var='a'):
+        if attr is ROW:
+            return '%s(row, _s)' % ns.bind(convert)
+        if default is not REQUIRED:
+            return '%s(%s.get(%r))' % (ns.bind(_with_default(convert, default)), var, attr)
+        src = '%s[%r]' % (var, attr)
+        if convert is None:
+            return src
+        if convert is FLAG:
+            return '(%s == %r)' % (src, '1')
+        if convert is POOLED:
+            return '_s(%s)' % src
+        if convert is int:
+            return '_int(%s)' % src
+        if convert is float:
+            return '_float(%s)' % src
+        if convert is api.parse_ts:
+            return '_ts(%s)' % src
+        if isinstance(convert, or_none):
+            return '(%s or None)' % self._convert(attr, convert.convert, default, ns, var)
+        return '%s(%s)' % (ns.bind(convert), src)
+
+    def _condition(self, field):
+        top = field.path.split('.', 1)[0]
+        return self.conditional.get(top)
+
+    def _dict_literal(self, fields, ns, indent, use_key=True):
+        """Build a (nested) dict literal for the given fields."""
+        tree = []
+        children = {}
+        for field in fields:
+            parts = field.path.split('.')
+            node = tree
+            for part in parts[:-1]:
+                if part not in children.setdefault(id(node), {}):
+                    child = []
+                    children[id(node)][part] = child
+                    node.append((part, child))
+                node = children[id(node)][part]
+            node.append((parts[-1], field))
+
+        def render(node, depth):
+            pad = ' ' * (indent + 4 * depth)
+            lines = ['{']
+            for key, value in node:
+                if isinstance(value, list):
+                    lines.append('%s    %r: %s,' % (pad, key, render(value, depth + 1)))
+                else:
+                    lines.append('%s    %r: %s,' % (pad, key, self._expr(value, ns, use_key)))
+            lines.append('%s}' % pad)
+            return '\n'.join(lines)
+
+        return render(tree, 0)
+
+    def _sort_expr(self):
+        if self.sort is None:
+            return None
+        for field in self.fields:
+            if field.path == self.sort:
+                break
+        else:
+            raise ValueError("Unknown sort field: %r" % (self.sort,))
+        return ''.join('[%r]' % part for part in field.path.split('.')), field.name
+
+    def _generate(self, mode, ns):
+        if mode not in MODES:
+            raise ValueError("Unknown mode: %r" % (mode,))
+        if mode == 'columns':
+            return self._generate_columns(ns)
+        if mode == 'lazy':
+            return self._generate_lazy(ns)[1]
+
+        lines = ['def _%s(rows, _s%%s):' % mode]
+        emit = lines.append
+        if mode != 'iterate':
+            emit('    result = %s' % ('{}' if self.key else '[]'))
+            if not self.key:
+                emit('    append = result.append')
+        emit('    for row in rows:')
+        emit('        a = row.attrib')
+        if self.key:
+            emit('        k = %s' % self._convert(self.key[0], self.key[1], REQUIRED, ns))
+
+        if mode == 'records':
+            args = []
+            for field in self.fields:
+                expr = self._expr(field, ns)
+                attr = self._condition(field)
+                if attr:
+                    expr = '(%s if %r in a else None)' % (expr, attr)
+                args.append('            %s,' % expr)
+            emit('        entry = _record(')
+            lines.extend(args)
+            emit('        )')
+            ns.names['_record'] = self.record
+        else:
+            plain = [f for f in self.fields if not self._condition(f)]
+            emit('        entry = %s' % self._dict_literal(plain, ns, 8))
+            groups = {}
+            for field in self.fields:
+                attr = self._condition(field)
+                if attr:
+                    groups.setdefault(field.path.split('.', 1)[0], []).append(field)
+            for top in sorted(groups):
+                emit('        if %r in a:' % self.conditional[top])
+                # Conditional groups are nested under their top-level key.
+                inner = [Field(f.path.split('.', 1)[1], f.attr, f.convert, f.default)
+                         if '.' in f.path else f for f in groups[top]]
+                if len(inner) == 1 and '.' not in groups[top][0].path:
+                    emit('            entry[%r] = %s' % (top, self._expr(groups[top][0], ns)))
+                else:
+                    emit('            entry[%r] = %s' % (top, self._dict_literal(inner, ns, 12)))
+
+        if mode == 'iterate':
+            emit('        yield %s' % ('(k, entry)' if self.key else 'entry'))
+            return self._finish(lines, ns)
+
+        emit('        %s' % ('result[k] = entry' if self.key else 'append(entry)'))
+        sort = self._sort_expr()
+        if sort and not self.key:
+            if mode == 'records':
+                emit('    result.sort(key=lambda e: e.%s)' % sort[1])
+            else:
+                emit('    result.sort(key=lambda e: e%s)' % sort[0])
+        emit('    return result')
+        return self._finish(lines, ns)
+
+    def _generate_columns(self, ns):
+        lines = ['def _columns(rows, _s%s):']
+        emit = lines.append
+        emit('    attribs = [row.attrib for row in rows]')
+        emit('    result = {}')
+        names = []
+        if self.key and self._key_field() is None:
+            emit("    result['key'] = [%s for a in attribs]" %
+                 self._convert(self.key[0], self.key[1], REQUIRED, ns))
+            names.append('key')
+        for field in self.fields:
+            attr = self._condition(field)
+            if attr is None and field.convert is api.parse_ts and field.default is REQUIRED:
+                # Timestamps repeat a lot; decode the whole column at once.
+                expr = "_ts_many([a[%r] for a in attribs])" % field.attr
+            elif field.attr is ROW:
+                expr = '[%s for row in rows]' % self._convert(field.attr, field.convert, field.default, ns)
+            else:
+                value = self._convert(field.attr, field.convert, field.default, ns)
+                if attr:
+                    value = '(%s if %r in a else None)' % (value, attr)
+                expr = '[%s for a in attribs]' % value
+            emit('    result[%r] = %s' % (field.name, expr))
+            names.append(field.name)
+
+        sort = self._sort_expr()
+        if sort and not self.key:
+            emit('    column = result[%r]' % sort[1])
+            emit('    order = sorted(range(len(column)), key=column.__getitem__)')
+            emit('    for name in result:')
+            emit('        values = result[name]')
+            emit('        result[name] = [values[i] for i in order]')
+        emit('    return result')
+        return self._finish(lines, ns)
+
+    def _generate_lazy(self, ns):
+        """Return the source of one getter per top-level key, and of the
+        function building the views."""
+        keys = []
+        groups = {}
+        for field in self.fields:
+            top = field.path.split('.', 1)[0]
+            if top not in groups:
+                keys.append(top)
+            groups.setdefault(top, []).append(field)
+
+        getters = []
+        for i, top in enumerate(keys):
+            fields = groups[top]
+            if len(fields) == 1 and '.' not in fields[0].path:
+                expr = self._expr(fields[0], ns, use_key=False)
+            else:
+                inner = [Field(f.path.split('.', 1)[1], f.attr, f.convert, f.default) for f in fields]
+                expr = self._dict_literal(inner, ns, 4, use_key=False)
+            lines = ['def _get%d(row, a, _s%%s):' % i, '    return %s' % expr]
+            getters.append(self._finish(lines, ns))
+
+        lines = ['def _lazy(rows, _s%s):']
+        emit = lines.append
+        emit('    result = %s' % ('{}' if self.key else '[]'))
+        emit('    for row in rows:')
+        if self.key:
+            emit('        a = row.attrib')
+            emit('        result[%s] = _view(row, _layout, _s)' %
+                 self._convert(self.key[0], self.key[1], REQUIRED, ns))
+        else:
+            emit('        result.append(_view(row, _layout, _s))')
+        sort = self._sort_expr()
+        if sort and not self.key:
+            emit('    result.sort(key=lambda e: e%s)' % sort[0])
+        emit('    return result')
+        ns.names['_view'] = LazyRow
+        ns.names['_layout'] = None
+        return keys, '\n'.join(getters) + '\n' + self._finish(lines, ns)
+
+    def _finish(self, lines, ns):
+        # Bind everything the body uses as default arguments, so that
+        # the loop only does local lookups.
+        body = '\n'.join(lines[1:])
+        names = sorted(n for n in ns.names if n in body)
+        lines[0] = lines[0] % ''.join(', %s=%s' % (n, n) for n in names)
+        return '\n'.join(lines) + '\n'
+
+    def _build(self, mode):
+        ns = _Namespace()
+        if mode == 'lazy':
+            return self._build_lazy(ns)
+        source = self._generate(mode, ns)
+        code = compile(source, '<schema %s.%s>' % (self.name, mode), 'exec')
+        exec code in ns.names
+        return ns.names['_%s' % mode]
+
+    def _build_lazy(self, ns):
+        keys, source = self._generate_lazy(ns)
+        getters = {}
+        ns.names['_layout'] = _Layout(keys, getters, self.conditional)
+        code = compile(source, '<schema %s.lazy>' % self.name, 'exec')
+        exec code in ns.names
+        for i, key in enumerate(keys):
+            getters[key] = ns.names['_get%d' % i]
+        return ns.names['_lazy']
+
+
+def iterrows(source, tag='row'):
+    """Incrementally parse a file, yielding each row element.
+
+    Rows are cleared once the consumer moves on, so combined with
+    'Schema.iterate' a whole document is never held in memory.
+    """
+    for _, elem in api.ElementTree.iterparse(source):
+        if elem.tag == tag:
+            yield elem
+            elem.clear()
+
+
+# vim: set ts=4 sts=4 sw=4 et:
@@ -0,0 +1,78 @@
+"""Optional interning of repeated strings in parsed results.
+
+Large rowsets repeat the same owner, station, corp and alliance names
+thousands of times, and every row gets its own copy from ElementTree.
+Parsers route those fields through a StringPool so that equal strings
+share a single object.
+
+Interning is disabled by default. Use 'set_scope' to enable it:
+
+- 'result': every parsed result gets its own pool, which is released
+  together with the result.
+
+- 'process': a single pool is shared by every parser in the process,
+  so strings are also shared across results (the pool keeps every
+  distinct string alive until 'clear_process_pool' is called).
+
+Parsers also accept an explicit 'strings' argument (a StringPool) which
+takes precedence over the scope.
+"""
+
+RESULT = 'result'
+PROCESS = 'process'
+
+
+class StringPool(object):
+    """Maps equal strings to a single shared string object."""
+
+    def __init__(self):
+        self.strings = {}
+
+    def __call__(self, value):
+        return self.strings.setdefault(value, value)
+
+    def __len__(self):
+        return len(self.strings)
+
+    def clear(self):
+        self.strings.clear()
+
+
+def _identity(value):
+    return value
+
+
+_scope = None
+_process_pool = StringPool()
+
+
+def set_scope(scope):
+    """Enable interning per RESULT or per PROCESS, or disable it (None)."""
+    global _scope
+    if scope not in (None, RESULT, PROCESS):
+        raise ValueError("Unknown string pool scope: %r" % (scope,))
+    _scope = scope
+
+
+def get_scope():
+    return _scope
+
+
+def clear_process_pool():
+    """Release all strings held by the process-wide pool."""
+    _process_pool.clear()
+
+
+def get_pool(strings=None):
+    """Return the callable parsers should route repeated strings through.
+
+    strings:
+        Optional. An explicit StringPool, overriding the current scope.
+    """
+    if strings is not None:
+        return strings
+    if _scope == RESULT:
+        return StringPool()
+    if _scope == PROCESS:
+        return _process_pool
+    return _identity
@@ -1,42 +1,26 @@
 from evelink import api
+from evelink.parsing import schema
 
-def parse_wallet_journal(api_result):
-    rowset = api_result.find('rowset')
-    result = []
-
-    for row in rowset.findall('row'):
-        a = row.attrib
-        entry = {
-            'timestamp': api.parse_ts(a['date']),
-            'id': int(a['refID']),
-            'type_id': int(a['refTypeID']),
-            'party_1': {
-                'name': a['ownerName1'],
-                'id': int(a['ownerID1']),
-            },
-            'party_2': {
-                'name': a['ownerName2'],
-                'id': int(a['ownerID2']),
-            },
-            'arg': {
-                'name': a['argName1'],
-                'id': int(a['argID1']),
-            },
-            'amount': float(a['amount']),
-            'balance': float(a['balance']),
-            'reason': a['reason'],
-            # The tax fields might be an empty string, or not present
-            # at all (e.g., for corp wallet records.)  Need to handle
-            # both edge cases.
-            'tax': {
-                'taxer_id': int(a.get('taxReceiverID') or 0),
-                'amount': float(a.get('taxAmount') or 0),
-            },
-        }
-
-        result.append(entry)
-
-    result.sort(key=lambda x: x['id'])
-    return result
-
+JOURNAL = schema.Schema([
+    ('timestamp', 'date', api.parse_ts),
+    ('id', 'refID', int),
+    ('type_id', 'refTypeID', int),
+    ('party_1.name', 'ownerName1', schema.POOLED),
+    ('party_1.id', 'ownerID1', int),
+    ('party_2.name', 'ownerName2', schema.POOLED),
+    ('party_2.id', 'ownerID2', int),
+    ('arg.name', 'argName1', schema.POOLED),
+    ('arg.id', 'argID1', int),
+    ('amount', 'amount', float),
+    ('balance', 'balance', float),
+    ('reason', 'reason', schema.POOLED),
+    # The tax fields might be an empty string, or not present
+    # at all (e.g., for corp wallet records.)  Need to handle
+    # both edge cases.
+    ('tax.taxer_id', 'taxReceiverID', int, 0),
+    ('tax.amount', 'taxAmount', float, 0.0),
+], sort='id', name='JournalEntry')
 
+def parse_wallet_journal(api_result, strings=None, fields=None, lazy=False):
+    rowset = api_result.find('rowset')
+    return JOURNAL.project(fields).parse(rowset.findall('row'), strings=strings, lazy=lazy)
@@ -1,37 +1,25 @@
 from evelink import api
+from evelink.parsing import schema
 
-def parse_wallet_transactions(api_result):
-    rowset = api_result.find('rowset')
-    rows = rowset.findall('row')
-    result = []
-    for row in rows:
-        a = row.attrib
-        entry = {
-            'timestamp': api.parse_ts(a['transactionDateTime']),
-            'id': int(a['transactionID']),
-            'journal_id': int(a['journalTransactionID']),
-            'quantity': int(a['quantity']),
-            'type': {
-                'id': int(a['typeID']),
-                'name': a['typeName'],
-            },
-            'price': float(a['price']),
-            'client': {
-                'id': int(a['clientID']),
-                'name': a['clientName'],
-            },
-            'station': {
-                'id': int(a['stationID']),
-                'name': a['stationName'],
-            },
-            'action': a['transactionType'],
-            'for': a['transactionFor'],
-        }
-        if 'characterID' in a:
-            entry['char'] = {
-                'id': int(a['characterID']),
-                'name': a['characterName'],
-            }
-        result.append(entry)
+TRANSACTIONS = schema.Schema([
+    ('timestamp', 'transactionDateTime', api.parse_ts),
+    ('id', 'transactionID', int),
+    ('journal_id', 'journalTransactionID', int),
+    ('quantity', 'quantity', int),
+    ('type.id', 'typeID', int),
+    ('type.name', 'typeName', schema.POOLED),
+    ('price', 'price', float),
+    ('client.id', 'clientID', int),
+    ('client.name', 'clientName', schema.POOLED),
+    ('station.id', 'stationID', int),
+    ('station.name', 'stationName', schema.POOLED),
+    ('action', 'transactionType', schema.POOLED),
+    ('for', 'transactionFor', schema.POOLED),
+    # Only present in corp transactions.
+    ('char.id', 'characterID', int),
+    ('char.name', 'characterName', schema.POOLED),
+], conditional={'char': 'characterID'}, name='Transaction')
 
-    return result
+def parse_wallet_transactions(api_result, strings=None, fields=None, lazy=False):
+    rowset = api_result.find('rowset')
+    return TRANSACTIONS.project(fields).parse(rowset.findall('row'), strings=strings, lazy=lazy)
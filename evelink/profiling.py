@@ -0,0 +1,317 @@
+"""Profiling of individual slow (or sampled) API calls.
+
+An API created with a 'profiler' profiles auto_call methods (the fetch,
+the XML parsing and the method's own parsing) and keeps the profiles of
+the calls worth looking at:
+
+    >>> profiler = Profiler(threshold=2.0, sample_rate=0.001,
+    ...                     directory='/var/tmp/evelink-profiles')
+    >>> api = API(profiler=profiler)
+
+Calls slower than 'threshold' are profiled by sampling their stack
+every few milliseconds from a background thread, which costs next to
+nothing for the calls which turn out to be fast. A random 'sample_rate'
+fraction of the calls is instead run under cProfile, for exact counts
+and timings.
+
+Every profile is kept along with the path, a fingerprint of the params
+and the size of the response, in a format pstats reads; see 'summarize'
+(or 'evelink profiles <directory>').
+"""
+
+import collections
+import cProfile
+import glob
+import hashlib
+import json
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from StringIO import StringIO
+
+
+def fingerprint(path, params):
+    """A short, stable digest of a call's path and params.
+
+    Tells calls with the same params apart without storing them (and
+    whatever IDs they contain) alongside the profiles.
+    """
+    params = sorted((params or {}).iteritems())
+    return hashlib.sha1(repr((path, params))).hexdigest()[:12]
+
+
+class _Stats(object):
+    """The interface pstats.Stats loads profiles from."""
+
+    def __init__(self, stats):
+        self.stats = dict(stats)
+
+    def create_stats(self):
+        pass
+
+
+class CapturedProfile(object):
+    """A profile of one call.
+
+    'stats' is a pstats-style dict of {(file, line, function): (calls,
+    primitive calls, own time, cumulative time, callers)}. For sampled
+    profiles, calls are the number of samples a function appeared in.
+    """
+
+    def __init__(self, path, fingerprint, size, elapsed, kind, stats,
+                 timestamp=None, error=None):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.size = size
+        self.elapsed = elapsed
+        self.kind = kind
+        self.stats = stats
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.error = error
+
+    @property
+    def name(self):
+        return '%.6f-%s-%s' % (self.timestamp, self.path.replace('/', '.'), self.fingerprint)
+
+    def pstats(self, stream=None):
+        """The profile as a pstats.Stats."""
+        return pstats.Stats(_Stats(self.stats), stream=stream)
+
+    def metadata(self):
+        return {
+            'path': self.path,
+            'fingerprint': self.fingerprint,
+            'size': self.size,
+            'elapsed': self.elapsed,
+            'kind': self.kind,
+            'timestamp': self.timestamp,
+            'error': self.error,
+        }
+
+    def save(self, directory):
+        """Write <name>.prof (for pstats) and <name>.json (metadata)."""
+        base = os.path.join(directory, self.name)
+        with open(base + '.prof', 'wb') as f:
+            marshal.dump(self.stats, f)
+        # The metadata goes last: profiles without it are incomplete.
+        with open(base + '.json', 'w') as f:
+            json.dump(self.metadata(), f)
+
+
+def load_profiles(directory):
+    """Read the profiles saved in a directory, oldest first."""
+    profiles = []
+    for meta_path in glob.glob(os.path.join(directory, '*.json')):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        with open(meta_path[:-len('.json')] + '.prof', 'rb') as f:
+            stats = marshal.load(f)
+        profiles.append(CapturedProfile(
+            meta['path'], meta['fingerprint'], meta['size'], meta['elapsed'],
+            meta['kind'], stats, meta['timestamp'], meta.get('error')))
+    profiles.sort(key=lambda p: p.timestamp)
+    return profiles
+
+
+def _stacks_to_stats(stacks, interval):
+    """Turn {stack: samples} into a pstats-style dict."""
+    stats = {}
+    for stack, samples in stacks.iteritems():
+        seconds = samples * interval
+        for i, func in enumerate(stack):
+            entry = stats.setdefault(func, [0, 0, 0.0, 0.0, {}])
+            if func not in stack[:i]:
+                # Recursive functions only count once per sample.
+                entry[0] += samples
+                entry[1] += samples
+                entry[3] += seconds
+            if i:
+                caller = entry[4].setdefault(stack[i - 1], [0, 0, 0.0, 0.0])
+                caller[0] += samples
+                caller[1] += samples
+                caller[3] += seconds
+        stats[stack[-1]][2] += seconds
+
+    return dict((func, (cc, nc, tt, ct, dict((k, tuple(v)) for k, v in callers.iteritems())))
+                for func, (cc, nc, tt, ct, callers) in stats.iteritems())
+
+
+class _Sampler(object):
+    """Samples the stacks of registered threads from a daemon thread.
+
+    The thread only runs while at least one call is being sampled.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.active = {}
+        self.thread = None
+
+    def start(self, root):
+        """Start sampling the current thread, below the frame 'root'."""
+        stacks = {}
+        with self.lock:
+            self.active[threading.current_thread().ident] = (root, stacks)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='evelink-sampler')
+                self.thread.daemon = True
+                self.thread.start()
+        return stacks
+
+    def stop(self):
+        with self.lock:
+            self.active.pop(threading.current_thread().ident, None)
+
+    def _run(self):
+        while True:
+            with self.lock:
+                if not self.active:
+                    self.thread = None
+                    return
+                frames = sys._current_frames()
+                for ident, (root, stacks) in self.active.iteritems():
+                    frame = frames.get(ident)
+                    stack = []
+                    while frame is not None and frame is not root:
+                        code = frame.f_code
+                        stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                        frame = frame.f_back
+                    if stack:
+                        stack = tuple(reversed(stack))
+                        stacks[stack] = stacks.get(stack, 0) + 1
+            del frames
+            time.sleep(self.interval)
+
+
+class Profiler(object):
+    """Decides which calls to profile, and keeps their profiles.
+
+    threshold:
+        Optional. Keep a (sampled) profile of every call taking at
+        least this many seconds.
+    sample_rate:
+        Optional. The fraction of calls to run under cProfile, whatever
+        their duration (default: 0).
+    directory:
+        Optional. Save profiles to this directory. Otherwise the last
+        'keep' profiles are kept in 'profiles'.
+    interval:
+        Optional. Seconds between two stack samples (default: 0.005).
+    seed:
+        Optional. Seed for choosing the sampled calls.
+    """
+
+    def __init__(self, threshold=None, sample_rate=0.0, directory=None,
+                 interval=0.005, keep=100, seed=None):
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.interval = interval
+        self.profiles = collections.deque(maxlen=keep)
+        self.random = random.Random(seed)
+        self.sampler = _Sampler(interval)
+        self.local = threading.local()
+
+    def note_size(self, nbytes):
+        """Record the size of the response of the call being profiled."""
+        if getattr(self.local, 'size', None) is not None:
+            self.local.size += nbytes
+
+    def run(self, path, params, func, *args, **kw):
+        """Call func, profiling it if it is selected.
+
+        Calls made while another call of the thread is being profiled
+        (e.g. the requests of a method calling other methods) are part
+        of its profile, and their responses of its size.
+        """
+        depth = getattr(self.local, 'depth', 0)
+        if depth:
+            self.local.depth = depth + 1
+            try:
+                return func(*args, **kw)
+            finally:
+                self.local.depth = depth
+
+        if self.sample_rate and self.random.random() < self.sample_rate:
+            profile = cProfile.Profile()
+            call = lambda: profile.runcall(func, *args, **kw)
+            stacks = None
+        elif self.threshold is not None:
+            stacks = self.sampler.start(sys._getframe())
+            call = lambda: func(*args, **kw)
+        else:
+            return func(*args, **kw)
+
+        self.local.size = 0
+        self.local.depth = 1
+        error = None
+        start = time.time()
+        try:
+            return call()
+        except Exception as e:
+            error = e.__class__.__name__
+            raise
+        finally:
+            elapsed = time.time() - start
+            size, self.local.size = self.local.size, None
+            self.local.depth = 0
+            if stacks is None:
+                profile.create_stats()
+                self._keep(CapturedProfile(path, fingerprint(path, params), size,
+                                           elapsed, 'cprofile', profile.stats, error=error))
+            else:
+                self.sampler.stop()
+                if elapsed >= self.threshold:
+                    stats = _stacks_to_stats(stacks, self.interval)
+                    self._keep(CapturedProfile(path, fingerprint(path, params), size,
+                                               elapsed, 'sampled', stats, error=error))
+
+    def _keep(self, profile):
+        if self.directory is None:
+            self.profiles.append(profile)
+        else:
+            profile.save(self.directory)
+
+
+def summarize(profiles, top=10):
+    """Summarize profiles per path, slowest paths first.
+
+    For each path: the number of profiles, their mean and maximum
+    duration and mean response size, then the 'top' functions by
+    cumulative time over all of them.
+    """
+    by_path = {}
+    for profile in profiles:
+        by_path.setdefault(profile.path, []).append(profile)
+
+    paths = sorted(by_path, key=lambda p: -max(x.elapsed for x in by_path[p]))
+    out = StringIO()
+    out.write('%-32s %8s %10s %10s %10s\n' % ('path', 'profiles', 'mean s', 'max s', 'mean KB'))
+    for path in paths:
+        group = by_path[path]
+        out.write('%-32s %8d %10.3f %10.3f %10.1f\n' % (
+            path, len(group),
+            sum(p.elapsed for p in group) / len(group),
+            max(p.elapsed for p in group),
+            sum(p.size for p in group) / 1024.0 / len(group)))
+
+    for path in paths:
+        group = by_path[path]
+        kinds = sorted(set(p.kind for p in group))
+        out.write('\n== %s (%d %s profiles, fingerprints: %s)\n' % (
+            path, len(group), '/'.join(kinds),
+            ', '.join(sorted(set(p.fingerprint for p in group)))))
+        stats = group[0].pstats(stream=out)
+        for profile in group[1:]:
+            stats.add(_Stats(profile.stats))
+        stats.sort_stats('cumulative').print_stats(top)
+
+    return out.getvalue()
+
+
+# vim: set ts=4 sts=4 sw=4 et:
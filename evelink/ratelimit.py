@@ -0,0 +1,48 @@
+"""Client-side rate limiting of EVE API requests.
+
+The EVE API limits how many requests each IP may make per second; a
+RateLimiter passed to one or more API objects spaces out the requests
+they send (cache hits are not limited), across all their threads:
+
+    >>> limiter = RateLimiter(20)
+    >>> api = API(api_key=(123, 'abc'), rate_limiter=limiter)
+"""
+
+import threading
+import time
+
+
+class RateLimiter(object):
+    """A token bucket of requests, shared by the threads using it.
+
+    rate:
+        The number of requests per second.
+    burst:
+        Optional. How many requests may be made at once after a quiet
+        period (default: one second's worth, at least 1).
+    """
+
+    def __init__(self, rate, burst=None):
+        if rate <= 0:
+            raise ValueError("The rate must be positive.")
+        self.rate = float(rate)
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self.tokens = self.burst
+        self.updated = time.time()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Wait until a request may be made; return how long that took."""
+        with self.lock:
+            now = time.time()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Taking the token now, even if it's not there yet, queues
+            # the waiting threads up in order.
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+# vim: set ts=4 sts=4 sw=4 et:
@@ -0,0 +1,150 @@
+"""Streaming JSON serialization of EVELink results.
+
+json.dumps on a whole result builds the complete document in memory
+(and, with indent, runs the slow pure-Python encoder), and fails on the
+sets, namedtuple records, LazyRows and generators that EVELink methods
+may return. These functions instead write a result piece by piece, as
+each row is produced, with the C encoder doing the work for each row:
+
+- write_json: the whole result as compact JSON. APIResults and records
+  (namedtuples) become objects, sets become sorted arrays, and mappings
+  and generators become objects and arrays.
+- write_ndjson: one JSON document per line for each row of the result
+  (see 'rows'), for tools that process them one at a time.
+
+    >>> serialize.write_ndjson(char.wallet_journal(), sys.stdout)
+"""
+
+import collections
+import json
+
+from evelink import api
+
+
+def _is_record(obj):
+    return isinstance(obj, tuple) and hasattr(obj, '_asdict')
+
+
+def _record(obj):
+    """A namedtuple as a dict, anything else unchanged."""
+    if _is_record(obj):
+        return dict(obj._asdict())
+    return obj
+
+
+_SCALARS = (basestring, int, long, float, bool, type(None))
+
+
+def _plain(obj):
+    """An object with its records (at any depth) as dicts.
+
+    The encoder writes tuples as arrays without calling 'default', so
+    records within mappings or lists must be converted beforehand.
+    """
+    if isinstance(obj, _SCALARS):
+        return obj
+    if _is_record(obj):
+        obj = obj._asdict()
+    if isinstance(obj, collections.Mapping):
+        return dict((key, _plain(value)) for key, value in obj.iteritems())
+    if isinstance(obj, (set, frozenset)):
+        return default(obj)
+    if hasattr(obj, '__iter__'):
+        return [_plain(item) for item in obj]
+    return obj
+
+
+def default(obj):
+    """The 'default' for json.dump(s), for the non-JSON types of results."""
+    if isinstance(obj, collections.Mapping):
+        return dict(obj)
+    if isinstance(obj, (set, frozenset)):
+        try:
+            return sorted(obj)
+        except TypeError:
+            return list(obj)
+    if hasattr(obj, '__iter__'):
+        return [_record(item) for item in obj]
+    raise TypeError('%r is not JSON serializable' % (obj,))
+
+
+_encoder = json.JSONEncoder(separators=(',', ':'), sort_keys=True, default=default)
+
+
+def dumps(obj):
+    """A result (or row) as compact JSON."""
+    return _encoder.encode(_plain(obj))
+
+
+def rows(result):
+    """The rows of a result, as they would be written by write_ndjson.
+
+    Lists, sets and generators are split into their items, and mappings
+    whose values are all mappings or records (rows keyed by ID) into
+    their values, in key order. Anything else is a single row.
+    """
+    if isinstance(result, api.APIResult):
+        result = result.result
+    if isinstance(result, collections.Mapping):
+        values = [result[key] for key in sorted(result)]
+        if values and all(isinstance(v, collections.Mapping) or _is_record(v) for v in values):
+            return iter(values)
+        return iter([result])
+    if isinstance(result, (set, frozenset)):
+        return iter(default(result))
+    if _is_sequence(result):
+        return iter(result)
+    return iter([result])
+
+
+def write_ndjson(result, out):
+    """Write each row of a result (see 'rows') as a line of JSON."""
+    for row in rows(result):
+        out.write(dumps(row))
+        out.write('\n')
+
+
+def _is_sequence(obj):
+    return (isinstance(obj, (list, tuple)) and not _is_record(obj)) or hasattr(obj, 'next')
+
+
+def _write_array(items, out):
+    out.write('[')
+    for i, item in enumerate(items):
+        if i:
+            out.write(',')
+        out.write(dumps(item))
+    out.write(']')
+
+
+def write_json(result, out):
+    """Write a result as compact JSON, a row at a time.
+
+    Top-level lists (and generators), and the lists within a top-level
+    mapping (e.g. 'columns' results), are written an item at a time, as
+    is the result of an APIResult; anything else at once.
+    """
+    wrapped = isinstance(result, api.APIResult)
+    if _is_record(result):
+        result = result._asdict()
+    if isinstance(result, collections.Mapping):
+        out.write('{')
+        for i, key in enumerate(sorted(result)):
+            if i:
+                out.write(',')
+            out.write(json.dumps(key if isinstance(key, basestring) else str(key)))
+            out.write(':')
+            value = result[key]
+            if wrapped and key == 'result':
+                write_json(value, out)
+            elif _is_sequence(value):
+                _write_array(value, out)
+            else:
+                out.write(dumps(value))
+        out.write('}')
+    elif _is_sequence(result):
+        _write_array(result, out)
+    else:
+        out.write(dumps(result))
+
+# vim: set ts=4 sts=4 sw=4 et:
@@ -0,0 +1,162 @@
+"""Filling a cache ahead of time.
+
+A new poller starts with an empty cache, so its first cycle sends every
+request at once. 'warm' makes the requests of a manifest of API keys x
+methods beforehand instead, concurrently but under a RateLimiter. It
+caches the responses without parsing them (see API.prefetch), and skips
+the requests whose responses are still cached:
+
+    >>> manifest = {
+    ...     'keys': [{'id': 123, 'vcode': 'abc', 'char_ids': [90000000]}],
+    ...     'methods': [
+    ...         'char.Char.wallet_journal',
+    ...         'corp.Corp.assets',
+    ...         {'method': 'eve.EVE.character_info_from_id',
+    ...          'args': {'char_id': 90000000}},
+    ...     ],
+    ... }
+    >>> warm(manifest, SqliteCache(path), rate_limiter=RateLimiter(20))
+    {'requests': 3, 'fetched': 3, 'cached': 0, 'errors': 0, 'bytes': 81920}
+
+Char methods are requested for each of the 'char_ids' of every key,
+account and corp methods once per key, and the others (eve, map,
+server) once, without a key. The requests are those the methods would
+make, so a later call of the method finds its response cached.
+
+From the command line: 'evelink cache warm <manifest.json>'.
+"""
+
+import collections
+import logging
+
+from evelink import api as evelink_api
+
+_log = logging.getLogger('evelink.warm')
+
+# Modules whose methods are made with each API key of the manifest.
+KEYED_MODULES = ('account', 'char', 'corp')
+
+Request = collections.namedtuple('Request', ['label', 'api', 'path', 'params'])
+
+
+def _resolve(name):
+    """Return (module name, class, method) for 'module.Class.method'."""
+    try:
+        module_name, cls_name, method_name = name.rsplit('.', 2)
+    except ValueError:
+        raise ValueError("Methods must be of the form module.Class.method: %r" % name)
+    try:
+        module = __import__('evelink.%s' % module_name, fromlist=[cls_name])
+        cls = getattr(module, cls_name)
+        method = getattr(cls, method_name)
+    except (ImportError, AttributeError):
+        raise ValueError("Unknown method: %s" % name)
+    if not hasattr(method, '_request_specs'):
+        raise ValueError("%s does not make an API request" % name)
+    return module_name, cls, method
+
+
+def _params(client, specs, kwargs):
+    """The params of each request a method call would make."""
+    args_map = evelink_api.map_func_args((), kwargs, specs['args'], specs['defaults'])
+    missing = [arg for arg in specs['args'] if arg not in args_map]
+    if missing:
+        raise TypeError("missing %s" % ', '.join(missing))
+    for attr_name in specs['prop_to_param']:
+        args_map[attr_name] = getattr(client, attr_name, None)
+
+    batch_spec = specs['batch_spec']
+    chunks = batch_spec and batch_spec.chunks(args_map[batch_spec.arg])
+    for chunk in chunks or [None]:
+        if chunk is not None:
+            args_map[batch_spec.arg] = chunk
+        params = evelink_api.translate_args(args_map, specs['map_params'])
+        yield dict((k, v) for k, v in params.iteritems() if v is not None)
+
+
+def requests(manifest, make_api):
+    """Yield the Requests of a manifest.
+
+    make_api(api_key) returns the API to use for an API key (or None).
+    """
+    keys = [((int(key['id']), str(key['vcode'])), key.get('char_ids', []))
+            for key in manifest.get('keys', [])]
+    for entry in manifest.get('methods', []):
+        if isinstance(entry, basestring):
+            name, kwargs = entry, {}
+        else:
+            name, kwargs = entry['method'], dict(entry.get('args', {}))
+        module_name, cls, method = _resolve(name)
+
+        clients = []
+        if module_name not in KEYED_MODULES:
+            clients.append((name, cls(api=make_api(None))))
+        elif module_name == 'char':
+            for api_key, char_ids in keys:
+                for char_id in char_ids:
+                    clients.append(('%s %s' % (name, char_id),
+                                    cls(int(char_id), api=make_api(api_key))))
+        else:
+            for api_key, _ in keys:
+                clients.append(('%s key %s' % (name, api_key[0]), cls(api=make_api(api_key))))
+
+        specs = method._request_specs
+        try:
+            for label, client in clients:
+                for params in _params(client, specs, kwargs):
+                    yield Request(label, client.api, specs['path'], params)
+        except TypeError as e:
+            raise ValueError("Bad arguments for %s: %s" % (name, e))
+
+
+def warm(manifest, cache, workers=8, rate_limiter=None, progress=None, **api_kw):
+    """Make the requests of a manifest, filling a cache.
+
+    Returns the number of 'requests', of those 'fetched', still 'cached'
+    or which failed ('errors'), and the 'bytes' fetched. 'progress', if
+    given, is called as each request completes with (number done, number
+    of requests, Request, status, size or exception), where the status
+    is 'fetched', 'cached' or 'error'. Other keyword arguments are
+    passed to the API objects made (e.g. 'base_url').
+    """
+    from multiprocessing.pool import ThreadPool
+
+    apis = {}
+
+    def make_api(api_key):
+        if api_key not in apis:
+            apis[api_key] = evelink_api.API(cache=cache, api_key=api_key,
+                                            rate_limiter=rate_limiter, **api_kw)
+        return apis[api_key]
+
+    # Resolving the whole manifest first reports its errors before any
+    # request is made.
+    pending = list(requests(manifest, make_api))
+    report = {'requests': len(pending), 'fetched': 0, 'cached': 0, 'errors': 0, 'bytes': 0}
+
+    def run(request):
+        try:
+            cached, size, _ = request.api.prefetch(request.path, request.params)
+        except Exception as e:
+            _log.warning("Couldn't warm %s: %s", request.label, e)
+            return request, 'error', e
+        return request, cached and 'cached' or 'fetched', size
+
+    pool = ThreadPool(workers)
+    try:
+        results = pool.imap_unordered(run, pending)
+        for done, (request, status, detail) in enumerate(results, 1):
+            if status == 'error':
+                report['errors'] += 1
+            else:
+                report[status] += 1
+                if status == 'fetched':
+                    report['bytes'] += detail
+            if progress is not None:
+                progress(done, len(pending), request, status, detail)
+    finally:
+        pool.close()
+        pool.join()
+    return report
+
+# vim: set ts=4 sts=4 sw=4 et:
@@ -0,0 +1,57 @@
+import unittest2 as unittest
+
+import mock
+
+from evelink import api
+from evelink.cache.layered import LayeredCache
+from evelink.cache.sqlite import SqliteCache
+
+class LayeredCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.l2 = SqliteCache(':memory:')
+        self.cache = LayeredCache(self.l2, max_entries=2)
+
+    def tearDown(self):
+        self.l2.connection.close()
+
+    def test_cache(self):
+        self.cache.put('foo', 'bar', 3600)
+        self.assertEqual(self.cache.get('foo'), 'bar')
+        self.assertEqual(self.l2.get('foo'), 'bar')
+        self.assertEqual(self.cache.counters['l1_hits'], 1)
+
+    def test_expire(self):
+        self.cache.put('baz', 'qux', -1)
+        self.assertEqual(self.cache.get('baz'), None)
+
+    def test_fills_from_l2(self):
+        self.l2.put('foo', 'bar', 3600)
+        self.assertEqual(self.cache.get('foo'), 'bar')
+        self.l2.get_entry = mock.Mock()
+        self.assertEqual(self.cache.get('foo'), 'bar')
+        self.assertFalse(self.l2.get_entry.called)
+
+    def test_unknown_expiration(self):
+        l2 = mock.Mock(spec=api.APICache)
+        l2.get_entry.return_value = ('bar', None)
+        cache = LayeredCache(l2)
+        self.assertEqual(cache.get('foo'), 'bar')
+        self.assertEqual(cache.get('foo'), 'bar')
+        self.assertEqual(l2.get_entry.call_count, 2)
+
+    def test_max_entries(self):
+        self.cache.put('a', 1, 3600)
+        self.cache.put('b', 2, 60)
+        self.cache.put('c', 3, 600)
+        self.assertEqual(sorted(self.cache.cache), ['a', 'c'])
+        self.assertEqual(self.cache.get('b'), 2)
+
+    def test_stats(self):
+        self.cache.put('foo', 'bar', 3600)
+        self.cache.get('foo')
+        self.cache.get('missing')
+        stats = self.cache.stats()
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual((stats['hits'], stats['misses'], stats['l1_hits']), (1, 1, 1))
+        self.assertEqual(stats['l1_entries'], 1)
@@ -1,5 +1,6 @@
 import os
 import tempfile
+import threading
 import unittest2 as unittest
 
 from evelink.cache.shelf import ShelveCache
@@ -29,3 +30,30 @@ class ShelveCacheTestCase(unittest.TestCase):
     def test_expire(self):
         self.cache.put('baz', 'qux', -1)
         self.assertEqual(self.cache.get('baz'), None)
+
+    def test_stats(self):
+        self.cache.put('foo', 'bar', 3600)
+        self.cache.put('baz', 'qux', -1)
+        self.cache.get('foo')
+        self.cache.get('missing')
+
+        stats = self.cache.stats()
+        self.assertEqual(stats['entries'], 2)
+        self.assertEqual(stats['expired'], 1)
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (1, 1, 0))
+        self.assertEqual([key for key, _ in stats['largest']], ['foo', 'baz'])
+        self.assertTrue(stats['bytes'] > 0)
+
+    def test_threads(self):
+        def worker(n):
+            for i in xrange(50):
+                self.cache.put('%d-%d' % (n, i), 'x' * i, 3600)
+                self.cache.get('%d-%d' % (n, i // 2))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in xrange(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.stats()['entries'], 200)
+        self.assertEqual(self.cache.get('3-49'), 'x' * 49)
@@ -2,6 +2,7 @@ import os
 import tempfile
 import unittest2 as unittest
 
+import evelink.cache.sqlite as evelink_sqlite
 from evelink.cache.sqlite import SqliteCache
 
 class SqliteCacheTestCase(unittest.TestCase):
@@ -33,3 +34,45 @@ class SqliteCacheTestCase(unittest.TestCase):
     def test_expire(self):
         self.cache.put('baz', 'qux', -1)
         self.assertEqual(self.cache.get('baz'), None)
+
+    def test_stats(self):
+        self.cache.put('foo', 'bar', 3600)
+        self.cache.put('baz', 'qux', -1)
+        self.cache.get('foo')
+        self.cache.get('missing')
+
+        stats = self.cache.stats()
+        self.assertEqual(stats['entries'], 2)
+        self.assertEqual(stats['expired'], 1)
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (1, 1, 0))
+        self.assertEqual([key for key, _ in stats['largest']], ['foo', 'baz'])
+        self.assertTrue(stats['bytes'] > 0)
+
+    def test_stats_persist(self):
+        self.cache.put('foo', 'bar', 3600)
+        self.cache.put('baz', 'qux', -1)
+        self.cache.get('foo')
+        self.cache.get('baz')
+        self.cache.get('missing')
+        self.cache.flush_counters()
+        self.cache.connection.close()
+
+        # Counted across processes (and restarts).
+        self.cache = SqliteCache(self.cache_path)
+        self.cache.get('foo')
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (2, 2, 1))
+        self.assertEqual(self.cache.counters['hits'], 1)
+
+    def test_flush_at_exit(self):
+        self.cache.get('missing')
+        evelink_sqlite._flush_at_exit()
+        self.assertEqual(self.cache.pending, {})
+
+        # Only open caches are flushed, and the registry doesn't keep
+        # them alive.
+        other = SqliteCache(':memory:')
+        other_id = id(other)
+        self.assertTrue(other_id in evelink_sqlite._open_caches)
+        del other
+        self.assertFalse(other_id in evelink_sqlite._open_caches)
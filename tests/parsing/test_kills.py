@@ -102,3 +102,17 @@ class KillsTestCase(unittest.TestCase):
                     'name': 'Pilot 333',
                     'ship_type_id': 670}}
             })
+
+    def test_parse_kills_lazy(self):
+        api_result, _, _ = make_api_result("char/kills.xml")
+
+        eager = evelink_k.parse_kills(api_result)
+        lazy = evelink_k.parse_kills(api_result, lazy=True)
+        self.assertEqual(lazy, eager)
+        self.assertEqual(lazy[15640545]['attackers'], eager[15640545]['attackers'])
+
+    def test_parse_kills_fields(self):
+        api_result, _, _ = make_api_result("char/kills.xml")
+
+        result = evelink_k.parse_kills(api_result, fields=['time', 'victim'])
+        self.assertEqual(sorted(result[15640545]), ['time', 'victim'])
@@ -0,0 +1,87 @@
+import os
+import pickle
+
+import mock
+import unittest2 as unittest
+
+import evelink.api as evelink_api
+import evelink.char as evelink_char
+from evelink.parsing import pool as evelink_pool
+from tests.utils import make_api_result
+
+RESPONSE = """<?xml version='1.0' encoding='UTF-8'?>
+<eveapi version="2">
+    <currentTime>2009-10-18 17:05:31</currentTime>
+    %s
+    <cachedUntil>2009-11-18 17:05:31</cachedUntil>
+</eveapi>
+"""
+
+ERROR = RESPONSE % '<error code="123">Test error message.</error>'
+
+
+def make_response(xml_path):
+    xml_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'xml')
+    with open(os.path.join(xml_dir, xml_path)) as f:
+        return RESPONSE % f.read()
+
+
+class ParsePoolTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = evelink_pool.ParsePool(threshold=1000, processes=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def setUp(self):
+        self.cache = mock.MagicMock(spec=evelink_api.APICache)
+        self.cache.get.return_value = None
+        self.api = evelink_api.API(cache=self.cache, parse_pool=self.pool)
+        self.api.send_request = mock.Mock()
+        self.char = evelink_char.Char(char_id=1, api=self.api)
+
+    def test_accepts(self):
+        self.assertTrue(self.pool.accepts('x' * 1000))
+        self.assertFalse(self.pool.accepts('x' * 999))
+
+    def test_large_response(self):
+        self.api.send_request.return_value = make_response("char/wallet_journal.xml")
+
+        result, current, expires = self.char.wallet_journal(fields=['amount'])
+        expected = self.char.wallet_journal(
+            fields=['amount'], api_result=make_api_result("char/wallet_journal.xml"))
+        self.assertEqual(result, expected.result)
+        self.assertEqual((current, expires), (1255885531, 1258563931))
+        self.assertEqual(self.api.last_timestamps, {
+            'current_time': 1255885531,
+            'cached_until': 1258563931,
+        })
+        self.assertEqual(len(self.cache.put.mock_calls), 1)
+
+    def test_small_response(self):
+        self.api.send_request.return_value = make_response("char/wallet_info.xml")
+
+        with mock.patch.object(self.pool, 'parse') as parse:
+            result, _, _ = self.char.wallet_info()
+        self.assertEqual(parse.mock_calls, [])
+        self.assertEqual(result['id'], 1)
+
+    def test_error(self):
+        self.api.send_request.return_value = ERROR + ' ' * 1000
+
+        with self.assertRaises(evelink_api.APIError) as cm:
+            self.char.wallet_journal()
+        self.assertEqual(cm.exception.code, '123')
+        self.assertEqual(cm.exception.message, 'Test error message.')
+        self.assertEqual(len(self.cache.put.mock_calls), 1)
+
+    def test_api_error_pickle(self):
+        error = evelink_api.APIError('123', 'Test', 12345, 67890)
+        self.assertEqual(repr(pickle.loads(pickle.dumps(error, 2))), repr(error))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,218 @@
+from StringIO import StringIO
+from xml.etree import ElementTree
+
+import pickle
+
+import mock
+import unittest2 as unittest
+
+from evelink import api
+from evelink.parsing import schema
+from evelink.parsing import strings as evelink_strings
+
+ROWS = """
+<rowset name="rows" key="id">
+  <row id="3" name="Foo" when="2012-06-12 12:04:33" flag="1" tax="" />
+  <row id="1" name="Bar" when="2012-06-12 12:04:33" flag="0" tax="2.5"
+       charID="42" charName="Baz" />
+</rowset>
+"""
+
+
+def make_rows():
+    return ElementTree.fromstring(ROWS).findall('row')
+
+
+class SchemaTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.schema = schema.Schema([
+            ('id', 'id', int),
+            ('name', 'name', schema.POOLED),
+            ('timestamp', 'when', api.parse_ts),
+            ('flags.set', 'flag', schema.FLAG),
+            ('flags.tax', 'tax', float, 0.0),
+            ('char.id', 'charID', int),
+            ('char.name', 'charName'),
+        ], sort='id', conditional={'char': 'charID'})
+
+    def test_parse(self):
+        self.assertEqual(self.schema.parse(make_rows()), [
+            {
+                'id': 1,
+                'name': 'Bar',
+                'timestamp': 1339502673,
+                'flags': {'set': False, 'tax': 2.5},
+                'char': {'id': 42, 'name': 'Baz'},
+            },
+            {
+                'id': 3,
+                'name': 'Foo',
+                'timestamp': 1339502673,
+                'flags': {'set': True, 'tax': 0.0},
+            },
+        ])
+
+    def test_parse_keyed(self):
+        keyed = schema.Schema([
+            ('name', 'name'),
+            ('id', 'id', int),
+        ], key=('id', int))
+        self.assertEqual(keyed.parse(make_rows()), {
+            1: {'id': 1, 'name': 'Bar'},
+            3: {'id': 3, 'name': 'Foo'},
+        })
+        # The key is converted once and reused for the 'id' field.
+        self.assertTrue("'id': k," in keyed.source('parse'))
+
+    def test_records(self):
+        records = self.schema.records(make_rows())
+        self.assertEqual([r.id for r in records], [1, 3])
+        self.assertEqual(records[0].flags_tax, 2.5)
+        self.assertEqual(records[0].char_name, 'Baz')
+        self.assertEqual(records[1].char_id, None)
+        self.assertEqual(records[1]._fields, (
+            'id', 'name', 'timestamp', 'flags_set', 'flags_tax', 'char_id', 'char_name'))
+
+    def test_records_keyword_names(self):
+        keyword = schema.Schema([('for', 'name')])
+        self.assertEqual(keyword.records(make_rows())[0].for_, 'Foo')
+
+    def test_columns(self):
+        self.assertEqual(self.schema.columns(make_rows()), {
+            'id': [1, 3],
+            'name': ['Bar', 'Foo'],
+            'timestamp': [1339502673, 1339502673],
+            'flags_set': [False, True],
+            'flags_tax': [2.5, 0.0],
+            'char_id': [42, None],
+            'char_name': ['Baz', None],
+        })
+
+    def test_columns_key(self):
+        keyed = schema.Schema([('name', 'name')], key=('id', int))
+        self.assertEqual(keyed.columns(make_rows()), {
+            'key': [3, 1],
+            'name': ['Foo', 'Bar'],
+        })
+
+    def test_iterate(self):
+        rows = self.schema.iterate(make_rows())
+        self.assertEqual(rows.next()['id'], 3)
+        self.assertEqual(rows.next()['id'], 1)
+        self.assertRaises(StopIteration, rows.next)
+
+        keyed = schema.Schema([('name', 'name')], key=('id', int))
+        self.assertEqual(list(keyed.iterate(make_rows())), [
+            (3, {'name': 'Foo'}),
+            (1, {'name': 'Bar'}),
+        ])
+
+    def test_iterrows(self):
+        source = StringIO('<result>%s</result>' % ROWS)
+        rows = self.schema.iterate(schema.iterrows(source))
+        self.assertEqual([r['name'] for r in rows], ['Foo', 'Bar'])
+
+    def test_project(self):
+        projected = self.schema.project(['name', 'flags'])
+        self.assertEqual(projected.parse(make_rows()), [
+            {'id': 1, 'name': 'Bar', 'flags': {'set': False, 'tax': 2.5}},
+            {'id': 3, 'name': 'Foo', 'flags': {'set': True, 'tax': 0.0}},
+        ])
+        # Unselected attributes are never converted.
+        self.assertFalse('when' in projected.source('parse'))
+        self.assertEqual(projected.records(make_rows())[0]._fields,
+                         ('id', 'name', 'flags_set', 'flags_tax'))
+
+    def test_project_conditional(self):
+        projected = self.schema.project(['char.name'])
+        self.assertEqual(projected.parse(make_rows()), [
+            {'id': 1, 'char': {'name': 'Baz'}},
+            {'id': 3},
+        ])
+
+    def test_project_cached(self):
+        self.assertIs(self.schema.project(None), self.schema)
+        self.assertIs(self.schema.project(['name', 'id']),
+                      self.schema.project(['id', 'name']))
+        self.assertEqual(self.schema.project('name').parse(make_rows())[0],
+                         {'id': 1, 'name': 'Bar'})
+
+    def test_project_unknown(self):
+        self.assertRaises(ValueError, self.schema.project, ['nope'])
+        self.assertRaises(ValueError, self.schema.project, ['name.first'])
+
+    def test_or_none(self):
+        nullable = schema.Schema([
+            ('flag', 'flag', schema.or_none(int)),
+            ('name', 'tax', schema.or_none(schema.POOLED)),
+        ])
+        self.assertEqual(nullable.parse(make_rows()), [
+            {'flag': 1, 'name': None},
+            {'flag': None, 'name': '2.5'},
+        ])
+
+    def test_lazy(self):
+        rows = self.schema.lazy(make_rows())
+        self.assertEqual(rows, self.schema.parse(make_rows()))
+        self.assertTrue(isinstance(rows[0], schema.LazyRow))
+        self.assertEqual(rows[0]['flags'], {'set': False, 'tax': 2.5})
+        self.assertEqual(len(rows[0]), 5)
+        self.assertEqual(len(rows[1]), 4)
+        self.assertFalse('char' in rows[1])
+        self.assertRaises(KeyError, lambda: rows[1]['char'])
+        self.assertRaises(KeyError, lambda: rows[1]['nope'])
+        self.assertEqual(list(rows[1]), ['id', 'name', 'timestamp', 'flags'])
+
+    def test_lazy_converts_on_access(self):
+        convert = mock.Mock(side_effect=lambda v: v.upper())
+        lazy = schema.Schema([
+            ('id', 'id', int),
+            ('name', 'name', convert),
+        ], key=('id', int))
+        rows = lazy.lazy(make_rows())
+        self.assertEqual(sorted(rows), [1, 3])
+        self.assertEqual(convert.call_count, 0)
+
+        self.assertEqual(rows[3]['name'], 'FOO')
+        self.assertEqual(rows[3]['name'], 'FOO')
+        self.assertEqual(convert.call_count, 1)
+
+    def test_lazy_pickle(self):
+        rows = self.schema.parse(make_rows(), lazy=True)
+        copied = pickle.loads(pickle.dumps(rows, 2))
+        self.assertEqual(type(copied[0]), dict)
+        self.assertEqual(copied, self.schema.parse(make_rows()))
+
+    def test_row_fields(self):
+        row_schema = schema.Schema([
+            ('id', 'id', int),
+            ('attrs', schema.ROW, lambda row, strings: len(row.attrib)),
+        ])
+        self.assertEqual(row_schema.parse(make_rows()), [
+            {'id': 3, 'attrs': 5},
+            {'id': 1, 'attrs': 7},
+        ])
+        self.assertEqual(row_schema.columns(make_rows())['attrs'], [5, 7])
+        self.assertEqual(row_schema.lazy(make_rows())[1]['attrs'], 7)
+        self.assertRaises(ValueError, schema.Schema, [('x', schema.ROW)])
+
+    def test_strings(self):
+        pool = evelink_strings.StringPool()
+        self.schema.parse(make_rows(), strings=pool)
+        self.assertEqual(len(pool), 2)
+
+    def test_missing_attribute(self):
+        self.assertRaises(KeyError, schema.Schema([('x', 'missing')]).parse, make_rows())
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, schema.Schema, [('name', 'name', schema.POOLED, '')])
+        self.assertRaises(ValueError, self.schema.compile, 'xml')
+        self.assertRaises(ValueError, schema.Schema([('id', 'id')], sort='x').compile, 'parse')
+
+    def test_compile_cached(self):
+        self.assertIs(self.schema.compile('parse'), self.schema.compile('parse'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest2 as unittest
+
+import evelink.parsing.strings as evelink_strings
+from evelink.parsing.kills import parse_kills
+from evelink.parsing.wallet_journal import parse_wallet_journal
+from evelink.parsing.wallet_transactions import parse_wallet_transactions
+from tests.utils import make_api_result
+
+
+class StringPoolTestCase(unittest.TestCase):
+
+    def tearDown(self):
+        evelink_strings.set_scope(None)
+        evelink_strings.clear_process_pool()
+
+    def test_pool(self):
+        pool = evelink_strings.StringPool()
+        a = ''.join(['fo', 'o'])
+        b = ''.join(['f', 'oo'])
+        self.assertIsNot(a, b)
+        self.assertIs(pool(a), a)
+        self.assertIs(pool(b), a)
+        self.assertEqual(len(pool), 1)
+        pool.clear()
+        self.assertEqual(len(pool), 0)
+
+    def test_scopes(self):
+        self.assertEqual(evelink_strings.get_pool()('foo'), 'foo')
+
+        evelink_strings.set_scope(evelink_strings.RESULT)
+        self.assertIsNot(evelink_strings.get_pool(), evelink_strings.get_pool())
+
+        evelink_strings.set_scope(evelink_strings.PROCESS)
+        self.assertIs(evelink_strings.get_pool(), evelink_strings.get_pool())
+
+        pool = evelink_strings.StringPool()
+        self.assertIs(evelink_strings.get_pool(pool), pool)
+
+        self.assertRaises(ValueError, evelink_strings.set_scope, 'thread')
+
+    def test_parse_wallet_journal(self):
+        api_result, _, _ = make_api_result("char/wallet_journal.xml")
+        pool = evelink_strings.StringPool()
+
+        result = parse_wallet_journal(api_result, strings=pool)
+        self.assertEqual(result, parse_wallet_journal(api_result))
+        self.assertIs(result[0]['party_1']['name'], result[1]['party_1']['name'])
+        self.assertIs(result[0]['party_2']['name'], result[4]['party_2']['name'])
+
+    def test_parse_wallet_transactions(self):
+        api_result, _, _ = make_api_result("char/wallet_transactions.xml")
+        evelink_strings.set_scope(evelink_strings.RESULT)
+
+        result = parse_wallet_transactions(api_result)
+        self.assertIs(result[0]['action'], result[1]['action'])
+
+    def test_parse_kills_process_scope(self):
+        api_result, _, _ = make_api_result("char/kills.xml")
+        evelink_strings.set_scope(evelink_strings.PROCESS)
+
+        first = parse_kills(api_result)
+        second = parse_kills(api_result)
+        self.assertEqual(first, second)
+        self.assertIs(
+            first[15640545]['victim']['corp']['name'],
+            second[15640551]['victim']['corp']['name'],
+        )
@@ -1,9 +1,14 @@
+import calendar
 import gzip
+import inspect
 from StringIO import StringIO
+import time
 import unittest2 as unittest
 
 import mock
 import urllib2
+import urlparse
+import zlib
 
 import evelink.api as evelink_api
 
@@ -18,12 +23,75 @@ def compress(s):
 
 class HelperTestCase(unittest.TestCase):
 
+    def test_decompress(self):
+        xml = '<eveapi>%s</eveapi>' % ('<row foo="bar" />' * 50000)
+        self.assertEqual(evelink_api.decompress(compress(xml)), xml)
+
+    def test_decode_content(self):
+        xml = '<eveapi>%s</eveapi>' % ('<row foo="bar" />' * 100)
+        decode = evelink_api.decode_content
+        self.assertEqual(decode(zlib.compress(xml), 'deflate'), xml)
+        # Raw deflate streams, without the zlib header.
+        raw = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self.assertEqual(decode(raw.compress(xml) + raw.flush(), 'Deflate'), xml)
+        # gzip is kept as sent, for the parser to decompress on the fly.
+        self.assertEqual(decode(compress(xml), 'gzip'), compress(xml))
+        self.assertEqual(decode(xml, None), xml)
+        self.assertRaises(ValueError, decode, xml, 'br')
+
+    def test_response_size(self):
+        xml = '<eveapi>%s</eveapi>' % ('<row foo="bar" />' * 50000)
+        self.assertEqual(evelink_api.response_size(xml), len(xml))
+        self.assertEqual(evelink_api.response_size(compress(xml)), len(xml))
+
+    def test_parse_compressed_response(self):
+        xml = """<eveapi version="2">
+                <currentTime>2009-10-18 17:05:31</currentTime>
+                <result><rowset>%s</rowset></result>
+                <cachedUntil>2009-11-18 17:05:31</cachedUntil>
+            </eveapi>""" % ('<row foo="bar" />' * 50000)
+        tree, current, expires, error = evelink_api.parse_response(compress(xml))
+        self.assertEqual(len(tree.find('result/rowset')), 50000)
+        self.assertEqual((current, expires), (1255885531, 1258563931))
+        self.assertEqual(error, None)
+
     def test_parse_ts(self):
         self.assertEqual(
             evelink_api.parse_ts("2012-06-12 12:04:33"),
             1339502673,
         )
 
+    def test_parse_ts_matches_strptime(self):
+        def reference(v):
+            ts = calendar.timegm(time.strptime(v, "%Y-%m-%d %H:%M:%S"))
+            return ts if ts > 0 else None
+
+        for v in ("2012-06-12 12:04:33", "2012-06-12 00:00:00",
+                  "2012-06-12 23:59:59", "2000-02-29 12:00:00",
+                  "1999-12-31 23:59:59", "1970-01-01 00:00:01",
+                  "2038-01-19 03:14:08", "2012-06-12 12:04:60"):
+            self.assertEqual(evelink_api.parse_ts(v), reference(v), v)
+
+    def test_parse_ts_sentinels(self):
+        self.assertEqual(evelink_api.parse_ts(""), None)
+        self.assertEqual(evelink_api.parse_ts("0001-01-01 00:00:00"), None)
+        self.assertEqual(evelink_api.parse_ts("1970-01-01 00:00:00"), None)
+
+    def test_parse_ts_invalid(self):
+        for v in ("2012-13-12 12:04:33", "2012-02-30 12:04:33",
+                  "2012-06-12 25:04:33", "2012-06-12T12:04:33",
+                  "2012-06-12 12:04", "yesterday"):
+            self.assertRaises(ValueError, evelink_api.parse_ts, v)
+
+    def test_parse_ts_many(self):
+        self.assertEqual(
+            evelink_api.parse_ts_many([
+                "2012-06-12 12:04:33", "", "2012-06-12 12:04:33",
+                "0001-01-01 00:00:00", "2012-06-13 12:04:33",
+            ]),
+            [1339502673, None, 1339502673, None, 1339589073],
+        )
+
 class CacheTestCase(unittest.TestCase):
 
     def setUp(self):
@@ -37,6 +105,26 @@ class CacheTestCase(unittest.TestCase):
         self.cache.put('baz', 'qux', -1)
         self.assertEqual(self.cache.get('baz'), None)
 
+    def test_stats(self):
+        self.cache.put('foo', 'bar', 3600)
+        self.cache.put('big', 'x' * 100, 30)
+        self.cache.put('baz', 'qux', -1)
+        self.cache.put('gone', 'qux', -1)
+        self.cache.get('foo')
+        self.cache.get('missing')
+        self.cache.get('baz')
+
+        stats = self.cache.stats(top=2)
+        self.assertEqual(stats['entries'], 3)
+        self.assertEqual(stats['bytes'], 106)
+        self.assertEqual(stats['expired'], 1)
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (1, 2, 1))
+        self.assertEqual(stats['largest'], [('big', 100), ('gone', 3)])
+        self.assertEqual(dict(stats['expiry']), {
+            'expired': 1, '<1m': 1, '<5m': 0, '<15m': 0, '<1h': 1, '<6h': 0,
+            '<1d': 0, '>=1d': 0,
+        })
+
 class APITestCase(unittest.TestCase):
 
     def setUp(self):
@@ -266,6 +354,77 @@ class APITestCase(unittest.TestCase):
         self.assertEqual(current, 1255885531)
         self.assertEqual(expiry, 1258563931)
 
+        # The response is cached as it was sent, still compressed.
+        key, value, duration = self.cache.put.call_args[0]
+        self.assertEqual(value, compress(self.test_xml))
+
+    def test_scan_response(self):
+        for xml in (self.test_xml, self.error_xml, compress(self.test_xml),
+                    compress(self.error_xml)):
+            current, expires, error = evelink_api.scan_response(xml)
+            expected = evelink_api.parse_response(xml)[1:]
+            self.assertEqual((current, expires), expected[:2])
+            self.assertEqual(repr(error), repr(expected[2]))
+
+    def test_scan_response_fallback(self):
+        # cachedUntil is out of the scanned tail.
+        xml = self.test_xml.replace('</eveapi>', ' ' * 2000 + '</eveapi>')
+        self.assertEqual(evelink_api.scan_response(xml),
+                         (1255885531, 1258563931, None))
+        # An error element the scan can't make sense of.
+        xml = self.error_xml.replace('<error code="123">', '<error note="x" code="123">')
+        current, expires, error = evelink_api.scan_response(xml)
+        self.assertEqual((error.code, error.message), ('123', 'Test error message.'))
+
+    @mock.patch('urllib2.urlopen')
+    def test_get_raw(self, mock_urlopen):
+        mock_urlopen.return_value.read.return_value = compress(self.test_xml)
+        self.cache.get.return_value = None
+
+        response, current, expiry = self.api.get_raw('foo/Bar', {'a':[1,2,3]})
+        self.assertEqual(response, compress(self.test_xml))
+        self.assertEqual((current, expiry), (1255885531, 1258563931))
+        self.assertEqual(self.api.last_timestamps, {
+            'current_time': 1255885531,
+            'cached_until': 1258563931,
+        })
+        key, value, duration = self.cache.put.call_args[0]
+        self.assertEqual(value, response)
+        self.assertEqual(duration, 1258563931 - 1255885531)
+
+    @mock.patch('urllib2.urlopen')
+    def test_cached_get_raw_with_error(self, mock_urlopen):
+        self.cache.get.return_value = self.error_xml
+
+        self.assertRaises(evelink_api.APIError,
+            self.api.get_raw, 'foo/Bar', {'a':[1,2,3]})
+        self.assertFalse(mock_urlopen.called)
+        self.assertFalse(self.cache.put.called)
+        self.assertEqual(self.api.last_timestamps, {
+            'current_time': 1255885531,
+            'cached_until': 1258571131,
+        })
+
+    @mock.patch('urllib2.urlopen')
+    def test_prefetch(self, mock_urlopen):
+        mock_urlopen.return_value.read.return_value = self.test_xml
+        self.cache.get.return_value = None
+        limiter = mock.Mock()
+        self.api.rate_limiter = limiter
+
+        self.assertEqual(self.api.prefetch('foo/Bar', {'a': 1}),
+                         (False, len(self.test_xml), 1258563931))
+        self.assertTrue(self.cache.put.called)
+        limiter.acquire.assert_called_once_with()
+
+        # Cache hits don't wait for the rate limiter.
+        self.cache.get.return_value = self.test_xml
+        self.assertEqual(self.api.prefetch('foo/Bar', {'a': 1}),
+                         (True, len(self.test_xml), 1258563931))
+        self.assertEqual(mock_urlopen.call_count, 1)
+        self.assertEqual(limiter.acquire.call_count, 1)
+
+
 class AutoCallTestCase(unittest.TestCase):
 
     def test_python_func(self):
@@ -286,6 +445,14 @@ class AutoCallTestCase(unittest.TestCase):
             evelink_api.translate_args(args, mapping)
         )
 
+    def test_translate_args_local(self):
+        args = {'foo': 'bar', 'fields': ['id']}
+        mapping = {'foo': 'baz'}
+        self.assertEqual(
+            {'baz': 'bar'},
+            evelink_api.translate_args(args, mapping)
+        )
+
     def test_get_args_and_defaults(self):
         def target(a, b, c=None, d=None):
             pass
@@ -373,7 +540,9 @@ class AutoCallTestCase(unittest.TestCase):
                 ],
                 'defaults': dict(limit=None, before_kill=None),
                 'prop_to_param': tuple(),
-                'map_params': {}
+                'map_params': {},
+                'page_spec': None,
+                'batch_spec': None,
             },
             func._request_specs
             )
@@ -474,6 +643,228 @@ class AutoCallTestCase(unittest.TestCase):
         )
         self.assertFalse(client.get.called)
 
+    def test_compiled_wrapper(self):
+        repeat = mock.Mock()
+        client = mock.Mock(name='client')
+        client.char_id = 1
+        client.api = evelink_api.API(api_key=(123, 'abc'))
+        client.api.send_request = mock.Mock(return_value="""
+            <?xml version='1.0' encoding='UTF-8'?>
+            <eveapi version="2">
+                <currentTime>2009-10-18 17:05:31</currentTime>
+                <result><serverOpen>True</serverOpen></result>
+                <cachedUntil>2009-11-18 17:05:31</cachedUntil>
+            </eveapi>
+        """.strip())
+
+        @evelink_api.auto_call(
+            'foo/bar',
+            prop_to_param=('char_id',),
+            map_params={'char_id': 'characterID', 'ids': 'IDs', 'limit': 'rowCount'}
+        )
+        def func(self, ids, limit=None, fields=None, api_result=None):
+            repeat(self, ids, limit=limit, fields=fields, api_result=api_result)
+
+        specs = inspect.getargspec(func)
+        self.assertEqual(specs.args, ['client', 'ids', 'limit', 'fields'])
+        self.assertRaises(TypeError, func, client)
+        # 'api_result' is keyword-only, like in the generic wrapper.
+        self.assertRaises(TypeError, func, client, [4], 1, None, 'extra')
+        self.assertRaises(TypeError, func, client, [4], nope=1)
+        func(client, [4], api_result='given')
+        repeat.assert_called_once_with(client, [4], limit=None, fields=None,
+                                       api_result='given')
+        repeat.reset_mock()
+
+        func(client, [4, 5], fields=['id'])
+        api_result = repeat.call_args[1]['api_result']
+        self.assertEqual(api_result.result.find('serverOpen').text, 'True')
+        url, params = client.api.send_request.call_args[0]
+        self.assertEqual(urlparse.parse_qs(params), {
+            'characterID': ['1'], 'IDs': ['4,5'], 'keyID': ['123'], 'vCode': ['abc'],
+        })
+
+        # The cache key is the one 'get' would use.
+        client.api.get('foo/bar', {'characterID': 1, 'IDs': [4, 5]})
+        self.assertEqual(client.api.send_request.call_count, 1)
+
+    def test_compiled_wrapper_falls_back(self):
+        repeat = mock.Mock()
+        client = mock.Mock(name='client')
+        client.api = evelink_api.API(instrument=mock.Mock())
+        client.api.get = mock.Mock()
+
+        @evelink_api.auto_call('foo/bar', map_params={'char_id': 'id'})
+        def func(self, char_id, api_result=None):
+            repeat(self, char_id, api_result=api_result)
+
+        func(client, 1)
+        client.api.get.assert_called_once_with('foo/bar', params={'id': 1})
+        repeat.assert_called_once_with(client, 1, api_result=client.api.get.return_value)
+
+    def test_call_wrapped_method_batched(self):
+        client = mock.Mock(name='client')
+        client.api.get.side_effect = lambda path, params: evelink_api.APIResult(
+            params['IDs'], len(params['IDs']), 100 - len(params['IDs']))
+
+        @evelink_api.auto_call(
+            'foo/bar', map_params={'ids': 'IDs'},
+            batch_spec=evelink_api.BatchSpec('ids', 2),
+        )
+        def func(self, ids, api_result=None):
+            return evelink_api.APIResult(
+                dict((i, -i) for i in api_result.result),
+                api_result.timestamp,
+                api_result.expires,
+            )
+
+        result, current, expires = func(client, [5, 1, 4, 2, 3])
+        self.assertEqual(result, {1: -1, 2: -2, 3: -3, 4: -4, 5: -5})
+        self.assertEqual(current, 1)
+        self.assertEqual(expires, 98)
+        self.assertEqual(
+            sorted(c[2]['params']['IDs'] for c in client.api.get.mock_calls),
+            [[1, 2], [3, 4], [5]],
+        )
+
+    def test_call_wrapped_method_batch_fits(self):
+        client = mock.Mock(name='client')
+
+        @evelink_api.auto_call(
+            'foo/bar', map_params={'ids': 'IDs'},
+            batch_spec=evelink_api.BatchSpec('ids', 2),
+        )
+        def func(self, ids, api_result=None):
+            return api_result
+
+        self.assertEqual(func(client, [2, 1]), client.api.get.return_value)
+        client.api.get.assert_called_once_with('foo/bar', params={'IDs': [2, 1]})
+
+
+class BatchSpecTestCase(unittest.TestCase):
+
+    def test_chunks(self):
+        spec = evelink_api.BatchSpec('ids', 2)
+        self.assertEqual(spec.chunks([1, 2]), None)
+        self.assertEqual(spec.chunks('1,2,3'), None)
+        self.assertEqual(spec.chunks(set([3, 1, 2])), [[1, 2], [3]])
+
+    def test_merge_dicts(self):
+        spec = evelink_api.BatchSpec('ids', 2)
+        merged = spec.merge([
+            evelink_api.APIResult({1: 'a', 2: None}, 10, 20),
+            evelink_api.APIResult({3: 'c'}, 11, 19),
+        ])
+        self.assertEqual(merged, ({1: 'a', 2: None, 3: 'c'}, 10, 19))
+
+    def test_merge_lists(self):
+        spec = evelink_api.BatchSpec('ids', 2)
+        merged = spec.merge([
+            evelink_api.APIResult([1, 2], 10, 20),
+            evelink_api.APIResult([3], 10, 20),
+        ])
+        self.assertEqual(merged, ([1, 2, 3], 10, 20))
+
+
+class AutoPaginateTestCase(unittest.TestCase):
+
+    def setUp(self):
+        @evelink_api.auto_paginate
+        class Client(object):
+            def __init__(self, pages):
+                self.pages = pages
+                self.calls = []
+
+            @evelink_api.auto_call('foo/Log', map_params={'before': 'fromID'},
+                page_spec=evelink_api.PageSpec('before', ts_key='ts'))
+            def log(self, before=None, api_result=None):
+                pass
+
+            def fake_log(self, before=None):
+                self.calls.append(before)
+                rows = self.pages.get(before, [])
+                return evelink_api.APIResult(rows, 12345, 67890)
+
+        self.Client = Client
+
+    def make_client(self, pages):
+        client = self.Client(pages)
+        client.log = client.fake_log
+        return client
+
+    def make_rows(self, *ids):
+        return [{'id': i, 'ts': i * 10} for i in ids]
+
+    def test_adds_iter_method(self):
+        self.assertTrue(hasattr(self.Client, 'iter_log'))
+        self.assertEqual(self.Client.iter_log.__name__, 'iter_log')
+
+    def test_iter_all_pages(self):
+        client = self.make_client({
+            None: self.make_rows(8, 9, 7),
+            7: self.make_rows(6, 5),
+            5: [],
+        })
+        rows = list(client.iter_log())
+        self.assertEqual([r['id'] for r in rows], [9, 8, 7, 6, 5])
+        self.assertEqual(client.calls, [None, 7, 5])
+
+    def test_iter_dict_pages(self):
+        rows = dict((r['id'], r) for r in self.make_rows(3, 2))
+        client = self.make_client({None: rows})
+        self.assertEqual([r['id'] for r in client.iter_log()], [3, 2])
+
+    def test_iter_stop_id(self):
+        client = self.make_client({
+            None: self.make_rows(9, 8, 7),
+            7: self.make_rows(6, 5),
+            5: self.make_rows(4),
+        })
+        rows = list(client.iter_log(stop_id=5))
+        self.assertEqual([r['id'] for r in rows], [9, 8, 7, 6])
+        self.assertEqual(client.calls, [None, 7])
+
+    def test_iter_stop_ts(self):
+        client = self.make_client({
+            None: self.make_rows(9, 8, 7),
+            7: self.make_rows(6, 5),
+        })
+        rows = list(client.iter_log(stop_ts=75, prefetch=False))
+        self.assertEqual([r['id'] for r in rows], [9, 8])
+        self.assertEqual(client.calls, [None])
+
+    def test_iter_from_cursor(self):
+        client = self.make_client({
+            7: self.make_rows(6, 5),
+        })
+        rows = list(client.iter_log(before=7))
+        self.assertEqual([r['id'] for r in rows], [6, 5])
+        self.assertEqual(client.calls, [7, 5])
+
+    def test_iter_no_progress(self):
+        client = self.make_client({
+            None: self.make_rows(9, 8),
+            8: self.make_rows(9, 8),
+        })
+        rows = list(client.iter_log())
+        self.assertEqual([r['id'] for r in rows], [9, 8])
+        self.assertEqual(client.calls, [None, 8])
+
+    def test_iter_prefetch_error(self):
+        client = self.make_client({None: self.make_rows(9, 8)})
+        def log(before=None):
+            if before is not None:
+                raise evelink_api.APIError('123', 'Boom')
+            return client.fake_log(before)
+        client.log = log
+
+        rows = client.iter_log()
+        # The error from the prefetched page only surfaces once the
+        # rows of the current page have been consumed.
+        self.assertEqual(next(rows)['id'], 9)
+        self.assertEqual(next(rows)['id'], 8)
+        self.assertRaises(evelink_api.APIError, next, rows)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -39,7 +39,7 @@ class CharTestCase(APITestCase):
         result, current, expires = self.char.contract_bids()
         self.assertEqual(result, mock.sentinel.parsed_contract_bids)
         self.assertEqual(mock_parse.mock_calls, [
-                mock.call(mock.sentinel.api_result),
+                mock.call(mock.sentinel.api_result, fields=None, lazy=False),
             ])
         self.assertEqual(self.api.mock_calls, [
                 mock.call.get('char/ContractBids', params={'characterID': 1}),
@@ -71,7 +71,7 @@ class CharTestCase(APITestCase):
         result, current, expires = self.char.contracts()
         self.assertEqual(result, mock.sentinel.parsed_contracts)
         self.assertEqual(mock_parse.mock_calls, [
-                mock.call(mock.sentinel.api_result),
+                mock.call(mock.sentinel.api_result, fields=None, lazy=False),
             ])
         self.assertEqual(self.api.mock_calls, [
                 mock.call.get('char/Contracts', params={'characterID': 1}),
@@ -87,7 +87,7 @@ class CharTestCase(APITestCase):
         result, current, expires = self.char.wallet_journal()
         self.assertEqual(result, mock.sentinel.parsed_journal)
         self.assertEqual(mock_parse.mock_calls, [
-                mock.call(mock.sentinel.api_result),
+                mock.call(mock.sentinel.api_result, fields=None, lazy=False),
             ])
         self.assertEqual(self.api.mock_calls, [
                 mock.call.get('char/WalletJournal', params={'characterID': 1}),
@@ -111,6 +111,53 @@ class CharTestCase(APITestCase):
                 mock.call.get('char/WalletJournal', params={'characterID': 1, 'rowCount': 100}),
             ])
 
+    def test_iter_wallet_journal(self):
+        self.api.get.side_effect = [
+            self.make_api_result("char/wallet_journal.xml"),
+            self.make_api_result("char/wallet_journal_paged.xml"),
+            self.make_api_result("char/wallet_journal_empty.xml"),
+        ]
+
+        ids = [r['id'] for r in self.char.iter_wallet_journal(limit=5)]
+        self.assertEqual(ids, [3605306236, 3605305292, 3605303380, 3605302609, 3605301231,
+                               3605300117, 3605298804])
+        self.assertEqual(self.api.mock_calls, [
+                mock.call.get('char/WalletJournal', params={'characterID': 1, 'rowCount': 5}),
+                mock.call.get('char/WalletJournal', params={'characterID': 1, 'rowCount': 5, 'fromID': 3605301231}),
+                mock.call.get('char/WalletJournal', params={'characterID': 1, 'rowCount': 5, 'fromID': 3605298804}),
+            ])
+
+    def test_wallet_journal_fields(self):
+        self.api.get.return_value = self.make_api_result("char/wallet_journal.xml")
+
+        result, _, _ = self.char.wallet_journal(fields=['party_2.id', 'amount'])
+        self.assertEqual(result[0], {
+            'id': 3605301231,
+            'party_2': {'id': 1000132},
+            'amount': -10000.0,
+        })
+        self.assertEqual(self.api.mock_calls, [
+                mock.call.get('char/WalletJournal', params={'characterID': 1}),
+            ])
+
+    def test_iter_wallet_journal_fields(self):
+        self.api.get.return_value = self.make_api_result("char/wallet_journal.xml")
+
+        rows = list(self.char.iter_wallet_journal(stop_id=3605303380, fields=['amount']))
+        self.assertEqual(rows, [
+            {'id': 3605306236, 'timestamp': 1291962720, 'amount': -10000.0},
+            {'id': 3605305292, 'timestamp': 1291962720, 'amount': -10000.0},
+        ])
+
+    def test_iter_wallet_journal_stop_id(self):
+        self.api.get.return_value = self.make_api_result("char/wallet_journal.xml")
+
+        ids = [r['id'] for r in self.char.iter_wallet_journal(stop_id=3605303380)]
+        self.assertEqual(ids, [3605306236, 3605305292])
+        self.assertEqual(self.api.mock_calls, [
+                mock.call.get('char/WalletJournal', params={'characterID': 1}),
+            ])
+
     def test_wallet_info(self):
         self.api.get.return_value = self.make_api_result("char/wallet_info.xml")
 
@@ -149,7 +196,7 @@ class CharTestCase(APITestCase):
         result, current, expires = self.char.wallet_transactions()
         self.assertEqual(result, mock.sentinel.parsed_transactions)
         self.assertEqual(mock_parse.mock_calls, [
-                mock.call(mock.sentinel.api_result),
+                mock.call(mock.sentinel.api_result, fields=None, lazy=False),
             ])
         self.assertEqual(self.api.mock_calls, [
                 mock.call.get('char/WalletTransactions', params={'characterID': 1}),
@@ -187,7 +234,7 @@ class CharTestCase(APITestCase):
                 mock.call.get('char/IndustryJobs', params={'characterID': 1}),
             ])
         self.assertEqual(mock_parse.mock_calls, [
-                mock.call(mock.sentinel.api_result),
+                mock.call(mock.sentinel.api_result, fields=None, lazy=False),
             ])
 
     @mock.patch('evelink.char.parse_kills')
@@ -204,7 +251,7 @@ class CharTestCase(APITestCase):
                 mock.call.get('char/KillLog', params={'characterID': 1}),
             ])
         self.assertEqual(mock_parse.mock_calls, [
-                mock.call(mock.sentinel.api_result),
+                mock.call(mock.sentinel.api_result, fields=None, lazy=False),
             ])
 
     def test_kills_paged(self):
@@ -305,7 +352,7 @@ class CharTestCase(APITestCase):
         result, current, expires = self.char.orders()
         self.assertEqual(result, mock.sentinel.parsed_orders)
         self.assertEqual(mock_parse.mock_calls, [
-                mock.call(mock.sentinel.api_result),
+                mock.call(mock.sentinel.api_result, fields=None, lazy=False),
             ])
         self.assertEqual(self.api.mock_calls, [
                 mock.call.get('char/MarketOrders', params={'characterID': 1}),
@@ -535,6 +582,30 @@ class CharTestCase(APITestCase):
                 }),
             ])
 
+    def test_message_bodies_batched(self):
+        def fake_get(path, params):
+            if 297023723 in params['ids']:
+                return self.make_api_result("char/message_bodies.xml")
+            return self.make_api_result("char/message_bodies_batch.xml")
+        self.api.get.side_effect = fake_get
+
+        message_ids = [297023723, 297023208, 297023210, 297023211] + range(1, 101)
+        result, current, expires = self.char.message_bodies(message_ids)
+
+        expected = dict((i, None) for i in range(3, 101))
+        expected.update({
+                1: '<p>First message</p>',
+                2: 'Second message',
+                297023208: '<p>Another message</p>',
+                297023210: None,
+                297023211: None,
+                297023723: 'Hi.<br><br>This is a message.<br><br>',
+            })
+        self.assertEqual(result, expected)
+        self.assertEqual(len(self.api.mock_calls), 2)
+        self.assertEqual(current, 12345)
+        self.assertEqual(expires, 67890)
+
     def test_mailing_lists(self):
         self.api.get.return_value = self.make_api_result("char/mailing_lists.xml")
 
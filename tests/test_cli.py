@@ -0,0 +1,184 @@
+import imp
+import json
+import os
+import shutil
+from ConfigParser import RawConfigParser
+from StringIO import StringIO
+import sys
+import tempfile
+import threading
+
+import mock
+import unittest2 as unittest
+
+import evelink.api as evelink_api
+
+
+def load_cli():
+    """bin/evelink, imported as a module."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bin', 'evelink')
+    dont_write_bytecode = sys.dont_write_bytecode
+    sys.dont_write_bytecode = True
+    try:
+        return imp.load_source('evelink_cli', path)
+    finally:
+        sys.dont_write_bytecode = dont_write_bytecode
+
+cli = load_cli()
+
+
+RESPONSE = """<?xml version='1.0' encoding='UTF-8'?>
+<eveapi version="2">
+    <currentTime>2009-10-18 17:05:31</currentTime>
+    <result>
+        <serverOpen>True</serverOpen>
+        <onlinePlayers>38102</onlinePlayers>
+    </result>
+    <cachedUntil>2009-10-18 17:08:31</cachedUntil>
+</eveapi>"""
+
+ERROR = """<?xml version='1.0' encoding='UTF-8'?>
+<eveapi version="2">
+    <currentTime>2009-10-18 17:05:31</currentTime>
+    <error code="203">Authentication failure.</error>
+    <cachedUntil>2009-10-18 18:05:31</cachedUntil>
+</eveapi>"""
+
+
+class ParseBatchLineTestCase(unittest.TestCase):
+
+    def test_parse(self):
+        self.assertEqual(cli.parse_batch_line('server.Server.server_status'),
+                         (None, ['server.Server.server_status']))
+        self.assertEqual(cli.parse_batch_line('-k 1:abc char.Char.wallet_info 90 "a b"'),
+                         ((1, 'abc'), ['char.Char.wallet_info', '90', 'a b']))
+        self.assertEqual(cli.parse_batch_line('eve/CharacterName --key=2:def ids=1,2'),
+                         ((2, 'def'), ['eve/CharacterName', 'ids=1,2']))
+
+    def test_invalid(self):
+        for line in ('-k 1:abc', '-k', '-k abc eve/CharacterName',
+                     '--key=x:abc eve/CharacterName', ''):
+            self.assertRaises(cli.CallError, cli.parse_batch_line, line)
+
+
+@mock.patch.object(evelink_api.API, 'send_request')
+class RunBatchTestCase(unittest.TestCase):
+
+    def run_batch(self, lines, api_key=None):
+        api = evelink_api.API(cache=evelink_api.APICache(), api_key=api_key)
+        out = StringIO()
+        with mock.patch('sys.stdout', out):
+            succeeded = cli.run_batch(api, StringIO('\n'.join(lines)), RawConfigParser(), 2)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        return succeeded, dict((record['line'], record) for record in records)
+
+    def test_statuses(self, mock_send):
+        mock_send.side_effect = lambda path, params: ERROR if 'Account' in path else RESPONSE
+        succeeded, records = self.run_batch([
+            'server.Server.server_status',
+            '# A comment, skipped',
+            'server/ServerStatus',
+            '',
+            'account.Account.status',
+            'server.Server.nope',
+            'nope',
+        ], api_key=(1, 'abc'))
+
+        self.assertFalse(succeeded)
+        self.assertEqual(sorted(records), [1, 3, 5, 6, 7])
+        self.assertEqual([records[n]['status'] for n in sorted(records)],
+                         ['ok', 'ok', 'api_error', 'invalid', 'invalid'])
+        self.assertEqual(records[1]['result'], {'online': True, 'players': 38102})
+        self.assertEqual(records[1]['call'], 'server.Server.server_status')
+        self.assertIn('<serverOpen>True</serverOpen>', records[3]['result'])
+        self.assertEqual(records[5]['error'],
+                         {'code': '203', 'message': 'Authentication failure.'})
+
+    def test_key_override(self, mock_send):
+        mock_send.return_value = RESPONSE
+        succeeded, records = self.run_batch([
+            'server/ServerStatus',
+            '-k 2:def server/ServerStatus',
+        ], api_key=(1, 'abc'))
+
+        self.assertTrue(succeeded)
+        keys = sorted(params for _, params in (c[0] for c in mock_send.call_args_list))
+        self.assertEqual(len(keys), 2)
+        self.assertIn('keyID=1', keys[0])
+        self.assertIn('keyID=2', keys[1])
+
+    def test_exit_status(self, mock_send):
+        mock_send.side_effect = lambda path, params: ERROR if 'Account' in path else RESPONSE
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        batch_path = os.path.join(tmp_dir, 'batch')
+
+        def main(*lines):
+            with open(batch_path, 'w') as f:
+                f.write('\n'.join(lines))
+            argv = ['evelink', '-k', '1:abc', '-c', os.path.join(tmp_dir, 'cache'),
+                    '-r', os.path.join(tmp_dir, 'rc'), '--batch', batch_path]
+            with mock.patch('sys.argv', argv):
+                with mock.patch('sys.stdout', StringIO()):
+                    with self.assertRaises(SystemExit) as cm:
+                        cli.main()
+            return cm.exception.code
+
+        self.assertEqual(main('server/ServerStatus', 'server.Server.server_status'), 0)
+        self.assertEqual(main('server/ServerStatus', 'account.Account.status'), 1)
+
+
+@mock.patch.object(evelink_api.API, 'send_request')
+class ForwardTestCase(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.socket_path = os.path.join(tmp_dir, 'sock')
+
+    def serve(self, cache_path):
+        server = cli.make_local_server(evelink_api.APICache(), cache_path,
+                                       self.socket_path, 'api.example.com')
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(thread.join)
+        self.addCleanup(server.shutdown)
+
+    def request(self, args, **request):
+        request.update(args=args, cache_path='/cache')
+        request.setdefault('api_key', [1, 'abc'])
+        return cli.forward_call(self.socket_path, request)
+
+    def test_no_daemon(self, mock_send):
+        self.assertEqual(self.request(['server/ServerStatus']), None)
+
+    def test_forward(self, mock_send):
+        mock_send.return_value = RESPONSE
+        self.serve('/cache')
+
+        response = self.request(['server.Server.server_status'], output='json')
+        self.assertEqual(response['status'], 0)
+        self.assertEqual(json.loads(response['stdout'])['result'],
+                         {'online': True, 'players': 38102})
+        self.assertEqual(response['stderr'], '')
+        url, params = mock_send.call_args[0]
+        self.assertIn('api.example.com/server/ServerStatus', url)
+        self.assertIn('keyID=1', params)
+
+        # Served from the daemon's cache.
+        self.assertEqual(self.request(['server.Server.server_status'])['status'], 0)
+        self.assertEqual(mock_send.call_count, 1)
+
+        response = self.request(['nope'])
+        self.assertEqual(response['status'], 1)
+        self.assertIn('must be either a URL path', response['stderr'])
+
+    def test_other_cache(self, mock_send):
+        self.serve('/other/cache')
+        self.assertEqual(self.request(['server/ServerStatus']), None)
+        self.assertFalse(mock_send.called)
+
+
+if __name__ == "__main__":
+    unittest.main()
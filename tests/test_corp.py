@@ -101,7 +101,7 @@ class CorpTestCase(APITestCase):
                 mock.call.get('corp/IndustryJobs', params={}),
             ])
         self.assertEqual(mock_parse.mock_calls, [
-                mock.call(mock.sentinel.api_result),
+                mock.call(mock.sentinel.api_result, fields=None, lazy=False),
             ])
         self.assertEqual(current, 12345)
         self.assertEqual(expires, 67890)
@@ -152,11 +152,48 @@ class CorpTestCase(APITestCase):
                 mock.call.get('corp/KillLog', params={}),
             ])
         self.assertEqual(mock_parse.mock_calls, [
-                mock.call(mock.sentinel.api_result),
+                mock.call(mock.sentinel.api_result, fields=None, lazy=False),
             ])
         self.assertEqual(current, 12345)
         self.assertEqual(expires, 67890)
 
+    def test_iter_kills(self):
+        self.api.get.side_effect = [
+            self.make_api_result("char/kills.xml"),
+            self.make_api_result("char/kills_paged.xml"),
+        ]
+
+        kills = list(self.corp.iter_kills())
+        self.assertEqual([k['id'] for k in kills], [15640551, 15640545])
+        self.assertEqual(self.api.mock_calls, [
+                mock.call.get('corp/KillLog', params={}),
+                mock.call.get('corp/KillLog', params={'beforeKillID': 15640545}),
+            ])
+
+    def test_iter_wallet_journal(self):
+        self.api.get.side_effect = [
+            self.make_api_result("corp/wallet_journal.xml"),
+            self.make_api_result("corp/wallet_journal_paged.xml"),
+            self.make_api_result("char/wallet_journal_empty.xml"),
+        ]
+
+        ids = [r['id'] for r in self.corp.iter_wallet_journal()]
+        self.assertEqual(ids, [6422968336, 6421966585, 6421767712, 6421501968])
+        self.assertEqual(self.api.mock_calls, [
+                mock.call.get('corp/WalletJournal', params={}),
+                mock.call.get('corp/WalletJournal', params={'fromID': 6421767712}),
+                mock.call.get('corp/WalletJournal', params={'fromID': 6421501968}),
+            ])
+
+    def test_iter_kills_stop_ts(self):
+        self.api.get.return_value = self.make_api_result("char/kills.xml")
+
+        kills = list(self.corp.iter_kills(stop_ts=1290612500))
+        self.assertEqual([k['id'] for k in kills], [15640551])
+        self.assertEqual(self.api.mock_calls, [
+                mock.call.get('corp/KillLog', params={}),
+            ])
+
     @mock.patch('evelink.corp.parse_contract_bids')
     def test_contract_bids(self, mock_parse):
         self.api.get.return_value = API_RESULT_SENTINEL
@@ -165,7 +202,7 @@ class CorpTestCase(APITestCase):
         result, current, expires = self.corp.contract_bids()
         self.assertEqual(result, mock.sentinel.parsed_contract_bids)
         self.assertEqual(mock_parse.mock_calls, [
-                mock.call(mock.sentinel.api_result),
+                mock.call(mock.sentinel.api_result, fields=None, lazy=False),
             ])
         self.assertEqual(self.api.mock_calls, [
                 mock.call.get('corp/ContractBids', params={}),
@@ -197,7 +234,7 @@ class CorpTestCase(APITestCase):
         result, current, expires = self.corp.contracts()
         self.assertEqual(result, mock.sentinel.parsed_contracts)
         self.assertEqual(mock_parse.mock_calls, [
-                mock.call(mock.sentinel.api_result),
+                mock.call(mock.sentinel.api_result, fields=None, lazy=False),
             ])
         self.assertEqual(self.api.mock_calls, [
                 mock.call.get('corp/Contracts', params={}),
@@ -249,7 +286,7 @@ class CorpTestCase(APITestCase):
         result, current, expires = self.corp.wallet_journal()
         self.assertEqual(result, mock.sentinel.parsed_journal)
         self.assertEqual(mock_parse.mock_calls, [
-                mock.call(mock.sentinel.api_result),
+                mock.call(mock.sentinel.api_result, fields=None, lazy=False),
             ])
         self.assertEqual(self.api.mock_calls, [
                 mock.call.get('corp/WalletJournal', params={}),
@@ -281,7 +318,7 @@ class CorpTestCase(APITestCase):
         result, current, expires = self.corp.wallet_transactions()
         self.assertEqual(result, mock.sentinel.parsed_transactions)
         self.assertEqual(mock_parse.mock_calls, [
-                mock.call(mock.sentinel.api_result),
+                mock.call(mock.sentinel.api_result, fields=None, lazy=False),
             ])
         self.assertEqual(self.api.mock_calls, [
                 mock.call.get('corp/WalletTransactions', params={}),
@@ -313,7 +350,7 @@ class CorpTestCase(APITestCase):
         result, current, expires = self.corp.orders()
         self.assertEqual(result, mock.sentinel.parsed_orders)
         self.assertEqual(mock_parse.mock_calls, [
-                mock.call(mock.sentinel.api_result),
+                mock.call(mock.sentinel.api_result, fields=None, lazy=False),
             ])
         self.assertEqual(self.api.mock_calls, [
                 mock.call.get('corp/MarketOrders', params={}),
@@ -529,6 +566,24 @@ class CorpTestCase(APITestCase):
         self.assertEqual(current, 12345)
         self.assertEqual(expires, 67890)
 
+    def test_members_fields(self):
+        self.api.get.return_value = self.make_api_result("corp/members.xml")
+
+        result, _, _ = self.corp.members(fields=['name', 'ship_type'])
+        self.assertEqual(result, {
+                150336922: {
+                    'name': 'corpexport',
+                    'ship_type': {'id': 606, 'name': 'Velator'},
+                },
+                150337897: {
+                    'name': 'corpslave',
+                    'ship_type': {'id': 670, 'name': 'Capsule'},
+                },
+            })
+        self.assertEqual(self.api.mock_calls, [
+                mock.call.get('corp/MemberTracking', params={'extended': 1}),
+            ])
+
     def test_members_not_extended(self):
         self.api.get.return_value = self.make_api_result("corp/members.xml")
         result, current, expires = self.corp.members(extended=False)
@@ -1,7 +1,9 @@
+from xml.etree import ElementTree
 import unittest2 as unittest
 
 import mock
 
+import evelink.api as evelink_api
 import evelink.eve as evelink_eve
 from tests.utils import APITestCase
 
@@ -61,6 +63,26 @@ class EVETestCase(APITestCase):
         self.assertEqual(current, 12345)
         self.assertEqual(expires, 67890)
 
+    def test_character_names_from_ids_batched(self):
+        def fake_get(path, params):
+            rows = ''.join('<row characterID="%d" name="Char %d" />' % (i, i)
+                           for i in params['IDs'])
+            result = ElementTree.fromstring('<result><rowset>%s</rowset></result>' % rows)
+            return evelink_api.APIResult(result, 12345, 67890)
+        self.api.get.side_effect = fake_get
+
+        result, current, expires = self.eve.character_names_from_ids(range(1, 602))
+
+        self.assertEqual(len(result), 601)
+        self.assertEqual(result[1], "Char 1")
+        self.assertEqual(result[601], "Char 601")
+        self.assertEqual(
+            sorted(len(c[2]['params']['IDs']) for c in self.api.mock_calls),
+            [101, 250, 250],
+        )
+        self.assertEqual(current, 12345)
+        self.assertEqual(expires, 67890)
+
     def test_character_name_from_id(self):
         self.api.get.return_value = self.make_api_result("eve/character_name_single.xml")
 
@@ -147,6 +169,16 @@ class EVETestCase(APITestCase):
         self.assertEqual(current, 12345)
         self.assertEqual(expires, 67890)
 
+    def test_alliances_lazy(self):
+        self.api.get.return_value = self.make_api_result("eve/alliances.xml")
+
+        result, _, _ = self.eve.alliances(lazy=True)
+        self.assertEqual(result[1]['ticker'], 'TEST')
+        self.assertEqual(result[1]['member_corps'][2], {'id': 2, 'timestamp': 1289250660})
+        self.assertEqual(self.api.mock_calls, [
+                mock.call.get('eve/AllianceList', params={}),
+            ])
+
     def test_errors(self):
         self.api.get.return_value = self.make_api_result("eve/errors.xml")
 
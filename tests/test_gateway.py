@@ -0,0 +1,177 @@
+import gzip
+from StringIO import StringIO
+import threading
+import time
+import urlparse
+from wsgiref import util as wsgiref_util
+
+import mock
+import unittest2 as unittest
+
+import evelink.api as evelink_api
+import evelink.gateway as evelink_gateway
+
+
+RESPONSE = """<?xml version='1.0' encoding='UTF-8'?>
+<eveapi version="2">
+    <currentTime>2009-10-18 17:05:31</currentTime>
+    <result>
+        <serverOpen>True</serverOpen>
+    </result>
+    <cachedUntil>2009-10-18 17:08:31</cachedUntil>
+</eveapi>"""
+
+ERROR = """<?xml version='1.0' encoding='UTF-8'?>
+<eveapi version="2">
+    <currentTime>2009-10-18 17:05:31</currentTime>
+    <error code="203">Authentication failure.</error>
+    <cachedUntil>2009-10-18 18:05:31</cachedUntil>
+</eveapi>"""
+
+
+def compress(s):
+    out = StringIO()
+    f = gzip.GzipFile(fileobj=out, mode='w')
+    f.write(s)
+    f.close()
+    return out.getvalue()
+
+
+class GatewayTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.api = evelink_api.API()
+        self.api.send_request = mock.Mock(return_value=RESPONSE)
+        self.gateway = evelink_gateway.Gateway(api=self.api)
+
+    def request(self, path, query='', body=None, **environ):
+        environ.update(PATH_INFO=path, QUERY_STRING=query)
+        if body is not None:
+            environ.update(REQUEST_METHOD='POST', CONTENT_LENGTH=str(len(body)))
+            environ['wsgi.input'] = StringIO(body)
+        wsgiref_util.setup_testing_defaults(environ)
+        start_response = mock.Mock()
+        body = ''.join(self.gateway(environ, start_response))
+        status, headers = start_response.call_args[0]
+        return status, dict(headers), body
+
+    def test_get(self):
+        status, headers, body = self.request('/server/ServerStatus.xml.aspx')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(body, RESPONSE)
+        self.assertEqual(headers['Content-Length'], str(len(RESPONSE)))
+        self.assertEqual(self.api.send_request.mock_calls, [
+            mock.call('https://api.eveonline.com/server/ServerStatus.xml.aspx', ''),
+        ])
+
+    def test_cached(self):
+        self.request('/account/Characters.xml.aspx', body='keyID=1&vCode=abc')
+        status, headers, body = self.request('/account/Characters.xml.aspx',
+                                             query='vCode=abc', body='keyID=1')
+        self.assertEqual(body, RESPONSE)
+        self.assertEqual(self.api.send_request.call_count, 1)
+
+        # Other keys are not served from the same cache entry.
+        self.request('/account/Characters.xml.aspx', body='keyID=2&vCode=abc')
+        self.assertEqual(self.api.send_request.call_count, 2)
+
+    def test_error(self):
+        self.api.send_request.return_value = ERROR
+        status, headers, body = self.request('/account/Characters.xml.aspx')
+        self.assertEqual(status, '400 Bad Request')
+
+        tree, current, expires, error = evelink_api.parse_response(body)
+        self.assertEqual((error.code, error.message), ('203', 'Authentication failure.'))
+        self.assertEqual((current, expires), (1255885531, 1255889131))
+
+    def test_compressed(self):
+        self.api.send_request.return_value = compress(RESPONSE)
+        status, headers, body = self.request('/server/ServerStatus.xml.aspx',
+                                             HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(body, compress(RESPONSE))
+
+        # Decompressed for clients which don't accept gzip.
+        status, headers, body = self.request('/server/ServerStatus.xml.aspx')
+        self.assertFalse('Content-Encoding' in headers)
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(body, RESPONSE)
+
+    def test_key_not_logged(self):
+        with mock.patch('evelink.api._log') as mock_log:
+            self.request('/account/Characters.xml.aspx', query='keyID=1&vCode=secret')
+        params = urlparse.parse_qs(self.api.send_request.call_args[0][1])
+        self.assertEqual(params['vCode'], ['secret'])
+        self.assertTrue(mock_log.debug.called)
+        self.assertFalse('secret' in str(mock_log.mock_calls))
+
+    def test_not_found(self):
+        status, headers, body = self.request('/server/ServerStatus')
+        self.assertEqual(status, '404 Not Found')
+        self.assertFalse(self.api.send_request.called)
+
+    def test_bad_gateway(self):
+        self.api.send_request.side_effect = IOError("Connection refused")
+        status, headers, body = self.request('/server/ServerStatus.xml.aspx')
+        self.assertEqual(status, '502 Bad Gateway')
+
+    def test_coalesce(self):
+        # Nothing is cached, so only coalescing prevents extra fetches.
+        self.api.cache = mock.Mock(spec=evelink_api.APICache)
+        self.api.cache.get.return_value = None
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_request(full_path, params):
+            started.set()
+            release.wait()
+            return RESPONSE
+        self.api.send_request.side_effect = slow_request
+
+        results = []
+        def fetch():
+            results.append(self.gateway.get('server/ServerStatus', {}))
+        threads = [threading.Thread(target=fetch) for _ in range(5)]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [('200 OK', RESPONSE)] * 5)
+        self.assertEqual(self.api.send_request.call_count, 1)
+        self.assertEqual(self.gateway.calls, {})
+
+
+class GatewayServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        upstream = evelink_api.API()
+        upstream.send_request = mock.Mock(return_value=RESPONSE)
+        self.server = evelink_gateway.make_server(
+            evelink_gateway.Gateway(api=upstream), port=0)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+        self._has_requests = evelink_api._has_requests
+        evelink_api._has_requests = False
+
+    def tearDown(self):
+        evelink_api._has_requests = self._has_requests
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_client(self):
+        api = evelink_api.API(base_url='http://127.0.0.1:%d' % self.server.server_port)
+        result = api.get('server/ServerStatus')
+        self.assertEqual(result.result.findtext('serverOpen'), 'True')
+        self.assertEqual((result.timestamp, result.expires), (1255885531, 1255885711))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+import gzip
+import socket
+from StringIO import StringIO
+
+import mock
+import unittest2 as unittest
+
+import evelink.api as evelink_api
+import evelink.instrumentation as evelink_instrumentation
+from evelink.cache.sqlite import SqliteCache
+from evelink.eve import EVE
+from evelink.server import Server
+
+
+RESPONSE = """<?xml version='1.0' encoding='UTF-8'?>
+<eveapi version="2">
+    <currentTime>2009-10-18 17:05:31</currentTime>
+    <result>
+        <serverOpen>True</serverOpen>
+        <onlinePlayers>38102</onlinePlayers>
+    </result>
+    <cachedUntil>2009-10-18 17:08:31</cachedUntil>
+</eveapi>"""
+
+NAMES = """<?xml version='1.0' encoding='UTF-8'?>
+<eveapi version="2">
+    <currentTime>2009-10-18 17:05:31</currentTime>
+    <result>
+        <rowset name="characters" key="characterID" columns="name,characterID" />
+    </result>
+    <cachedUntil>2009-10-18 17:08:31</cachedUntil>
+</eveapi>"""
+
+ERROR = """<?xml version='1.0' encoding='UTF-8'?>
+<eveapi version="2">
+    <currentTime>2009-10-18 17:05:31</currentTime>
+    <error code="203">Authentication failure.</error>
+    <cachedUntil>2009-10-18 18:05:31</cachedUntil>
+</eveapi>"""
+
+
+def compress(s):
+    out = StringIO()
+    f = gzip.GzipFile(fileobj=out, mode='w')
+    f.write(s)
+    f.close()
+    return out.getvalue()
+
+
+class InstrumentedAPITestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = evelink_instrumentation.Aggregator()
+        self.api = evelink_api.API(instrument=self.stats)
+        self.api.send_request = mock.Mock(return_value=RESPONSE)
+
+    def test_get(self):
+        self.api.get('server/ServerStatus')
+        self.api.get('server/ServerStatus')
+
+        summary = self.stats.summary()
+        self.assertEqual(summary['counts'], {
+            ('cache_miss', 'server/ServerStatus'): 1,
+            ('cache_hit', 'server/ServerStatus'): 1,
+        })
+        timings = summary['timings']
+        self.assertEqual(timings[('cache_get', 'server/ServerStatus')]['count'], 2)
+        self.assertEqual(timings[('parse', 'server/ServerStatus')]['count'], 2)
+        self.assertEqual(timings[('fetch', 'server/ServerStatus')]['count'], 1)
+        self.assertEqual(timings[('cache_put', 'server/ServerStatus')]['count'], 1)
+        self.assertEqual(summary['sizes'], {('response', 'server/ServerStatus'): {
+            'count': 1, 'sum': len(RESPONSE), 'min': len(RESPONSE), 'max': len(RESPONSE),
+        }})
+
+    def test_compressed(self):
+        self.api.send_request.return_value = compress(RESPONSE)
+        self.api.get('server/ServerStatus')
+
+        summary = self.stats.summary()
+        self.assertEqual(summary['timings'][('decompress', 'server/ServerStatus')]['count'], 1)
+        self.assertEqual(summary['sizes'][('decompressed', 'server/ServerStatus')]['sum'],
+                         len(RESPONSE))
+        self.assertEqual(summary['sizes'][('response', 'server/ServerStatus')]['sum'],
+                         len(compress(RESPONSE)))
+
+    def test_error(self):
+        self.api.send_request.return_value = ERROR
+        self.assertRaises(evelink_api.APIError, self.api.get, 'account/Characters')
+        self.assertRaises(evelink_api.APIError, self.api.get_raw, 'account/Characters')
+        self.assertEqual(self.stats.counts[('error.203', 'account/Characters')], 2)
+
+    def test_method(self):
+        server = Server(api=self.api)
+        self.assertEqual(server.server_status().result['players'], 38102)
+        self.assertEqual(self.stats.timings[('method', 'server/ServerStatus')][0], 1)
+
+    def test_method_batched(self):
+        self.api.send_request.return_value = NAMES
+        EVE(api=self.api).character_names_from_ids(range(300))
+        # Each chunk's call of the method is timed.
+        self.assertEqual(self.stats.timings[('method', 'eve/CharacterName')][0], 2)
+
+    def test_stale(self):
+        self.api.cache.put('key', RESPONSE, -1)
+        self.assertEqual(self.api.cache.get('key'), None)
+        self.assertEqual(self.stats.counts, {('cache_stale', None): 1})
+
+    def test_stale_sqlite(self):
+        api = evelink_api.API(cache=SqliteCache(':memory:'), instrument=self.stats)
+        api.cache.put('key', RESPONSE, -1)
+        self.assertEqual(api.cache.get('key'), None)
+        self.assertEqual(self.stats.counts, {('cache_stale', None): 1})
+
+    def test_cache_keeps_its_instrument(self):
+        other = evelink_instrumentation.Aggregator()
+        api = evelink_api.API(cache=self.api.cache, instrument=other)
+        self.assertTrue(api.cache.instrument is self.stats)
+
+
+class AggregatorTestCase(unittest.TestCase):
+
+    def test_summary(self):
+        stats = evelink_instrumentation.Aggregator()
+        stats.timing('fetch', 'a/B', 0.5)
+        stats.timing('fetch', 'a/B', 0.25)
+        stats.count('cache_hit', 'a/B')
+        self.assertEqual(stats.summary(), {
+            'timings': {('fetch', 'a/B'): {'count': 2, 'sum': 0.75, 'min': 0.25, 'max': 0.5}},
+            'sizes': {},
+            'counts': {('cache_hit', 'a/B'): 1},
+        })
+        stats.reset()
+        self.assertEqual(stats.summary()['timings'], {})
+
+    def test_prometheus_text(self):
+        stats = evelink_instrumentation.Aggregator()
+        stats.timing('fetch', 'a/B', 0.5)
+        stats.size('response', 'a/B', 1024)
+        stats.count('cache_stale', None)
+        text = evelink_instrumentation.prometheus_text(stats)
+        self.assertTrue('# TYPE evelink_seconds summary\n' in text)
+        self.assertTrue('evelink_seconds_sum{step="fetch",path="a/B"} 0.5\n' in text)
+        self.assertTrue('evelink_seconds_count{step="fetch",path="a/B"} 1\n' in text)
+        self.assertTrue('evelink_bytes_sum{step="response",path="a/B"} 1024\n' in text)
+        self.assertTrue('evelink_events_total{event="cache_stale",path=""} 1\n' in text)
+
+
+class StatsdTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.settimeout(5)
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_send(self):
+        statsd = evelink_instrumentation.StatsdInstrument(
+            port=self.server.getsockname()[1], prefix='eve')
+        statsd.timing('fetch', 'char/WalletJournal', 0.0125)
+        statsd.size('response', 'char/WalletJournal', 2048)
+        statsd.count('cache_stale', None)
+
+        self.assertEqual([self.server.recv(1024) for _ in range(3)], [
+            'eve.fetch.char.WalletJournal:12.500|ms',
+            'eve.response.char.WalletJournal:2048|h',
+            'eve.cache_stale:1|c',
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import copy
+
+import mock
+import unittest2 as unittest
+
+import evelink.api as evelink_api
+import evelink.kill_log as evelink_kill_log
+from evelink.parsing.kills import parse_kills
+from tests.utils import make_api_result
+
+
+def make_kills(*kill_ids):
+    """Build parsed kills with the given IDs from the kills fixture."""
+    template = parse_kills(make_api_result("char/kills.xml").result)[15640545]
+    kills = {}
+    for kill_id in kill_ids:
+        kill = copy.deepcopy(template)
+        kill['id'] = kill_id
+        kills[kill_id] = kill
+    return kills
+
+
+def kill_page(kills):
+    return evelink_api.APIResult(kills, 12345, 67890)
+
+
+class KillStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.store = evelink_kill_log.KillStore()
+
+    def test_add_and_get(self):
+        kills = parse_kills(make_api_result("char/kills.xml").result)
+        self.assertEqual(self.store.add(kills), 2)
+        self.assertEqual(self.store.add(kills), 0)
+
+        self.assertEqual(len(self.store), 2)
+        self.assertTrue(15640545 in self.store)
+        self.assertEqual(self.store.get(15640545), kills[15640545])
+        self.assertEqual(self.store.get(1), None)
+        self.assertEqual(self.store.min_id(), 15640545)
+        self.assertEqual(self.store.max_id(), 15640551)
+
+    def test_find(self):
+        kills = parse_kills(make_api_result("char/kills.xml").result)
+        self.store.add(kills)
+
+        self.assertEqual(self.store.find(system_id=30001160), kills)
+        self.assertEqual(self.store.find(system_id=1), {})
+        self.assertEqual(self.store.find(ship_type_id=670), kills)
+        self.assertEqual(self.store.find(attacker_corp_id=224588600), kills)
+        self.assertEqual(self.store.find(attacker_alliance_id=5514808), kills)
+        self.assertEqual(self.store.find(attacker_alliance_id=1254074), {})
+        self.assertEqual(
+            self.store.find(since=1290612540).keys(),
+            [15640551],
+        )
+        self.assertEqual(
+            self.store.find(system_id=30001160, until=1290612540).keys(),
+            [15640545],
+        )
+
+    def test_backfilled(self):
+        self.assertFalse(self.store.backfilled)
+        self.store.backfilled = True
+        self.assertTrue(self.store.backfilled)
+
+
+class KillCrawlerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.store = evelink_kill_log.KillStore()
+        self.client = mock.Mock()
+        self.crawler = evelink_kill_log.KillCrawler(self.client, self.store)
+
+    def test_backfill(self):
+        self.client.kills.side_effect = [
+            kill_page(make_kills(30, 29, 28)),
+            kill_page(make_kills(27, 26)),
+            kill_page({}),
+        ]
+
+        self.assertEqual(self.crawler.backfill(), 5)
+        self.assertEqual(self.client.kills.mock_calls, [
+            mock.call(before_kill=None),
+            mock.call(before_kill=28),
+            mock.call(before_kill=26),
+        ])
+        self.assertTrue(self.store.backfilled)
+
+    def test_backfill_exhausted(self):
+        self.store.add(make_kills(30))
+        self.client.kills.side_effect = evelink_api.APIError(
+            '119', 'Kills exhausted', 12345, 67890)
+
+        self.assertEqual(self.crawler.backfill(), 0)
+        self.assertEqual(self.client.kills.mock_calls, [
+            mock.call(before_kill=30),
+        ])
+        self.assertTrue(self.store.backfilled)
+
+    def test_backfill_error(self):
+        self.client.kills.side_effect = evelink_api.APIError(
+            '221', 'Illegal page request!', 12345, 67890)
+        self.assertRaises(evelink_api.APIError, self.crawler.backfill)
+        self.assertFalse(self.store.backfilled)
+
+    def test_poll(self):
+        self.store.add(make_kills(20, 19))
+        self.client.kills.side_effect = [
+            kill_page(make_kills(25, 24)),
+            kill_page(make_kills(23, 22, 21, 20)),
+        ]
+
+        self.assertEqual(self.crawler.poll(), 5)
+        self.assertEqual(self.client.kills.mock_calls, [
+            mock.call(before_kill=None),
+            mock.call(before_kill=24),
+        ])
+        self.assertEqual(self.store.max_id(), 25)
+
+    def test_poll_nothing_new(self):
+        self.store.add(make_kills(20, 19))
+        self.client.kills.return_value = kill_page(make_kills(20, 19))
+
+        self.assertEqual(self.crawler.poll(), 0)
+        self.assertEqual(self.client.kills.mock_calls, [
+            mock.call(before_kill=None),
+        ])
+
+    def test_sync(self):
+        self.client.kills.side_effect = [
+            kill_page(make_kills(20, 19)),
+            kill_page({}),
+            kill_page(make_kills(21, 20)),
+        ]
+
+        self.assertEqual(self.crawler.sync(), 3)
+        self.assertTrue(self.store.backfilled)
+
+        # Later syncs only poll.
+        self.client.kills.side_effect = [kill_page(make_kills(21))]
+        self.assertEqual(self.crawler.sync(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+import os
+import tempfile
+
+import mock
+import unittest2 as unittest
+
+import evelink.api as evelink_api
+import evelink.names as evelink_names
+from evelink.char import Char
+from evelink.parsing.kills import parse_kills
+from evelink.parsing.wallet_journal import parse_wallet_journal
+from tests.utils import make_api_result
+
+
+NAMES = {1: 'EVE System', 2: 'EVE Central Bank', 3: 'Pilot 333'}
+
+
+def fake_names_from_ids(id_list):
+    if any(i not in NAMES for i in id_list):
+        raise evelink_api.APIError('135', 'Invalid or missing list of names', 12345, 67890)
+    return evelink_api.APIResult(dict((i, NAMES[i]) for i in id_list), 12345, 67890)
+
+
+def fake_ids_from_names(name_list):
+    ids = dict((v, k) for k, v in NAMES.iteritems())
+    return evelink_api.APIResult(dict((n, ids.get(n)) for n in name_list), 12345, 67890)
+
+
+class NameResolverTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.eve = mock.Mock()
+        self.eve.character_names_from_ids.side_effect = fake_names_from_ids
+        self.eve.character_ids_from_names.side_effect = fake_ids_from_names
+        self.resolver = evelink_names.NameResolver(eve=self.eve)
+
+    def test_names_for_ids(self):
+        self.assertEqual(self.resolver.names_for_ids([1, 2]), {1: 'EVE System', 2: 'EVE Central Bank'})
+        self.assertEqual(self.resolver.name_for_id(1), 'EVE System')
+        # The second lookup is served locally.
+        self.assertEqual(self.eve.character_names_from_ids.mock_calls, [
+            mock.call([1, 2]),
+        ])
+
+    def test_only_missing_ids_fetched(self):
+        self.resolver.seed([(1, 'EVE System')])
+        self.resolver.names_for_ids([1, 2])
+        self.assertEqual(self.eve.character_names_from_ids.mock_calls, [
+            mock.call([2]),
+        ])
+
+    def test_invalid_ids(self):
+        self.assertEqual(self.resolver.names_for_ids([1, 2, 3, 4]), {
+            1: 'EVE System', 2: 'EVE Central Bank', 3: 'Pilot 333', 4: None,
+        })
+        self.eve.character_names_from_ids.reset_mock()
+
+        # Invalid IDs are negatively cached.
+        self.assertEqual(self.resolver.name_for_id(4), None)
+        self.assertFalse(self.eve.character_names_from_ids.called)
+
+    def test_invalid_ids_expire(self):
+        self.resolver.negative_ttl = -1
+        self.resolver.name_for_id(4)
+        self.eve.character_names_from_ids.reset_mock()
+        self.resolver.name_for_id(4)
+        self.assertTrue(self.eve.character_names_from_ids.called)
+
+    def test_ids_for_names(self):
+        self.assertEqual(
+            self.resolver.ids_for_names(['EVE System', 'Nobody']),
+            {'EVE System': 1, 'Nobody': None},
+        )
+        self.assertEqual(self.resolver.id_for_name('EVE System'), 1)
+        self.assertEqual(self.resolver.name_for_id(1), 'EVE System')
+        self.assertEqual(len(self.eve.character_ids_from_names.mock_calls), 1)
+        self.assertFalse(self.eve.character_names_from_ids.called)
+
+    def test_unknown_names(self):
+        self.assertEqual(self.resolver.ids_for_names(['Nobody']), {'Nobody': None})
+        self.assertEqual(self.resolver.ids_for_names(['Nobody', 'EVE System']),
+                         {'Nobody': None, 'EVE System': 1})
+        self.assertEqual(self.eve.character_ids_from_names.mock_calls, [
+                mock.call(['Nobody']),
+                mock.call(['EVE System']),
+            ])
+
+        # Until they expire.
+        self.resolver.unknown_names['Nobody'] = 0
+        self.resolver.ids_for_names(['Nobody'])
+        self.assertEqual(len(self.eve.character_ids_from_names.mock_calls), 3)
+
+    def test_seed_result(self):
+        journal = parse_wallet_journal(make_api_result("char/wallet_journal.xml").result)
+        self.assertEqual(self.resolver.seed_result('char/WalletJournal', journal), 2)
+        self.assertEqual(self.resolver.seed_result('char/Nope', journal), 0)
+        # Projected results without the names are ignored.
+        self.assertEqual(self.resolver.seed_result('corp/WalletJournal', [{'amount': 1.0}]), 0)
+
+    def test_seeded_by_api(self):
+        api = evelink_api.API(name_resolver=self.resolver)
+        api.send_request = mock.Mock(return_value='')
+        api._handle_response = mock.Mock(
+            return_value=make_api_result("char/wallet_journal.xml"))
+        Char(1, api=api).wallet_journal()
+        self.assertEqual(self.resolver.name_for_id(150337897), 'corpslave12')
+        self.assertFalse(self.eve.character_names_from_ids.called)
+
+    def test_seed(self):
+        self.assertEqual(self.resolver.seed([(1, 'EVE System'), (0, ''), (5, '')]), 1)
+        self.assertEqual(self.resolver.seed([(1, 'EVE System')]), 0)
+        self.assertEqual(self.resolver.name_for_id(1), 'EVE System')
+        self.assertFalse(self.eve.character_names_from_ids.called)
+
+    def test_seed_from_parsed_results(self):
+        journal = parse_wallet_journal(make_api_result("char/wallet_journal.xml").result)
+        kills = parse_kills(make_api_result("char/kills.xml").result)
+        self.resolver.seed(evelink_names.journal_names(journal))
+        self.resolver.seed(evelink_names.kill_names(kills))
+
+        self.assertEqual(self.resolver.names_for_ids([150337897, 1000132, 150080271, 224588600, 5514808]), {
+            150337897: 'corpslave12',
+            1000132: 'Secure Commerce Commission',
+            150080271: 'Pilot 333',
+            224588600: 'Inkblot Squad',
+            5514808: 'Authorities of EVE',
+        })
+        self.assertFalse(self.eve.character_names_from_ids.called)
+
+
+class PersistentNameResolverTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.db_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.db_dir, 'names')
+        self.eve = mock.Mock()
+        self.eve.character_names_from_ids.side_effect = fake_names_from_ids
+
+    def tearDown(self):
+        try:
+          os.remove(self.db_path)
+        except OSError:
+          pass
+        try:
+          os.rmdir(self.db_dir)
+        except OSError:
+          pass
+
+    def test_persistence(self):
+        resolver = evelink_names.NameResolver(eve=self.eve, path=self.db_path)
+        resolver.names_for_ids([1, 4])
+        resolver.connection.close()
+        self.eve.character_names_from_ids.reset_mock()
+
+        resolver = evelink_names.NameResolver(eve=self.eve, path=self.db_path)
+        self.assertEqual(resolver.names, {1: 'EVE System'})
+        self.assertEqual(resolver.names_for_ids([1, 4]), {1: 'EVE System', 4: None})
+        self.assertFalse(self.eve.character_names_from_ids.called)
+        resolver.connection.close()
+
+    def test_unknown_names_persist(self):
+        self.eve.character_ids_from_names.side_effect = fake_ids_from_names
+        resolver = evelink_names.NameResolver(eve=self.eve, path=self.db_path)
+        resolver.ids_for_names(['Nobody'])
+        resolver.connection.close()
+
+        resolver = evelink_names.NameResolver(eve=self.eve, path=self.db_path)
+        self.assertEqual(resolver.ids_for_names(['Nobody']), {'Nobody': None})
+        self.assertEqual(len(self.eve.character_ids_from_names.mock_calls), 1)
+        resolver.connection.close()
+
+    def test_cold_start(self):
+        resolver = evelink_names.NameResolver(eve=self.eve, path=self.db_path)
+        resolver.seed([(1, 'EVE System')])
+        resolver.connection.close()
+
+        resolver = evelink_names.NameResolver(eve=self.eve, path=self.db_path, warm=False)
+        self.assertEqual(resolver.names, {})
+        self.assertEqual(resolver.name_for_id(1), 'EVE System')
+        self.assertFalse(self.eve.character_names_from_ids.called)
+        resolver.connection.close()
+
+    def test_cold_start_negative(self):
+        self.eve.character_ids_from_names.side_effect = fake_ids_from_names
+        resolver = evelink_names.NameResolver(eve=self.eve, path=self.db_path)
+        resolver.names_for_ids([1, 4])
+        resolver.ids_for_names(['Nobody'])
+        resolver.connection.close()
+        self.eve.reset_mock()
+
+        resolver = evelink_names.NameResolver(eve=self.eve, path=self.db_path, warm=False)
+        self.assertEqual(resolver.names_for_ids([1, 4]), {1: 'EVE System', 4: None})
+        self.assertEqual(resolver.ids_for_names(['EVE System', 'Nobody']),
+                         {'EVE System': 1, 'Nobody': None})
+        self.assertFalse(self.eve.character_names_from_ids.called)
+        self.assertFalse(self.eve.character_ids_from_names.called)
+        resolver.connection.close()
+
+    def test_cold_start_negative_expires(self):
+        resolver = evelink_names.NameResolver(eve=self.eve, path=self.db_path, negative_ttl=-1)
+        resolver.names_for_ids([4])
+        resolver.connection.close()
+        self.eve.reset_mock()
+
+        resolver = evelink_names.NameResolver(eve=self.eve, path=self.db_path, warm=False)
+        self.assertEqual(resolver.names_for_ids([4]), {4: None})
+        self.assertTrue(self.eve.character_names_from_ids.called)
+        resolver.connection.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import subprocess
+import sys
+import unittest2 as unittest
+
+import evelink
+
+
+class PackageTestCase(unittest.TestCase):
+
+    def test_submodules(self):
+        self.assertEqual(evelink.char.__name__, 'evelink.char')
+        self.assertTrue(evelink.corp.Corp)
+        self.assertRaises(AttributeError, getattr, evelink, 'nothing')
+        namespace = {}
+        exec 'from evelink import *' in namespace
+        for name in evelink.__all__:
+            self.assertTrue(name in namespace)
+
+    def test_lazy_imports(self):
+        script = ('import sys, evelink; evelink.server.Server;'
+                  'print " ".join(sorted(m for m in sys.modules if sys.modules[m]))')
+        process = subprocess.Popen([sys.executable, '-c', script], stdout=subprocess.PIPE)
+        modules = process.communicate()[0].split()
+        self.assertTrue('evelink.server' in modules)
+        self.assertTrue('evelink.char' not in modules)
+        self.assertTrue('requests' not in modules)
+        self.assertTrue('urllib2' not in modules)
+
+
+if __name__ == "__main__":
+    unittest.main()
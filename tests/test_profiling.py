@@ -0,0 +1,164 @@
+import shutil
+import tempfile
+import time
+
+import mock
+import unittest2 as unittest
+
+import evelink.api as evelink_api
+import evelink.profiling as evelink_profiling
+from evelink.eve import EVE
+from evelink.server import Server
+
+
+RESPONSE = """<?xml version='1.0' encoding='UTF-8'?>
+<eveapi version="2">
+    <currentTime>2009-10-18 17:05:31</currentTime>
+    <result>
+        <serverOpen>True</serverOpen>
+        <onlinePlayers>38102</onlinePlayers>
+    </result>
+    <cachedUntil>2009-10-18 17:08:31</cachedUntil>
+</eveapi>"""
+
+NAMES = """<?xml version='1.0' encoding='UTF-8'?>
+<eveapi version="2">
+    <currentTime>2009-10-18 17:05:31</currentTime>
+    <result>
+        <rowset name="characters" key="characterID" columns="name,characterID" />
+    </result>
+    <cachedUntil>2009-10-18 17:08:31</cachedUntil>
+</eveapi>"""
+
+
+def slow_request(full_path, params):
+    time.sleep(0.1)
+    return RESPONSE
+
+
+class ProfilerTestCase(unittest.TestCase):
+
+    def make_server(self, profiler, send_request=slow_request):
+        api = evelink_api.API(profiler=profiler)
+        api.send_request = mock.Mock(side_effect=send_request)
+        return Server(api=api)
+
+    def test_slow_call(self):
+        profiler = evelink_profiling.Profiler(threshold=0.05, interval=0.001)
+        server = self.make_server(profiler)
+        self.assertEqual(server.server_status().result['players'], 38102)
+
+        profile, = profiler.profiles
+        self.assertEqual(profile.path, 'server/ServerStatus')
+        self.assertEqual(profile.kind, 'sampled')
+        self.assertEqual(profile.size, len(RESPONSE))
+        self.assertEqual(profile.fingerprint,
+                         evelink_profiling.fingerprint('server/ServerStatus', {}))
+        self.assertTrue(profile.elapsed >= 0.1)
+        functions = set(name for _, _, name in profile.stats)
+        self.assertTrue('slow_request' in functions)
+        self.assertTrue('sleep' not in functions)  # builtins have no frames
+
+    def test_nested_call(self):
+        profiler = evelink_profiling.Profiler(threshold=0.05, interval=0.001)
+        server = self.make_server(profiler)
+
+        def after_request():
+            time.sleep(0.1)
+
+        def outer():
+            server.server_status()
+            after_request()
+
+        profiler.run('outer/Call', {}, outer)
+        # The request is part of the outer profile, which is still
+        # sampled after it.
+        profile, = profiler.profiles
+        self.assertEqual(profile.path, 'outer/Call')
+        self.assertEqual(profile.size, len(RESPONSE))
+        functions = set(name for _, _, name in profile.stats)
+        self.assertTrue('slow_request' in functions)
+        self.assertTrue('after_request' in functions)
+
+    def test_batched_call(self):
+        profiler = evelink_profiling.Profiler(sample_rate=1.0)
+        api = evelink_api.API(profiler=profiler)
+        api.send_request = mock.Mock(return_value=NAMES)
+        EVE(api=api).character_names_from_ids(range(300))
+
+        # One profile per request of the batch.
+        self.assertEqual([p.path for p in profiler.profiles], ['eve/CharacterName'] * 2)
+        self.assertEqual([p.size for p in profiler.profiles], [len(NAMES)] * 2)
+
+    def test_fast_call(self):
+        profiler = evelink_profiling.Profiler(threshold=5)
+        server = self.make_server(profiler, lambda path, params: RESPONSE)
+        server.server_status()
+        self.assertEqual(len(profiler.profiles), 0)
+
+    def test_sampled_call(self):
+        profiler = evelink_profiling.Profiler(sample_rate=1.0)
+        server = self.make_server(profiler, lambda path, params: RESPONSE)
+        server.server_status()
+        server.server_status()
+
+        self.assertEqual([p.kind for p in profiler.profiles], ['cprofile', 'cprofile'])
+        # The second call is a cache hit, which still has a payload.
+        self.assertEqual([p.size for p in profiler.profiles], [len(RESPONSE)] * 2)
+        functions = set(name for _, _, name in profiler.profiles[0].stats)
+        self.assertTrue('parse_response' in functions)
+
+    def test_error(self):
+        profiler = evelink_profiling.Profiler(sample_rate=1.0)
+        server = self.make_server(profiler, mock.Mock(side_effect=IOError))
+        self.assertRaises(IOError, server.server_status)
+        self.assertEqual(profiler.profiles[0].error, 'IOError')
+
+    def test_fingerprint(self):
+        fp = evelink_profiling.fingerprint
+        self.assertEqual(fp('char/WalletJournal', {'a': 1, 'b': 2}),
+                         fp('char/WalletJournal', {'b': 2, 'a': 1}))
+        self.assertNotEqual(fp('char/WalletJournal', {'a': 1}),
+                            fp('char/WalletJournal', {'a': 2}))
+
+
+class StorageTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_save_and_summarize(self):
+        profiler = evelink_profiling.Profiler(sample_rate=1.0, directory=self.directory)
+        api = evelink_api.API(profiler=profiler)
+        api.send_request = mock.Mock(return_value=RESPONSE)
+        Server(api=api).server_status()
+        self.assertEqual(len(profiler.profiles), 0)
+
+        profile, = evelink_profiling.load_profiles(self.directory)
+        self.assertEqual(profile.path, 'server/ServerStatus')
+        self.assertEqual(profile.size, len(RESPONSE))
+
+        summary = evelink_profiling.summarize([profile], top=10)
+        self.assertTrue('server/ServerStatus' in summary)
+        self.assertTrue('cumulative' in summary)
+        self.assertTrue('(_handle_response)' in summary)
+
+    def test_sampled_stats(self):
+        stacks = {
+            (('a.py', 1, 'outer'), ('a.py', 5, 'inner')): 3,
+            (('a.py', 1, 'outer'),): 1,
+        }
+        stats = evelink_profiling._stacks_to_stats(stacks, 0.01)
+        outer, inner = ('a.py', 1, 'outer'), ('a.py', 5, 'inner')
+        self.assertEqual(stats[outer][:2], (4, 4))
+        self.assertAlmostEqual(stats[outer][2], 0.01)
+        self.assertAlmostEqual(stats[outer][3], 0.04)
+        self.assertAlmostEqual(stats[inner][2], 0.03)
+        self.assertEqual(stats[inner][4].keys(), [outer])
+
+
+if __name__ == "__main__":
+    unittest.main()
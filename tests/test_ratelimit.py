@@ -0,0 +1,35 @@
+import mock
+import unittest2 as unittest
+
+import evelink.ratelimit as evelink_ratelimit
+
+
+class RateLimiterTestCase(unittest.TestCase):
+
+    @mock.patch('evelink.ratelimit.time')
+    def test_acquire(self, mock_time):
+        mock_time.time.return_value = 1000.0
+        limiter = evelink_ratelimit.RateLimiter(2)
+
+        # The burst (a second's worth) goes through at once...
+        self.assertEqual(limiter.acquire(), 0)
+        self.assertEqual(limiter.acquire(), 0)
+        self.assertFalse(mock_time.sleep.called)
+
+        # ...then requests are spaced out, in order.
+        self.assertAlmostEqual(limiter.acquire(), 0.5)
+        self.assertAlmostEqual(limiter.acquire(), 1.0)
+        self.assertEqual(mock_time.sleep.call_count, 2)
+
+        # Tokens come back over time, up to the burst.
+        mock_time.time.return_value = 1011.0
+        self.assertEqual(limiter.acquire(), 0)
+        self.assertEqual(limiter.acquire(), 0)
+        self.assertAlmostEqual(limiter.acquire(), 0.5)
+
+    def test_bad_rate(self):
+        self.assertRaises(ValueError, evelink_ratelimit.RateLimiter, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
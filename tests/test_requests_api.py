@@ -1,4 +1,5 @@
 from StringIO import StringIO
+import zlib
 import unittest2 as unittest
 
 import mock
@@ -7,11 +8,17 @@ import evelink.api as evelink_api
 
 
 class DummyResponse(object):
-    def __init__(self, content):
+    def __init__(self, content, headers=None):
         self.content = content
+        self.headers = headers or {}
+        self.raw = mock.Mock()
+        self.raw.read.return_value = content
 
+    def close(self):
+        pass
 
-@unittest.skipIf(not evelink_api._has_requests, '`requests` not available')
+
+@unittest.skipIf(not evelink_api._import_requests(), '`requests` not available')
 class RequestsAPITestCase(unittest.TestCase):
 
     def setUp(self):
@@ -108,9 +115,21 @@ class RequestsAPITestCase(unittest.TestCase):
                 mock.call(
                     'https://api.eveonline.com/foo.xml.aspx',
                     params='a=2%2C3%2C4&vCode=code&keyID=1',
+                    stream=True,
+                    headers={'Accept-Encoding': 'gzip'},
                 ),
             ])
 
+    def test_get_deflated(self):
+        self.mock_sessions.post.return_value = DummyResponse(
+            zlib.compress(self.test_xml), {'content-encoding': 'deflate'})
+        self.cache.get.return_value = None
+
+        tree, current, expires = self.api.get('foo/Bar', {'a':[1,2,3]})
+        self.assertEqual(len(tree.find('rowset').findall('row')), 2)
+        # Cached decoded, so the parser can read it back.
+        self.assertEqual(self.cache.put.call_args[0][1], self.test_xml)
+
     def test_get_with_error(self):
         self.mock_sessions.get.return_value = DummyResponse(self.error_xml)
         self.cache.get.return_value = None
@@ -0,0 +1,83 @@
+import collections
+import json
+from StringIO import StringIO
+
+import unittest2 as unittest
+
+import evelink.api as evelink_api
+import evelink.serialize as evelink_serialize
+from evelink.parsing import wallet_journal as evelink_wallet_journal
+from tests.utils import make_api_result
+
+
+Record = collections.namedtuple('Record', ['id', 'name'])
+
+
+class SerializeTestCase(unittest.TestCase):
+
+    def write_json(self, result):
+        out = StringIO()
+        evelink_serialize.write_json(result, out)
+        return out.getvalue()
+
+    def write_ndjson(self, result):
+        out = StringIO()
+        evelink_serialize.write_ndjson(result, out)
+        return out.getvalue()
+
+    def test_dumps(self):
+        self.assertEqual(evelink_serialize.dumps({'b': set([3, 1, 2]), 'a': frozenset()}),
+                         '{"a":[],"b":[1,2,3]}')
+        self.assertEqual(evelink_serialize.dumps(Record(1, 'Foo')), '{"id":1,"name":"Foo"}')
+        self.assertEqual(evelink_serialize.dumps(i * 2 for i in xrange(3)), '[0,2,4]')
+        self.assertRaises(TypeError, evelink_serialize.dumps, object())
+
+    def test_dumps_nested_records(self):
+        self.assertEqual(evelink_serialize.dumps({'x': {1: Record(1, 'a')}}),
+                         '{"x":{"1":{"id":1,"name":"a"}}}')
+        self.assertEqual(evelink_serialize.dumps([(Record(1, 'a'),)]),
+                         '[[{"id":1,"name":"a"}]]')
+
+    def test_write_json(self):
+        result = evelink_api.APIResult({'certificates': set([2, 1]), 'id': 3}, 12345, 67890)
+        output = self.write_json(result)
+        self.assertEqual(output, '{"expires":67890,"result":{"certificates":[1,2],"id":3},"timestamp":12345}')
+
+        rows = [Record(1, 'Foo'), Record(2, 'Bar')]
+        self.assertEqual(json.loads(self.write_json(iter(rows))),
+                         [{'id': 1, 'name': 'Foo'}, {'id': 2, 'name': 'Bar'}])
+        self.assertEqual(json.loads(self.write_json({1: 'a', 'b': [1, 2]})),
+                         {'1': 'a', 'b': [1, 2]})
+        self.assertEqual(self.write_json([]), '[]')
+
+    def test_write_json_records_by_id(self):
+        result = {1: Record(1, 'Foo'), 2: Record(2, 'Bar')}
+        self.assertEqual(self.write_json(result),
+                         '{"1":{"id":1,"name":"Foo"},"2":{"id":2,"name":"Bar"}}')
+        # The same rows write_ndjson writes, in key order.
+        parsed = json.loads(self.write_json(result))
+        self.assertEqual([parsed[key] for key in sorted(parsed)],
+                         [json.loads(line) for line in self.write_ndjson(result).splitlines()])
+
+    def test_write_ndjson(self):
+        self.assertEqual(self.write_ndjson([{'a': 1}, Record(2, 'Bar')]),
+                         '{"a":1}\n{"id":2,"name":"Bar"}\n')
+        # Rows keyed by ID are split, other mappings are one row.
+        self.assertEqual(self.write_ndjson({2: {'id': 2}, 1: {'id': 1}}),
+                         '{"id":1}\n{"id":2}\n')
+        self.assertEqual(self.write_ndjson({1: 'Foo', 2: 'Bar'}),
+                         '{"1":"Foo","2":"Bar"}\n')
+        self.assertEqual(self.write_ndjson(evelink_api.APIResult(set([2, 1]), 0, 0)),
+                         '1\n2\n')
+        self.assertEqual(self.write_ndjson('Foo'), '"Foo"\n')
+
+    def test_lazy_rows(self):
+        api_result, _, _ = make_api_result("char/wallet_journal.xml")
+        parsed = evelink_wallet_journal.parse_wallet_journal(api_result)
+        lazy = evelink_wallet_journal.parse_wallet_journal(api_result, lazy=True)
+        self.assertEqual(self.write_ndjson(lazy), self.write_ndjson(parsed))
+        self.assertEqual(json.loads(self.write_json(lazy)), parsed)
+
+
+if __name__ == "__main__":
+    unittest.main()
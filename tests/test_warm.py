@@ -0,0 +1,83 @@
+import mock
+import unittest2 as unittest
+
+import evelink.api as evelink_api
+import evelink.warm as evelink_warm
+from evelink.char import Char
+from evelink.eve import EVE
+
+
+RESPONSE = """<?xml version='1.0' encoding='UTF-8'?>
+<eveapi version="2">
+    <currentTime>2009-10-18 17:05:31</currentTime>
+    <result>
+        <rowset name="rows" key="id" columns="id" />
+    </result>
+    <cachedUntil>2009-10-18 17:35:31</cachedUntil>
+</eveapi>"""
+
+MANIFEST = {
+    'keys': [
+        {'id': 1, 'vcode': 'abc', 'char_ids': [10, 11]},
+        {'id': 2, 'vcode': 'def'},
+    ],
+    'methods': [
+        'char.Char.wallet_journal',
+        'account.Account.status',
+        'server.Server.server_status',
+        {'method': 'eve.EVE.character_names_from_ids', 'args': {'id_list': range(300)}},
+    ],
+}
+
+
+@mock.patch.object(evelink_api.API, 'send_request')
+class WarmTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = evelink_api.APICache()
+
+    def test_requests(self, mock_send):
+        requests = list(evelink_warm.requests(MANIFEST, lambda api_key: api_key))
+        self.assertEqual([(r.label, r.api, r.path) for r in requests], [
+            ('char.Char.wallet_journal 10', (1, 'abc'), 'char/WalletJournal'),
+            ('char.Char.wallet_journal 11', (1, 'abc'), 'char/WalletJournal'),
+            ('account.Account.status key 1', (1, 'abc'), 'account/AccountStatus'),
+            ('account.Account.status key 2', (2, 'def'), 'account/AccountStatus'),
+            ('server.Server.server_status', None, 'server/ServerStatus'),
+            # Split into requests of at most 250 IDs, like the method.
+            ('eve.EVE.character_names_from_ids', None, 'eve/CharacterName'),
+            ('eve.EVE.character_names_from_ids', None, 'eve/CharacterName'),
+        ])
+        self.assertEqual(requests[0].params, {'characterID': 10})
+        self.assertEqual(requests[6].params, {'IDs': range(250, 300)})
+
+    def test_warm(self, mock_send):
+        mock_send.return_value = RESPONSE
+        progress = mock.Mock()
+        report = evelink_warm.warm(MANIFEST, self.cache, workers=4, progress=progress)
+        self.assertEqual(report, {'requests': 7, 'fetched': 7, 'cached': 0,
+                                  'errors': 0, 'bytes': 7 * len(RESPONSE)})
+        self.assertEqual(progress.call_count, 7)
+        self.assertEqual(progress.call_args[0][:2], (7, 7))
+
+        # Everything is still cached, and found by the methods themselves.
+        report = evelink_warm.warm(MANIFEST, self.cache)
+        self.assertEqual((report['fetched'], report['cached']), (0, 7))
+        api = evelink_api.API(cache=self.cache, api_key=(1, 'abc'))
+        Char(11, api=api).wallet_journal()
+        EVE(api=evelink_api.API(cache=self.cache)).character_names_from_ids(range(300))
+        self.assertEqual(mock_send.call_count, 7)
+
+    def test_errors(self, mock_send):
+        mock_send.side_effect = IOError('Connection refused')
+        report = evelink_warm.warm({'methods': ['server.Server.server_status']}, self.cache)
+        self.assertEqual((report['fetched'], report['errors']), (0, 1))
+
+        for manifest in ({'methods': ['server.Nope.server_status']},
+                         {'methods': ['server_status']},
+                         {'methods': ['eve.EVE.character_names_from_ids']}):
+            self.assertRaises(ValueError, evelink_warm.warm, manifest, self.cache)
+
+
+if __name__ == "__main__":
+    unittest.main()